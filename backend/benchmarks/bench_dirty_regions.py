@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Measure how much of the frame the compositor blends per frame in a typical video.
+
+Lays out a word-timed narration and one diagram per 15 seconds on a 1080x1920
+frame (captions in the band at 75% height, diagrams 15% from the top at 70%
+width), then walks the timeline at 24 fps. For every frame it sums the bounding
+rectangles of the active overlay layers and compares that with blending each of
+them across the full frame. Also times the blend of the static caption overlay,
+a full-frame RGBA image, which is trimmed to its text's rectangle.
+
+Usage:
+    python backend/benchmarks/bench_dirty_regions.py [--words 200]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from PIL import Image
+
+from pipeline.timeline import IntervalIndex
+from pipeline.video_composer import (
+    OverlayClip,
+    _create_diagram_overlays,
+    _create_text_overlay,
+    _create_timed_captions,
+)
+from bench_overlay_frames import build_segments
+
+RESOLUTION = (1080, 1920)
+FPS = 24
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=200, help="Number of narrated words")
+    args = parser.parse_args()
+
+    width, height = RESOLUTION
+    timed_segments, word_timings = build_segments(args.words)
+    duration = word_timings[-1]["end_ms"] / 1000 + 1.5
+
+    diagram_png = Path(__file__).parent / "_bench_diagram.png"
+    Image.new("RGB", (900, 600), (200, 230, 255)).save(diagram_png)
+    try:
+        diagram_timings = [
+            {"png_path": str(diagram_png), "start_s": start, "duration_s": 5.0, "label": "d"}
+            for start in np.arange(5.0, duration - 5.0, 15.0)
+        ]
+        layers = _create_diagram_overlays(diagram_timings, RESOLUTION, duration)
+    finally:
+        diagram_png.unlink()
+    layers += _create_timed_captions(timed_segments, RESOLUTION, word_timings=word_timings)
+    index = IntervalIndex([(layer.start, layer.end) for layer in layers])
+
+    frame_area = width * height
+    frames = 0
+    full_area = 0
+    dirty_area = 0
+    for t in np.arange(0, duration, 1 / FPS):
+        frames += 1
+        for i in index.active(t):
+            full_area += frame_area
+            bounds = layers[i].frame_bounds(t, (height, width))
+            if bounds:
+                x1, y1, x2, y2 = bounds
+                dirty_area += (x2 - x1) * (y2 - y1)
+
+    print(f"Frames:                {frames} ({duration:.1f}s, {len(layers)} layers)")
+    print(f"Full-frame blending:   {full_area / frames / 1e6:6.2f} Mpx/frame")
+    print(f"Layer rectangles:      {dirty_area / frames / 1e6:6.2f} Mpx/frame "
+          f"({100 * (1 - dirty_area / full_area):.0f}% less)")
+
+    # Static caption: a full-frame RGBA overlay blended over the gameplay
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    overlay = OverlayClip(_create_text_overlay(
+        "The mitochondria is the powerhouse of the cell", RESOLUTION
+    )).set_duration(10).set_position('center')
+    x1, y1, x2, y2 = overlay.frame_bounds(0, (height, width))
+    start = time.perf_counter()
+    for _ in range(50):
+        overlay.blend_into(frame, 1.0)
+    elapsed = (time.perf_counter() - start) / 50
+    print(f"Static caption:        {(x2 - x1) * (y2 - y1) / frame_area:.1%} of the frame, "
+          f"{1000 * elapsed:.2f} ms/blend")
+
+
+if __name__ == "__main__":
+    main()
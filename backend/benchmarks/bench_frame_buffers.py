@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Count per-frame buffer allocations of the render loops with and without frame pools.
+
+Composite loop: renders a 1080x1920 composite of a gameplay frame, a crossfading
+diagram and word-timed captions through IndexedCompositeVideoClip, once allocating
+every frame and blend intermediate and once with a FramePool (one reused frame and
+scratch buffer). Reports, per frame, the frame buffers allocated, the peak of
+transient traced allocations and the CPU time.
+
+ffmpeg engine: renders a short job with the direct ffmpeg engine, once with a
+pool that never reuses buffers and once with the default pool, and reports frame
+buffer allocations per frame and wall time.
+
+Usage:
+    python backend/benchmarks/bench_frame_buffers.py [--words 120] [--frames 96] [--seconds 10]
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from pipeline.ffmpeg_io import ffmpeg_binary
+from pipeline.frame_buffers import FramePool
+from pipeline.video_composer import (
+    ImageClip,
+    IndexedCompositeVideoClip,
+    OverlayClip,
+    _create_timed_captions,
+    _render_with_ffmpeg,
+)
+from bench_overlay_frames import build_segments
+
+RESOLUTION = (1080, 1920)
+FRAME_BYTES = RESOLUTION[0] * RESOLUTION[1] * 3
+
+
+def render(composite, times) -> tuple[float, float]:
+    """Render frames at `times`; return (cpu_s per frame, mean peak transient bytes per frame)."""
+    peaks = []
+    tracemalloc.start()
+    cpu_start = time.process_time()
+    for t in times:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        composite.get_frame(t)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+    cpu = time.process_time() - cpu_start
+    tracemalloc.stop()
+    return cpu / len(times), float(np.mean(peaks))
+
+
+def bench_composite(words: int, frames: int):
+    rng = np.random.default_rng(0)
+    duration = frames / 24
+    gameplay = ImageClip(rng.integers(0, 256, (1920, 1080, 3), dtype=np.uint8))
+    gameplay = gameplay.set_duration(duration)
+
+    diagram = OverlayClip(rng.integers(0, 256, (500, 756, 3), dtype=np.uint8))
+    diagram = diagram.set_start(0).set_duration(duration).set_position(('center', 288))
+    diagram = diagram.crossfade(min(0.5, duration / 3))
+
+    timed_segments, word_timings = build_segments(words)
+    layers = [gameplay, diagram] + _create_timed_captions(
+        timed_segments, RESOLUTION, word_timings=word_timings
+    )
+    times = [i / 24 for i in range(frames)]
+
+    allocating = IndexedCompositeVideoClip(layers)
+    alloc_cpu, alloc_peak = render(allocating, times)
+
+    pool = FramePool((RESOLUTION[1], RESOLUTION[0], 3))
+    pooled = IndexedCompositeVideoClip(layers, frame_pool=pool)
+    pool_cpu, pool_peak = render(pooled, times)
+
+    print(f"Composite loop ({frames} frames, {words} words, 1080x1920)")
+    print(f"  allocating: 1.00 frame buffers/frame  "
+          f"peak transient {alloc_peak / 1e6:6.2f} MB/frame  {1000 * alloc_cpu:6.1f} ms/frame")
+    print(f"  pooled:     {pool.stats()['allocations_per_frame']:.2f} frame buffers/frame  "
+          f"peak transient {pool_peak / 1e6:6.2f} MB/frame  {1000 * pool_cpu:6.1f} ms/frame")
+
+
+def bench_engine(seconds: float):
+    ffmpeg = ffmpeg_binary()
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        subprocess.run(
+            [ffmpeg, "-y", "-loglevel", "error", "-f", "lavfi",
+             "-i", "testsrc=size=1280x720:rate=30:duration=4",
+             "-pix_fmt", "yuv420p", str(workdir / "gameplay.mp4")],
+            check=True
+        )
+        subprocess.run(
+            [ffmpeg, "-y", "-loglevel", "error", "-f", "lavfi",
+             "-i", f"sine=frequency=440:duration={seconds}", str(workdir / "audio.mp3")],
+            check=True
+        )
+        timed_segments, word_timings = build_segments(int(seconds * 10 / 3))
+        overlays = _create_timed_captions(timed_segments, RESOLUTION, word_timings=word_timings)
+
+        print(f"ffmpeg engine ({seconds:g}s, 1080x1920)")
+        for name, pool in (
+            ("allocating", FramePool((RESOLUTION[1], RESOLUTION[0], 3), max_free=0)),
+            ("pooled", FramePool((RESOLUTION[1], RESOLUTION[0], 3))),
+        ):
+            start = time.perf_counter()
+            result = _render_with_ffmpeg(
+                str(workdir / "gameplay.mp4"), str(workdir / "audio.mp3"),
+                str(workdir / f"{name}.mp4"), RESOLUTION, seconds, overlays, [],
+                frame_pool=pool,
+            )
+            elapsed = time.perf_counter() - start
+            stats = result["frame_buffers"]
+            print(f"  {name + ':':11s} {stats['allocations_per_frame']:.2f} frame buffers/frame  "
+                  f"({stats['allocated']} for {stats['acquired']} frames, "
+                  f"{stats['bytes_allocated'] / 1e6:.0f} MB)  {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=120, help="Number of narrated words")
+    parser.add_argument("--frames", type=int, default=96, help="Composite frames to render")
+    parser.add_argument("--seconds", type=float, default=10, help="ffmpeg engine job length")
+    args = parser.parse_args()
+
+    bench_composite(args.words, args.frames)
+    bench_engine(args.seconds)
+
+
+if __name__ == "__main__":
+    main()
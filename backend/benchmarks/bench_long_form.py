@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Check that long-form rendering keeps peak memory flat as the narration grows.
+
+Renders a synthetic narration (a tone, word-timed captions at ~3.3 words per
+second and a diagram every minute) with the ffmpeg engine, once with every layer
+built up front and once with long_form=True streaming the layers from the
+timeline. Each render runs in a child process under an RLIMIT_AS address-space
+limit, so a mode whose memory grows with the duration fails instead of swapping;
+the child's peak RSS is reported next to the wall time.
+
+Usage:
+    python backend/benchmarks/bench_long_form.py [--minutes 1 30] [--width 1080 --height 1920]
+        [--limit-mb 2048]
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench_overlay_frames import build_segments
+from bench_render_engines import make_inputs
+
+
+def render(workdir: Path, seconds: float, resolution: tuple[int, int], long_form: bool):
+    """Render the synthetic narration (runs in the memory-limited child)."""
+    from pipeline.video_composer import compose_video
+
+    timed_segments, word_timings = build_segments(int(seconds * 10 / 3))
+    diagram_timings = [{
+        "png_path": str(workdir / "diagram.png"), "start_s": start, "duration_s": 20.0,
+        "label": "diagram",
+    } for start in range(20, int(seconds) - 20, 60)]
+    compose_video(
+        "", str(workdir / "narration.mp3"), str(workdir / "gameplay.mp4"),
+        str(workdir / f"{'long-form' if long_form else 'eager'}.mp4"),
+        resolution=resolution,
+        timed_segments=timed_segments,
+        word_timings=word_timings,
+        diagram_timings=diagram_timings,
+        engine="ffmpeg",
+        long_form=long_form,
+    )
+
+
+def child(args):
+    limit = args.limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    status = "ok"
+    try:
+        render(Path(args.workdir), args.seconds, (args.width, args.height), args.long_form)
+    except MemoryError:
+        status = "MemoryError"
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"status": status, "peak_rss_mb": peak_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 30])
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=1920)
+    parser.add_argument("--limit-mb", type=int, default=2048, help="RLIMIT_AS of each render")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--seconds", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--long-form", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args)
+        return
+
+    print(f"{args.width}x{args.height}, RLIMIT_AS {args.limit_mb} MB")
+    for minutes in args.minutes:
+        seconds = minutes * 60
+        with tempfile.TemporaryDirectory() as tmp:
+            make_inputs(Path(tmp), seconds)
+            for long_form in (False, True):
+                cmd = [
+                    sys.executable, __file__, "--child", "--workdir", tmp,
+                    "--seconds", str(seconds), "--width", str(args.width),
+                    "--height", str(args.height), "--limit-mb", str(args.limit_mb),
+                ]
+                if long_form:
+                    cmd.append("--long-form")
+                start = time.perf_counter()
+                result = subprocess.run(cmd, capture_output=True, text=True)
+                elapsed = time.perf_counter() - start
+                mode = "long-form" if long_form else "eager"
+                try:
+                    report = json.loads(result.stdout.strip().splitlines()[-1])
+                except (IndexError, json.JSONDecodeError):
+                    # Killed or crashed outside Python's MemoryError handling
+                    last_error = (result.stderr.strip().splitlines() or ["?"])[-1]
+                    report = {"status": f"failed: {last_error}", "peak_rss_mb": float("nan")}
+                print(f"{minutes:5.1f} min  {mode:10s} {elapsed:7.1f}s  "
+                      f"peak RSS {report['peak_rss_mb']:7.1f} MB  {report['status']}")
+
+
+if __name__ == "__main__":
+    main()
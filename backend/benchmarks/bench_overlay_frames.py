@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Benchmark in-memory caption overlays against the old PNG temp-file round trip.
+
+Renders the caption clips for a synthetic narration, then replays the previous
+behaviour (PNG encode to a NamedTemporaryFile, ImageClip load from disk, unlink)
+for the same frames so the per-job I/O and CPU that the in-memory path saves
+can be read off directly.
+
+Usage:
+    python backend/benchmarks/bench_overlay_frames.py [--words 600]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from PIL import Image
+
+from pipeline.video_composer import ImageClip, _create_timed_captions
+
+WORDS = "bro the cache is lowkey bussin no cap redis hits different fr".split()
+
+
+def build_segments(word_count: int, words_per_segment: int = 6) -> tuple[list, list]:
+    """Build synthetic timed_segments and word_timings for `word_count` words."""
+    word_timings = []
+    for i in range(word_count):
+        start_ms = i * 300
+        word_timings.append({"word": WORDS[i % len(WORDS)], "start_ms": start_ms, "end_ms": start_ms + 250})
+
+    timed_segments = []
+    for i in range(0, word_count, words_per_segment):
+        chunk = word_timings[i:i + words_per_segment]
+        timed_segments.append({
+            "text": " ".join(w["word"] for w in chunk),
+            "start_ms": chunk[0]["start_ms"],
+            "end_ms": chunk[-1]["end_ms"],
+        })
+    return timed_segments, word_timings
+
+
+def png_round_trip(frames: list) -> tuple[float, int]:
+    """Replay the old temp-file path for each RGBA frame; return (cpu_s, bytes_written)."""
+    bytes_written = 0
+    cpu_start = time.process_time()
+    for frame in frames:
+        temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
+        Image.fromarray(frame).save(temp_file.name, 'PNG')
+        temp_file.close()
+        bytes_written += os.path.getsize(temp_file.name)
+        ImageClip(temp_file.name)
+        os.unlink(temp_file.name)
+    return time.process_time() - cpu_start, bytes_written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=600, help="Number of narrated words")
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=1920)
+    args = parser.parse_args()
+
+    timed_segments, word_timings = build_segments(args.words)
+    resolution = (args.width, args.height)
+
+    cpu_start = time.process_time()
+    clips = _create_timed_captions(timed_segments, resolution, word_timings=word_timings)
+    render_cpu = time.process_time() - cpu_start
+
+    # Rebuild the RGBA frames exactly as they would have been written to disk
+    frames = []
+    for clip in clips:
+        rgb = clip.get_frame(0)
+        alpha = (clip.mask.get_frame(0) * 255).round().astype('uint8')
+        frames.append(np.dstack([rgb, alpha]))
+
+    round_trip_cpu, bytes_written = png_round_trip(frames)
+
+    print(f"Caption clips:               {len(clips)}")
+    print(f"In-memory render CPU:        {render_cpu:.3f}s")
+    print(f"Saved PNG round-trip CPU:    {round_trip_cpu:.3f}s "
+          f"({1000 * round_trip_cpu / max(len(clips), 1):.2f} ms/word)")
+    print(f"Saved temp-file writes:      {bytes_written / 1024 / 1024:.1f} MB "
+          f"in {len(clips)} files ({2 * len(clips)} filesystem create/unlink ops)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Compare compose_video render throughput of the available render engines.
+
+Generates a synthetic gameplay clip (ffmpeg testsrc, 16:9, scaled and looped by
+both engines), a tone for the narration and word-timed captions with one diagram,
+then renders the same 9:16 job with each engine and reports output frames per
+second of wall time and the speedup over MoviePy. A plain ffmpeg transcode of
+the gameplay and audio (loop, scale, encode; nothing overlaid) is timed as the
+floor; with --captions soft the engines should approach it. The one-time
+transcode of the gameplay proxy (center-cropped to the output size) is timed
+separately; the engines all render from it. The ffmpeg engine is
+also run as parallel timeline chunks (--chunks, default one per core); on a
+single core that row only shows the chunking overhead.
+
+Usage:
+    python backend/benchmarks/bench_render_engines.py [--seconds 20] [--width 1080 --height 1920]
+        [--captions burned|soft] [--chunks N]
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+from pipeline.ffmpeg_io import ffmpeg_binary, run_ffmpeg
+from pipeline.gameplay import get_gameplay_proxy
+from pipeline.video_composer import CAPTION_MODES, OUTPUT_FPS, RENDER_ENGINES, compose_video
+from bench_overlay_frames import build_segments
+
+
+def make_inputs(workdir: Path, seconds: float) -> tuple[Path, Path, Path]:
+    """Write gameplay, narration audio and a diagram PNG into workdir."""
+    ffmpeg = ffmpeg_binary()
+    gameplay = workdir / "gameplay.mp4"
+    audio = workdir / "narration.mp3"
+    diagram = workdir / "diagram.png"
+    subprocess.run(
+        [ffmpeg, "-y", "-loglevel", "error", "-f", "lavfi",
+         "-i", "testsrc=size=1280x720:rate=30:duration=8",
+         "-pix_fmt", "yuv420p", str(gameplay)],
+        check=True
+    )
+    subprocess.run(
+        [ffmpeg, "-y", "-loglevel", "error", "-f", "lavfi",
+         "-i", f"sine=frequency=440:duration={seconds}", str(audio)],
+        check=True
+    )
+    Image.new("RGB", (900, 600), (200, 230, 255)).save(diagram)
+    return gameplay, audio, diagram
+
+
+def transcode(gameplay: Path, audio: Path, output: Path, seconds: float, size: tuple[int, int]):
+    """Loop, scale and encode the gameplay with the audio, using the engines' settings."""
+    width, height = size
+    run_ffmpeg([
+        "-stream_loop", "-1", "-t", f"{seconds}", "-i", str(gameplay), "-i", str(audio),
+        "-vf", f"fps={OUTPUT_FPS},scale={width}:{height}:flags=lanczos",
+        "-vcodec", "libx264", "-preset", "ultrafast", "-threads", "2", "-pix_fmt", "yuv420p",
+        "-acodec", "aac", "-ar", "44100", "-ac", "2", str(output),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=20, help="Narration length")
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=1920)
+    parser.add_argument("--captions", choices=CAPTION_MODES, default="burned")
+    parser.add_argument("--chunks", type=int, default=0,
+                        help="Chunks of the segment-parallel ffmpeg row (0: one per core)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        gameplay, audio, diagram = make_inputs(workdir, args.seconds)
+        # ~3.3 words per second, like edge-tts narration
+        timed_segments, word_timings = build_segments(int(args.seconds * 10 / 3))
+        diagram_timings = [{
+            "png_path": str(diagram), "start_s": args.seconds / 4,
+            "duration_s": args.seconds / 4, "label": "diagram",
+        }]
+        frames = int(args.seconds * OUTPUT_FPS)
+
+        results = {}
+        start = time.perf_counter()
+        transcode(gameplay, audio, workdir / "transcode.mp4", args.seconds, (args.width, args.height))
+        results["transcode"] = time.perf_counter() - start
+
+        # One-time ingest of the gameplay proxy every engine then renders from
+        start = time.perf_counter()
+        get_gameplay_proxy(str(gameplay), (args.width, args.height), OUTPUT_FPS)
+        results["proxy"] = time.perf_counter() - start
+
+        runs = [(engine, engine, 1) for engine in RENDER_ENGINES]
+        runs.append(("ffmpeg-chunked", "ffmpeg", args.chunks))
+        for name, engine, chunks in runs:
+            start = time.perf_counter()
+            compose_video(
+                "", str(audio), str(gameplay), str(workdir / f"{name}.mp4"),
+                resolution=(args.width, args.height),
+                timed_segments=timed_segments,
+                word_timings=word_timings,
+                diagram_timings=diagram_timings,
+                engine=engine,
+                caption_mode=args.captions,
+                chunks=chunks,
+            )
+            results[name] = time.perf_counter() - start
+
+    for engine, seconds in results.items():
+        print(f"{engine:14s} {seconds:6.1f}s  {frames / seconds:6.1f} fps  "
+              f"{results['moviepy'] / seconds:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
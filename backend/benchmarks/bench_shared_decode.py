@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Measure the gameplay decode work saved by sharing decoders between concurrent renders.
+
+Generates a synthetic 1080p gameplay clip, then has --jobs threads read the same
+clip and size concurrently, each starting --stagger seconds further into it (like
+jobs picking the same clip at nearby offsets), once with a private
+FFmpegFrameReader each and once through open_gameplay_reader with SHARED_DECODE on. Reports wall time, the CPU time of the ffmpeg decoders and the
+decodes started and avoided per clip.
+
+Usage:
+    python backend/benchmarks/bench_shared_decode.py [--jobs 4] [--seconds 10]
+        [--stagger 0.5] [--width 1080 --height 1920]
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pipeline import shared_decode
+from pipeline.ffmpeg_io import ffmpeg_binary
+from pipeline.shared_decode import open_gameplay_reader, shared_decode_stats
+
+FPS = 24
+
+
+def children_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run(
+    clip: str, jobs: int, seconds: float, stagger: float, size: tuple[int, int], shared: bool
+) -> tuple[float, float]:
+    """Read every frame in concurrent threads; return (wall seconds, decoder CPU seconds)."""
+    shared_decode.SHARED_DECODE = shared
+    frames = round(seconds * FPS)
+    readers = [
+        open_gameplay_reader(clip, size, FPS, seconds, start=job * stagger) for job in range(jobs)
+    ]
+
+    def read(reader):
+        with reader:
+            for _ in range(frames):
+                reader.read_frame()
+
+    cpu = children_cpu()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=read, args=(reader,)) for reader in readers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, children_cpu() - cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--stagger", type=float, default=0.5)
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=1920)
+    args = parser.parse_args()
+    size = (args.width, args.height)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = str(Path(tmp) / "gameplay.mp4")
+        subprocess.run(
+            [ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi",
+             "-i", f"testsrc=size=1920x1080:rate=30:duration={args.seconds}",
+             "-pix_fmt", "yuv420p", clip],
+            check=True
+        )
+        print(f"{args.jobs} concurrent readers {args.stagger:g}s apart, "
+              f"{args.seconds:g}s at {args.width}x{args.height}")
+        for shared in (False, True):
+            wall, cpu = run(clip, args.jobs, args.seconds, args.stagger, size, shared)
+            mode = "shared" if shared else "private"
+            print(f"{mode:8s} wall {wall:6.2f}s  decoder CPU {cpu:6.2f}s")
+        for path, counts in shared_decode_stats().items():
+            print(f"{Path(path).name}: {counts['decodes']} decodes, "
+                  f"{counts['decodes_avoided']} avoided")
+
+
+if __name__ == "__main__":
+    main()
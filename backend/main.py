@@ -23,10 +23,20 @@ from job_manager import job_manager
 from pipeline import (
     generate_tts,
     compose_video,
+    discard_checkpoints,
     extract_text,
+    gameplay_index,
     get_random_gameplay_clip,
+    ingest_gameplay,
     transform_to_brainrot,
-    generate_diagram_overlays
+    generate_diagram_overlays,
+    font_registry,
+    shutdown_caption_pool,
+    sweep_orphaned_rings,
+    RENDER_ENGINES,
+    CAPTION_MODES,
+    OUTPUT_FPS,
+    OUTPUT_RESOLUTION,
 )
 
 
@@ -60,7 +70,14 @@ OUTPUT_DIR.mkdir(exist_ok=True)
 TEMP_DIR.mkdir(exist_ok=True)
 
 
-async def process_video_generation(job_id: str, text: str, transform: bool = True, diagrams: bool = True):
+async def process_video_generation(
+    job_id: str,
+    text: str,
+    transform: bool = True,
+    diagrams: bool = True,
+    engine: Optional[str] = None,
+    captions: Optional[str] = None
+):
     """
     Background task to process video generation pipeline.
 
@@ -97,8 +114,17 @@ async def process_video_generation(job_id: str, text: str, transform: bool = Tru
             )
         await job_manager.update_job_progress(job_id, 40)
 
-        # Select gameplay clip
-        gameplay_clip = get_random_gameplay_clip(str(GAMEPLAY_DIR))
+        # Select a gameplay clip long enough for the narration, preferably already
+        # at the output format (refreshing the index may probe new clips)
+        word_timings = tts_result.get("word_timings")
+        narration_s = word_timings[-1]["end_ms"] / 1000 if word_timings else None
+        gameplay_clip = await asyncio.to_thread(
+            get_random_gameplay_clip,
+            str(GAMEPLAY_DIR),
+            duration=narration_s,
+            resolution=OUTPUT_RESOLUTION,
+            fps=OUTPUT_FPS,
+        )
         if not gameplay_clip:
             raise ValueError(
                 "No gameplay clips found in assets/gameplay/. "
@@ -115,9 +141,14 @@ async def process_video_generation(job_id: str, text: str, transform: bool = Tru
                 tts_result["audio_path"],
                 gameplay_clip,
                 output_path,
+                resolution=OUTPUT_RESOLUTION,
                 timed_segments=tts_result.get("timed_segments"),
                 word_timings=tts_result.get("word_timings"),
                 diagram_timings=diagram_timings,
+                engine=engine,
+                caption_mode=captions,
+                # Start each video at a random point so outputs don't all look alike
+                gameplay_start=None,
             )
         except (BrokenPipeError, OSError) as pipe_err:
             logger.exception("Video encoding pipe error for job %s", job_id)
@@ -138,6 +169,8 @@ async def process_video_generation(job_id: str, text: str, transform: bool = Tru
         logger.exception("Video generation failed for job %s", job_id)
         error_msg = f"Video generation failed: {str(e)}"
         await job_manager.mark_job_error(job_id, error_msg)
+        # Failed jobs are not retried, so their render checkpoints would never be resumed
+        await asyncio.to_thread(discard_checkpoints, str(OUTPUT_DIR / f"{job_id}.mp4"))
 
 
 @app.post("/api/generate", response_model=JobStatusResponse)
@@ -147,6 +180,8 @@ async def generate_video(
     file: Optional[UploadFile] = File(None),
     transform: bool = Form(True),
     diagrams: bool = Form(True),
+    engine: Optional[str] = Form(None),
+    captions: Optional[str] = Form(None),
 ):
     """
     Start a new video generation job.
@@ -161,6 +196,18 @@ async def generate_video(
             detail="Either 'text' or 'file' must be provided"
         )
 
+    if engine is not None and engine not in RENDER_ENGINES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown render engine '{engine}'. Choose one of: {', '.join(RENDER_ENGINES)}"
+        )
+
+    if captions is not None and captions not in CAPTION_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown caption mode '{captions}'. Choose one of: {', '.join(CAPTION_MODES)}"
+        )
+
     # Extract text from file if provided
     if file:
         file_bytes = await file.read()
@@ -180,7 +227,9 @@ async def generate_video(
     job_id = await job_manager.create_job(text.strip())
 
     # Start background processing
-    background_tasks.add_task(process_video_generation, job_id, text.strip(), transform, diagrams)
+    background_tasks.add_task(
+        process_video_generation, job_id, text.strip(), transform, diagrams, engine, captions
+    )
 
     return JobStatusResponse(
         job_id=job_id,
@@ -245,12 +294,60 @@ async def download_video(video_id: str):
     )
 
 
+SUBTITLE_MEDIA_TYPES = {"srt": "application/x-subrip", "vtt": "text/vtt"}
+
+
+@app.get("/api/videos/{video_id}/captions.{fmt}")
+async def download_captions(video_id: str, fmt: str):
+    """
+    Download the subtitle sidecar of a video rendered with soft captions.
+
+    Returns an SRT or WebVTT file.
+    """
+    if fmt not in SUBTITLE_MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail="Unknown subtitle format")
+
+    job = await job_manager.get_job(video_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    if job.status != JobStatus.COMPLETE or not job.video_path:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Video is not ready. Current status: {job.status}"
+        )
+
+    captions_path = Path(job.video_path).with_suffix(f".{fmt}")
+    if not captions_path.exists():
+        raise HTTPException(
+            status_code=404,
+            detail="Video has no subtitle sidecar (it was rendered with burned-in captions)"
+        )
+
+    return FileResponse(
+        str(captions_path),
+        media_type=SUBTITLE_MEDIA_TYPES[fmt],
+        filename=f"brainrot_{video_id}.{fmt}"
+    )
+
+
 @app.get("/api/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
     return HealthResponse(status="ok")
 
 
+# Background gameplay proxy ingest started at startup (referenced so it isn't collected)
+_ingest_task: Optional[asyncio.Task] = None
+
+
+def _log_ingest_failure(task: asyncio.Task):
+    """Log the background gameplay ingest's exception, which nothing else awaits."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Gameplay proxy ingest failed", exc_info=task.exception())
+
+
 @app.on_event("startup")
 async def startup_event():
     """Run startup tasks."""
@@ -258,10 +355,21 @@ async def startup_event():
     print(f"📁 Output directory: {OUTPUT_DIR}")
     print(f"📁 Gameplay directory: {GAMEPLAY_DIR}")
 
+    # Resolve the caption font once so jobs never walk the fallback chain
+    print(f"🔤 Caption font: {font_registry.describe()}")
+
+    # Free the shared gameplay decode rings of renders that crashed before a restart
+    await asyncio.to_thread(sweep_orphaned_rings)
+
     # Check for gameplay clips
     if GAMEPLAY_DIR.exists():
-        clips = list(GAMEPLAY_DIR.glob("*.mp4")) + list(GAMEPLAY_DIR.glob("*.MP4"))
+        # Probe the clips once; jobs pick from this index instead of globbing
+        clips = await asyncio.to_thread(gameplay_index(str(GAMEPLAY_DIR)).clips)
         print(f"🎮 Found {len(clips)} gameplay clips")
+        # Transcode the gameplay proxies in the background, so jobs find them ready
+        global _ingest_task
+        _ingest_task = asyncio.create_task(asyncio.to_thread(ingest_gameplay, str(GAMEPLAY_DIR)))
+        _ingest_task.add_done_callback(_log_ingest_failure)
     else:
         print("⚠️  Warning: No gameplay directory found. Create assets/gameplay/ and add MP4 files.")
 
@@ -270,6 +378,7 @@ async def startup_event():
 async def shutdown_event():
     """Run shutdown tasks."""
     print("👋 Brainrot Video Generator API shutting down...")
+    shutdown_caption_pool()
 
 
 # Serve frontend static files (must be after API routes)
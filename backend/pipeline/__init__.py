@@ -6,7 +6,19 @@ if not hasattr(PIL.Image, "ANTIALIAS"):
     PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
 
 from .tts_generator import generate_tts
-from .video_composer import compose_video, get_random_gameplay_clip
+from .video_composer import (
+    CAPTION_MODES,
+    OUTPUT_FPS,
+    OUTPUT_RESOLUTION,
+    RENDER_ENGINES,
+    compose_video,
+    discard_checkpoints,
+    get_random_gameplay_clip,
+)
+from .fonts import font_registry, get_font
+from .gameplay import gameplay_index, ingest_gameplay
+from .caption_renderer import shutdown_caption_pool
+from .shared_decode import sweep_orphaned_rings
 from .input_processor import extract_text
 from .script_transformer import transform_to_brainrot
 from .diagram_generator import (
@@ -20,7 +32,14 @@ from .diagram_generator import (
 __all__ = [
     "generate_tts",
     "compose_video",
+    "discard_checkpoints",
+    "RENDER_ENGINES",
+    "OUTPUT_FPS",
+    "OUTPUT_RESOLUTION",
+    "CAPTION_MODES",
     "get_random_gameplay_clip",
+    "ingest_gameplay",
+    "gameplay_index",
     "extract_text",
     "transform_to_brainrot",
     "extract_mermaid_blocks",
@@ -28,4 +47,8 @@ __all__ = [
     "render_mermaid_to_png",
     "find_diagram_timestamps",
     "generate_diagram_overlays",
+    "font_registry",
+    "get_font",
+    "shutdown_caption_pool",
+    "sweep_orphaned_rings",
 ]
@@ -0,0 +1,155 @@
+"""ASS subtitle scripts that reproduce the burned-in caption look with libass."""
+import struct
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from PIL import ImageColor, ImageFont
+
+
+class CaptionWord(NamedTuple):
+    """One positioned caption word and the span during which it is highlighted."""
+    text: str
+    x: int
+    y: int
+    start: float
+    end: float
+    highlight: Optional[tuple[float, float]] = None
+
+
+def _sfnt_tables(path: str) -> dict[str, bytes]:
+    """Read the table directory of a TrueType/OpenType font file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    num_tables = struct.unpack(">H", data[4:6])[0]
+    tables = {}
+    for i in range(num_tables):
+        tag, _, offset, length = struct.unpack(">4sIII", data[12 + 16 * i:28 + 16 * i])
+        tables[tag.decode("latin-1")] = data[offset:offset + length]
+    return tables
+
+
+@lru_cache(maxsize=None)
+def _win_metrics(path: str) -> tuple[int, int, int]:
+    """Return (unitsPerEm, usWinAscent, usWinDescent) of a font file."""
+    tables = _sfnt_tables(path)
+    units_per_em = struct.unpack(">H", tables["head"][18:20])[0]
+    win_ascent, win_descent = struct.unpack(">HH", tables["OS/2"][74:78])
+    return units_per_em, win_ascent, win_descent
+
+
+def ass_font_metrics(font: ImageFont.FreeTypeFont) -> tuple[float, float]:
+    """
+    Translate a Pillow font size into libass terms.
+
+    ASS font sizes are cell heights (usWinAscent + usWinDescent), not em sizes,
+    and libass puts the baseline usWinAscent below the top of the line, where
+    Pillow's "la" anchor uses the font's ascender.
+
+    Args:
+        font: Pillow font loaded from a file
+
+    Returns:
+        (ASS Fontsize giving the same glyph size, vertical offset in pixels to add
+        to a Pillow draw position to get the ASS \\pos)
+    """
+    units_per_em, win_ascent, win_descent = _win_metrics(font.path)
+    em = font.size
+    ascent, _ = font.getmetrics()
+    return em * (win_ascent + win_descent) / units_per_em, ascent - em * win_ascent / units_per_em
+
+
+def ass_color(color: str) -> str:
+    """Convert a Pillow color ('white', '#FFFF00') to an ASS &HAABBGGRR& value."""
+    red, green, blue = ImageColor.getrgb(color)[:3]
+    return f"&H00{blue:02X}{green:02X}{red:02X}&"
+
+
+def ass_time(seconds: float) -> str:
+    """Format seconds as an ASS timestamp (h:mm:ss.cc)."""
+    centiseconds = max(0, round(seconds * 100))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+
+def _escape_text(text: str) -> str:
+    # Braces open override blocks and a backslash starts an escape in ASS
+    return text.replace("\\", "\\⁠").replace("{", "｛").replace("}", "｝")
+
+
+def build_caption_script(
+    words: list[CaptionWord],
+    resolution: tuple,
+    font: ImageFont.FreeTypeFont,
+    fill: str,
+    highlight: str,
+    stroke: str,
+    stroke_width: int
+) -> str:
+    """
+    Build an ASS script drawing each word where Pillow would, outlined, with its highlight.
+
+    Every word is its own event anchored top-left at its Pillow draw position, so
+    the layout does not depend on libass line breaking. The highlight is two
+    instant color transforms (\\t) at the word's span; \\k karaoke can't be used
+    since it leaves every word already sung in the highlight color.
+
+    Args:
+        words: Positioned, timed caption words
+        resolution: Video resolution (width, height); used as the script resolution
+        font: Pillow font the positions were measured with
+        fill: Text color
+        highlight: Color of the highlighted word
+        stroke: Outline color
+        stroke_width: Outline width in pixels
+
+    Returns:
+        ASS script text
+    """
+    width, height = resolution
+    family, style = font.getname()
+    bold = -1 if "bold" in (style or "").lower() else 0
+    fontsize, y_offset = ass_font_metrics(font)
+    fill_color = ass_color(fill)
+    highlight_color = ass_color(highlight)
+
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "WrapStyle: 2",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, "
+        "BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, "
+        "BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: Caption,{family},{fontsize:.3f},{fill_color},{fill_color},{ass_color(stroke)},"
+        f"&H00000000&,{bold},0,0,0,100,100,0,0,1,{stroke_width},0,7,0,0,0,1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+
+    for word in words:
+        start_cs = max(0, round(word.start * 100))
+        tags = f"\\pos({word.x},{word.y + y_offset:.2f})"
+        if word.highlight:
+            # Transform times are in ms from the (centisecond-rounded) event start
+            on_ms = max(0, round(word.highlight[0] * 1000) - start_cs * 10)
+            off_ms = max(on_ms, round(word.highlight[1] * 1000) - start_cs * 10)
+            # \t(0,0,...) would mean "over the whole event", so start lit instead
+            if on_ms == 0:
+                tags += f"\\1c{highlight_color}"
+            else:
+                tags += f"\\t({on_ms},{on_ms},\\1c{highlight_color})"
+            if off_ms > 0:
+                tags += f"\\t({off_ms},{off_ms},\\1c{fill_color})"
+        lines.append(
+            f"Dialogue: 0,{ass_time(word.start)},{ass_time(word.end)},Caption,,0,0,0,,"
+            f"{{{tags}}}{_escape_text(word.text)}"
+        )
+
+    return "\n".join(lines) + "\n"
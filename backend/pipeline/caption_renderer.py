@@ -0,0 +1,530 @@
+"""Rasterization of outlined caption words, shared across jobs."""
+import logging
+import multiprocessing
+import os
+import string
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Hashable, Iterable, NamedTuple, Optional
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for the process-wide word tile cache (decoded RGBA bytes)
+CAPTION_TILE_CACHE_MB = int(os.getenv("CAPTION_TILE_CACHE_MB", "64"))
+
+# Worker processes for caption pre-rendering (0 or 1 renders in the calling thread)
+CAPTION_RENDER_WORKERS = int(os.getenv("CAPTION_RENDER_WORKERS", "0"))
+
+
+class WordTileCache:
+    """
+    Thread-safe LRU cache of rasterized word tiles, bounded by total pixel bytes.
+
+    Jobs run on worker threads (asyncio.to_thread), so a single instance is shared
+    by every job in the process. Tiles are returned read-only because the same array
+    is handed to every caller.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._tiles: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key: Hashable, render: Callable[[], tuple]) -> tuple:
+        """
+        Return the cached (tile, offset) for key, rendering and storing it on a miss.
+
+        Args:
+            key: Cache key
+            render: Zero-argument callable returning (RGBA array, (left, top))
+
+        Returns:
+            (read-only RGBA array, (left, top)) tuple
+        """
+        with self._lock:
+            entry = self._tiles.get(key)
+            if entry is not None:
+                self._tiles.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Render outside the lock so concurrent jobs don't serialize on Pillow
+        tile, offset = render()
+        tile.flags.writeable = False
+        entry = (tile, offset)
+
+        with self._lock:
+            if key not in self._tiles:
+                self._tiles[key] = entry
+                self._bytes += tile.nbytes
+                while self._bytes > self.max_bytes and len(self._tiles) > 1:
+                    _, (evicted, _) = self._tiles.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+        return entry
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._tiles),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        """Drop all tiles and reset the counters."""
+        with self._lock:
+            self._tiles.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+# Process-wide cache shared by all jobs
+word_tile_cache = WordTileCache(CAPTION_TILE_CACHE_MB * 1024 * 1024)
+
+
+def _font_key(font: ImageFont.FreeTypeFont) -> tuple:
+    """Identify a font face and size for cache keys."""
+    path = getattr(font, 'path', None)
+    if not isinstance(path, str):
+        # In-memory faces (e.g. Pillow's default font) have no path; use the face name
+        path = font.getname() if hasattr(font, 'getname') else repr(font)
+    return (path, getattr(font, 'size', None))
+
+
+class LineExtent(NamedTuple):
+    """Horizontal extent of a single line of text, as font.getbbox would report it."""
+    left: int
+    right: int
+    pen: int  # 26.6 pen position after the last word
+    last_char: str
+
+    @property
+    def width(self) -> int:
+        return self.right - self.left
+
+
+class TextMeasurer:
+    """
+    Memoized text measurements for one font.
+
+    Word bounding boxes, advances and kerning pairs are measured once and reused, so
+    wrapping a segment and centering its lines costs one lookup per word instead of
+    re-measuring ever-longer joined strings. Line widths built from these pieces match
+    ``font.getbbox(' '.join(words))``.
+    """
+
+    # Vocabulary is bounded in practice; reset rather than grow without limit
+    MAX_ENTRIES = 50_000
+
+    def __init__(self, font: ImageFont.FreeTypeFont):
+        self.font = font
+        self._bboxes: dict[str, tuple] = {}
+        self._advances: dict[str, int] = {}
+        self._kerning: dict[tuple[str, str], int] = {}
+        self.space_width = self.width(' ')
+        self._space_advance = self.advance(' ')
+
+    def _check_size(self):
+        if len(self._bboxes) + len(self._advances) + len(self._kerning) > self.MAX_ENTRIES:
+            self._bboxes.clear()
+            self._advances.clear()
+            self._kerning.clear()
+
+    def bbox(self, word: str) -> tuple:
+        """Return font.getbbox(word), memoized."""
+        box = self._bboxes.get(word)
+        if box is None:
+            self._check_size()
+            box = self.font.getbbox(word)
+            self._bboxes[word] = box
+        return box
+
+    def width(self, word: str) -> int:
+        """Return the bounding box width of word in pixels."""
+        box = self.bbox(word)
+        return box[2] - box[0]
+
+    def advance(self, text: str) -> int:
+        """Return the advance of text in 26.6 fixed point, memoized."""
+        advance = self._advances.get(text)
+        if advance is None:
+            self._check_size()
+            advance = round(self.font.getlength(text) * 64)
+            self._advances[text] = advance
+        return advance
+
+    def kerning(self, left: str, right: str) -> int:
+        """Return the kerning between two characters in 26.6 fixed point, memoized."""
+        pair = (left, right)
+        kerning = self._kerning.get(pair)
+        if kerning is None:
+            kerning = self.advance(left + right) - self.advance(left) - self.advance(right)
+            self._kerning[pair] = kerning
+        return kerning
+
+    def start_line(self, word: str) -> LineExtent:
+        """Measure a line holding just word."""
+        left, _, right, _ = self.bbox(word)
+        return LineExtent(left, right, self.advance(word), word[-1])
+
+    def extend_line(self, line: LineExtent, word: str) -> LineExtent:
+        """Measure line followed by a space and word, without re-measuring the line."""
+        pen = (
+            line.pen
+            + self.kerning(line.last_char, ' ') + self._space_advance + self.kerning(' ', word[0])
+        )
+        right = max(line.right, ((pen + 32) >> 6) + self.bbox(word)[2])
+        return LineExtent(line.left, right, pen + self.advance(word), word[-1])
+
+
+_measurers: dict = {}
+_measurers_lock = threading.Lock()
+
+
+def get_text_measurer(font: ImageFont.FreeTypeFont) -> TextMeasurer:
+    """
+    Get the process-wide TextMeasurer for a font face and size.
+
+    Args:
+        font: PIL font object
+
+    Returns:
+        TextMeasurer, created on first use
+    """
+    key = _font_key(font)
+    measurer = _measurers.get(key)
+    if measurer is None:
+        with _measurers_lock:
+            measurer = _measurers.get(key)
+            if measurer is None:
+                measurer = TextMeasurer(font)
+                _measurers[key] = measurer
+    return measurer
+
+
+def _blend_coverage(target: np.ndarray, source: np.ndarray):
+    """
+    Merge glyph coverage into target in place the way FreeType text rendering in
+    Pillow does for overlapping glyphs: a + b - a*b/255, with Pillow's DIV255 rounding.
+    """
+    product = target.astype(np.uint32) * source + 128
+    target += source - (((product >> 8) + product) >> 8).astype(np.uint8)
+
+
+class _Glyph(NamedTuple):
+    stroke: np.ndarray
+    stroke_offset: tuple[int, int]
+    fill: np.ndarray
+    fill_offset: tuple[int, int]
+    advance: int  # 26.6 fixed point, like FreeType
+
+
+class GlyphAtlas:
+    """
+    Pre-rasterized outline and fill masks for every glyph of one font face, size and
+    stroke width.
+
+    FreeType stroking is the expensive part of drawing outlined captions, and Pillow
+    redoes it for every glyph of every word. The atlas strokes each glyph once, then
+    composes a word by blending the glyph masks at their pen positions (advance plus
+    kerning) and colorizing the result with Pillow's bitmap fill. The output is
+    pixel-identical to ImageDraw.text for fonts using Pillow's basic layout engine;
+    complex-script shaping (raqm) can reorder or ligate glyphs, so those fonts are
+    not supported.
+    """
+
+    # Glyphs rasterized up front; anything else is added on first use
+    PRELOAD = string.ascii_letters + string.digits + string.punctuation
+
+    def __init__(self, font: ImageFont.FreeTypeFont, stroke_width: int):
+        self.font = font
+        self.stroke_width = stroke_width
+        self._glyphs: dict[str, _Glyph] = {}
+        self._kerning: dict[tuple[str, str], int] = {}
+        for char in self.PRELOAD:
+            self._glyph(char)
+
+    @staticmethod
+    def supports(font) -> bool:
+        """Return True if words in this font can be composed from single glyphs."""
+        return (
+            isinstance(font, ImageFont.FreeTypeFont)
+            and font.layout_engine == ImageFont.Layout.BASIC
+        )
+
+    def _mask(self, char: str, stroke_width: int) -> tuple:
+        left, top, right, bottom = self.font.getbbox(char, stroke_width=stroke_width)
+        img = Image.new('L', (max(right - left, 0), max(bottom - top, 0)), 0)
+        if img.width and img.height:
+            ImageDraw.Draw(img).text(
+                (-left, -top), char, fill=255, font=self.font,
+                stroke_width=stroke_width, stroke_fill=255
+            )
+        return np.array(img), (left, top)
+
+    def _glyph(self, char: str) -> _Glyph:
+        glyph = self._glyphs.get(char)
+        if glyph is None:
+            fill, fill_offset = self._mask(char, 0)
+            if self.stroke_width:
+                stroke, stroke_offset = self._mask(char, self.stroke_width)
+            else:
+                stroke, stroke_offset = fill, fill_offset
+            advance = round(self.font.getlength(char) * 64)
+            glyph = _Glyph(stroke, stroke_offset, fill, fill_offset, advance)
+            self._glyphs[char] = glyph
+        return glyph
+
+    def _kern(self, left: str, right: str) -> int:
+        pair = (left, right)
+        kerning = self._kerning.get(pair)
+        if kerning is None:
+            kerning = (
+                round(self.font.getlength(left + right) * 64)
+                - self._glyph(left).advance - self._glyph(right).advance
+            )
+            self._kerning[pair] = kerning
+        return kerning
+
+    def masks(self, word: str) -> tuple:
+        """
+        Compose the outline and fill coverage masks of a word.
+
+        Args:
+            word: Text to compose
+
+        Returns:
+            (stroke mask, fill mask, (left, top)) where both masks are uint8 arrays of
+            the same shape and (left, top) is their offset from the draw position;
+            masks are empty if the word has no ink
+        """
+        placed = []
+        pen = 0
+        previous = None
+        for char in word:
+            if previous is not None:
+                pen += self._kern(previous, char)
+            glyph = self._glyph(char)
+            placed.append(((pen + 32) >> 6, glyph))
+            pen += glyph.advance
+            previous = char
+
+        inked = [(x, g) for x, g in placed if g.stroke.size]
+        if not inked:
+            empty = np.zeros((0, 0), dtype=np.uint8)
+            return empty, empty, (0, 0)
+
+        left = min(x + g.stroke_offset[0] for x, g in inked)
+        top = min(g.stroke_offset[1] for _, g in inked)
+        right = max(x + g.stroke_offset[0] + g.stroke.shape[1] for x, g in inked)
+        bottom = max(g.stroke_offset[1] + g.stroke.shape[0] for _, g in inked)
+
+        stroke = np.zeros((bottom - top, right - left), dtype=np.uint8)
+        fill = np.zeros_like(stroke)
+        for x, glyph in inked:
+            for mask, (dx, dy), target in (
+                (glyph.stroke, glyph.stroke_offset, stroke),
+                (glyph.fill, glyph.fill_offset, fill),
+            ):
+                if mask.size:
+                    gx, gy = x + dx - left, dy - top
+                    _blend_coverage(target[gy:gy + mask.shape[0], gx:gx + mask.shape[1]], mask)
+
+        return stroke, fill, (left, top)
+
+    def render(self, word: str, fill: str, stroke_fill: str) -> tuple:
+        """
+        Render an outlined word, equivalent to ImageDraw.text with this atlas' stroke.
+
+        Args:
+            word: Word to render
+            fill: Text color
+            stroke_fill: Outline color
+
+        Returns:
+            (RGBA array, (left, top) offset from the draw position)
+        """
+        stroke, fill_mask, offset = self.masks(word)
+        img = Image.new('RGBA', (stroke.shape[1], stroke.shape[0]), (0, 0, 0, 0))
+        if stroke.size:
+            draw = ImageDraw.Draw(img)
+            if self.stroke_width:
+                draw.bitmap((0, 0), Image.fromarray(stroke), fill=stroke_fill)
+            draw.bitmap((0, 0), Image.fromarray(fill_mask), fill=fill)
+        return np.array(img), offset
+
+
+_atlases: dict = {}
+_atlases_lock = threading.Lock()
+
+
+def get_glyph_atlas(font: ImageFont.FreeTypeFont, stroke_width: int) -> GlyphAtlas:
+    """
+    Get the process-wide glyph atlas for a font face, size and stroke width.
+
+    Args:
+        font: PIL font object (must satisfy GlyphAtlas.supports)
+        stroke_width: Outline width in pixels
+
+    Returns:
+        GlyphAtlas, built on first use
+    """
+    key = (_font_key(font), stroke_width)
+    atlas = _atlases.get(key)
+    if atlas is None:
+        with _atlases_lock:
+            atlas = _atlases.get(key)
+            if atlas is None:
+                atlas = GlyphAtlas(font, stroke_width)
+                _atlases[key] = atlas
+    return atlas
+
+
+def _rasterize_word(
+    word: str,
+    font: ImageFont.FreeTypeFont,
+    fill: str,
+    stroke_width: int,
+    stroke_fill: str
+) -> tuple:
+    """Rasterize one outlined word, through the glyph atlas when the font allows it."""
+    if GlyphAtlas.supports(font):
+        return get_glyph_atlas(font, stroke_width).render(word, fill, stroke_fill)
+    return _rasterize_word_pillow(word, font, fill, stroke_width, stroke_fill)
+
+
+def _rasterize_word_pillow(
+    word: str,
+    font: ImageFont.FreeTypeFont,
+    fill: str,
+    stroke_width: int,
+    stroke_fill: str
+) -> tuple:
+    """Draw one outlined word onto a tile the size of its stroked bounding box."""
+    left, top, right, bottom = font.getbbox(word, stroke_width=stroke_width)
+    img = Image.new('RGBA', (max(right - left, 0), max(bottom - top, 0)), (0, 0, 0, 0))
+    if img.width and img.height:
+        ImageDraw.Draw(img).text(
+            (-left, -top),
+            word,
+            fill=fill,
+            font=font,
+            stroke_width=stroke_width,
+            stroke_fill=stroke_fill
+        )
+    return np.array(img), (left, top)
+
+
+def render_word_tile(
+    word: str,
+    font: ImageFont.FreeTypeFont,
+    fill: str,
+    stroke_width: int,
+    stroke_fill: str
+) -> tuple:
+    """
+    Get the RGBA tile for an outlined word, from the process-wide cache when possible.
+
+    Pasting the tile at (x + left, y + top) gives the same pixels as
+    ``ImageDraw.text((x, y), word, ...)`` for integer x, y.
+
+    Args:
+        word: Word to render
+        font: PIL font object
+        fill: Text color
+        stroke_width: Outline width in pixels
+        stroke_fill: Outline color
+
+    Returns:
+        (read-only RGBA array, (left, top) offset from the draw position)
+    """
+    key = (word, _font_key(font), fill, stroke_width, stroke_fill)
+    return word_tile_cache.get_or_render(
+        key,
+        lambda: _rasterize_word(word, font, fill, stroke_width, stroke_fill)
+    )
+
+
+def get_word_tile_cache_stats() -> dict:
+    """Return hit/miss statistics of the process-wide word tile cache."""
+    return word_tile_cache.stats()
+
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_workers = 0
+_render_pool_lock = threading.Lock()
+
+
+def _get_render_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the shared caption render pool, (re)creating it for a new worker count."""
+    global _render_pool, _render_pool_workers
+    with _render_pool_lock:
+        if _render_pool is None or _render_pool_workers != workers:
+            if _render_pool is not None:
+                _render_pool.shutdown(wait=False)
+            # Spawned workers start clean: forking the API process would copy its
+            # threads' held locks (tile cache, logging) into the children
+            _render_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _render_pool_workers = workers
+            logger.info("Started caption render pool with %d workers", workers)
+        return _render_pool
+
+
+def map_caption_jobs(
+    render: Callable,
+    jobs: Iterable,
+    workers: Optional[int] = None
+) -> list:
+    """
+    Run a caption render function over independent jobs, in parallel when configured.
+
+    Workers live for the whole process, so each keeps its own warm font, glyph atlas
+    and word tile caches between jobs. Results come back pickled, so render functions
+    should return cropped arrays rather than full frames. Workers are spawned, so
+    scripts that enable them need an ``if __name__ == "__main__"`` guard.
+
+    Args:
+        render: Module-level function (workers import it by name)
+        jobs: Picklable job arguments, one call each
+        workers: Worker processes (default: CAPTION_RENDER_WORKERS); 0 or 1 renders
+                 serially in the calling thread
+
+    Returns:
+        Results in job order
+    """
+    jobs = list(jobs)
+    workers = CAPTION_RENDER_WORKERS if workers is None else workers
+    if workers <= 1 or len(jobs) < 2:
+        return [render(job) for job in jobs]
+
+    pool = _get_render_pool(workers)
+    # A few chunks per worker keeps pickling overhead low and the load balanced
+    chunksize = max(1, len(jobs) // (workers * 4))
+    return list(pool.map(render, jobs, chunksize=chunksize))
+
+
+def shutdown_caption_pool():
+    """Stop the caption render pool's worker processes, if any were started."""
+    global _render_pool, _render_pool_workers
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown()
+            _render_pool = None
+            _render_pool_workers = 0
@@ -0,0 +1,106 @@
+"""Checkpointed chunk files that let a failed chunked render resume where it stopped."""
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+
+class ChunkRenderError(IOError):
+    """
+    A chunk of a chunked render failed.
+
+    Chunks finished before the failure stay in the render's checkpoint directory,
+    so rendering the same job to the same output path again resumes after them.
+    """
+
+    def __init__(
+        self,
+        chunk_index: int,
+        chunk_count: int,
+        frame_range: tuple[int, int],
+        cause: BaseException
+    ):
+        self.chunk_index = chunk_index
+        self.chunk_count = chunk_count
+        self.frame_range = frame_range
+        first_frame, end_frame = frame_range
+        super().__init__(
+            f"Render chunk {chunk_index} of {chunk_count} "
+            f"(frames {first_frame}-{end_frame - 1}) failed: {cause}"
+        )
+
+
+def split_frames(frame_count: int, chunks: int) -> list[tuple[int, int]]:
+    """
+    Split frame numbers into contiguous, near-equal [first, end) ranges.
+
+    Args:
+        frame_count: Number of frames
+        chunks: Number of ranges
+
+    Returns:
+        Ranges in order, covering 0 to frame_count
+    """
+    bounds = [round(i * frame_count / chunks) for i in range(chunks + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def checkpoint_directory(output_path: str) -> Path:
+    """Return the checkpoint directory of a chunked render to output_path."""
+    output = Path(output_path)
+    return output.parent / f".{output.name}.chunks"
+
+
+class ChunkCheckpoint:
+    """
+    Directory holding the finished chunk files of one chunked render.
+
+    It sits next to the output as ``.<output name>.chunks`` and is keyed by a
+    fingerprint of the render plan: a later render of the same plan to the same
+    output reuses the finished chunks, while a different plan starts over. A chunk
+    is written to a partial file and renamed once complete, so a file under the
+    final name is always a whole chunk.
+    """
+
+    def __init__(self, output_path: str, plan: dict):
+        """
+        Open (or reset) the checkpoint directory for a render.
+
+        Args:
+            output_path: Final output file of the render
+            plan: JSON-serializable description of everything that determines
+                  the chunks' content (inputs, timing, resolution, chunk ranges)
+        """
+        self.directory = checkpoint_directory(output_path)
+        self.fingerprint = hashlib.sha256(
+            json.dumps(plan, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+        plan_file = self.directory / "plan.sha256"
+        if self.directory.exists() and (
+            not plan_file.exists() or plan_file.read_text() != self.fingerprint
+        ):
+            shutil.rmtree(self.directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        plan_file.write_text(self.fingerprint)
+
+    def chunk_path(self, index: int) -> str:
+        """Return the path of a finished chunk."""
+        return str(self.directory / f"chunk_{index:04d}.mp4")
+
+    def partial_path(self, index: int) -> str:
+        """Return the path a chunk is written to before it is complete."""
+        return str(self.directory / f"chunk_{index:04d}.part.mp4")
+
+    def is_done(self, index: int) -> bool:
+        """Return whether a chunk was finished, by this or an earlier attempt."""
+        return os.path.exists(self.chunk_path(index))
+
+    def commit(self, index: int):
+        """Mark a chunk finished by moving its partial file into place."""
+        os.replace(self.partial_path(index), self.chunk_path(index))
+
+    def remove(self):
+        """Delete the checkpoint directory once the chunks have been joined."""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -7,7 +7,9 @@ from pathlib import Path
 from typing import Optional
 
 import httpx
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+
+from .fonts import get_font
 
 
 # Ollama configuration
@@ -244,13 +246,9 @@ def _render_simple_diagram_pillow(mermaid_code: str, output_path: str) -> bool:
         img = Image.new('RGBA', (img_width, img_height), (255, 255, 255, 255))
         draw = ImageDraw.Draw(img)
 
-        # Load font
-        try:
-            font = ImageFont.truetype('/opt/andi/projects/brainrot-generator/assets/fonts/Montserrat-Bold.ttf', 24)
-            title_font = ImageFont.truetype('/opt/andi/projects/brainrot-generator/assets/fonts/Montserrat-Bold.ttf', 32)
-        except OSError:
-            font = ImageFont.load_default()
-            title_font = font
+        # Load fonts from the shared registry
+        font = get_font(24)
+        title_font = get_font(32)
 
         # Layout nodes in a simple top-to-bottom flow
         node_positions = {}
@@ -488,8 +486,6 @@ async def generate_diagram_overlays(
             return []
 
         # Step 5: Map diagrams to timings with unique diagrams per window
-        # Cap at 4 diagram overlays to prevent OOM during video compositing
-        diagram_timings = diagram_timings[:4]
         for i, timing in enumerate(diagram_timings):
             png_path = None
 
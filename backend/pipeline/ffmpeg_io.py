@@ -0,0 +1,403 @@
+"""Raw RGB frame pipes to and from ffmpeg subprocesses."""
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def ffmpeg_binary() -> str:
+    """Return the ffmpeg executable MoviePy is configured with."""
+    try:
+        # moviepy 2.x
+        from moviepy.config import FFMPEG_BINARY
+    except ImportError:
+        # moviepy 1.x
+        from moviepy.config import get_setting
+        FFMPEG_BINARY = get_setting("FFMPEG_BINARY")
+    return FFMPEG_BINARY
+
+
+def ffprobe_binary() -> Optional[str]:
+    """Return the ffprobe next to the configured ffmpeg, or on PATH (None if neither exists)."""
+    ffmpeg = ffmpeg_binary()
+    sibling = os.path.join(os.path.dirname(ffmpeg), "ffprobe" + os.path.splitext(ffmpeg)[1])
+    if os.path.dirname(ffmpeg) and os.path.isfile(sibling):
+        return sibling
+    return shutil.which("ffprobe")
+
+
+def probe_duration(path: str) -> float:
+    """Return a media file's duration in seconds, as ffmpeg reports it."""
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+    return ffmpeg_parse_infos(path)["duration"]
+
+
+def looped_input(
+    path: str,
+    start: float = 0.0,
+    duration: Optional[float] = None
+) -> tuple[list[str], str, int]:
+    """
+    Return ffmpeg inputs that read a video looped indefinitely from a start offset.
+
+    The offset is an input-side seek (-ss before -i), so ffmpeg jumps to the
+    keyframe before it instead of decoding from the beginning. ffmpeg restarts
+    every -stream_loop pass at the seek point, so an offset read seeks once into
+    the clip (modulo its duration) and concatenates an unseeked looped copy after
+    it; the frames then match a read from 0 skipped ahead to the offset.
+
+    Args:
+        path: Input video file
+        start: Seconds into the looped video to start at
+        duration: Optional input-side limit in seconds on each input
+
+    Returns:
+        (input arguments, filtergraph prefix to append a filter chain to,
+         number of inputs used)
+    """
+    limit = ["-t", f"{duration:.6f}"] if duration is not None else []
+    if start <= 0:
+        return ["-stream_loop", "-1"] + limit + ["-i", path], "[0:v]", 1
+    offset = start % probe_duration(path)
+    args = (
+        ["-ss", f"{offset:.6f}"] + limit + ["-i", path]
+        + ["-stream_loop", "-1"] + limit + ["-i", path]
+    )
+    return args, "[0:v][1:v]concat=n=2:v=1:a=0,", 2
+
+
+def _read_log(log_file) -> str:
+    log_file.seek(0)
+    return log_file.read().decode(errors="replace").strip()
+
+
+class FFmpegFrameReader:
+    """
+    Decode a video into RGB frames of a fixed size and frame rate.
+
+    ffmpeg does the looping, frame-rate conversion and scaling, so Python only
+    receives the frames it will actually output. Frames are read into one reused
+    buffer; each returned array is writable and valid until the next read.
+
+    A start offset is an input-side seek; a looped read from an offset is set up
+    by looped_input.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: tuple[int, int],
+        fps: float,
+        duration: Optional[float] = None,
+        loop: bool = False,
+        start: float = 0.0
+    ):
+        """
+        Start the decoder.
+
+        Args:
+            path: Input video file
+            size: Output (width, height); the video is scaled to it
+            fps: Output frame rate
+            duration: Stop after this many seconds (default: end of input)
+            loop: Loop the input indefinitely (needs a duration)
+            start: Output time to start reading at, in seconds
+        """
+        self.size = size
+        width, height = size
+        self._frame_bytes = width * height * 3
+        self._buffer = bytearray(self._frame_bytes)
+        self._frame = np.frombuffer(self._buffer, dtype=np.uint8).reshape(height, width, 3)
+        self._last_frame: Optional[np.ndarray] = None
+
+        filters = f"fps={fps},scale={width}:{height}:flags=lanczos"
+        cmd = [ffmpeg_binary(), "-nostdin", "-loglevel", "error"]
+        if start > 0 and loop:
+            inputs, source, _ = looped_input(path, start)
+            cmd += inputs + ["-filter_complex", f"{source}{filters}[v]", "-map", "[v]"]
+        else:
+            if start > 0:
+                cmd += ["-ss", f"{start:.6f}"]
+            if loop:
+                cmd += ["-stream_loop", "-1"]
+            cmd += ["-i", path, "-vf", filters]
+        if duration is not None:
+            cmd += ["-t", f"{duration:.6f}"]
+        cmd += ["-an", "-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+        self._log = tempfile.TemporaryFile()
+        self._proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=self._log, bufsize=self._frame_bytes
+        )
+
+    def read_frame(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Read the next frame.
+
+        Past the end of the input the last decoded frame is repeated, which covers
+        the rounding of the final frame time the same way MoviePy does.
+
+        Args:
+            out: Optional (height, width, 3) uint8 array to copy the frame into,
+                 for callers that keep frames past the next read
+
+        Returns:
+            Writable (height, width, 3) uint8 array (out, if given)
+
+        Raises:
+            IOError: If the decoder produced no frame at all
+        """
+        view = memoryview(self._buffer)
+        filled = 0
+        while filled < self._frame_bytes:
+            count = self._proc.stdout.readinto(view[filled:])
+            if not count:
+                break
+            filled += count
+
+        if filled == self._frame_bytes:
+            self._last_frame = self._frame
+        elif self._last_frame is None:
+            self._proc.wait()
+            raise IOError(f"ffmpeg could not decode any frame: {_read_log(self._log)}")
+        if out is None:
+            return self._last_frame
+        np.copyto(out, self._last_frame)
+        return out
+
+    def close(self):
+        """Stop the decoder and release its pipes."""
+        if self._proc.poll() is None:
+            self._proc.kill()
+        self._proc.stdout.close()
+        self._proc.wait()
+        self._log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FFmpegFrameWriter:
+    """
+    Encode RGB frames written to a single ffmpeg stdin pipe, muxing an audio file in.
+
+    Matches the encoding settings of compose_video's MoviePy path (H.264 yuv420p,
+    AAC audio). If ffmpeg dies mid-stream, the broken pipe is turned into an IOError
+    carrying ffmpeg's own error output.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        size: tuple[int, int],
+        fps: float,
+        audio_path: Optional[str] = None,
+        audio_duration: Optional[float] = None,
+        preset: str = "ultrafast",
+        threads: int = 2
+    ):
+        """
+        Start the encoder.
+
+        Args:
+            output_path: Output video file (overwritten)
+            size: Frame (width, height)
+            fps: Frame rate
+            audio_path: Optional audio file muxed into the output
+            audio_duration: Cut the audio after this many seconds
+            preset: x264 preset
+            threads: Encoder threads
+        """
+        width, height = size
+        self.output_path = output_path
+        self._frame_bytes = width * height * 3
+        self.frames_written = 0
+
+        cmd = [
+            ffmpeg_binary(), "-y", "-nostdin", "-loglevel", "error",
+            "-f", "rawvideo", "-vcodec", "rawvideo",
+            "-s", f"{width}x{height}", "-pix_fmt", "rgb24", "-r", f"{fps}",
+            "-i", "-",
+        ]
+        if audio_path:
+            if audio_duration is not None:
+                cmd += ["-t", f"{audio_duration:.6f}"]
+            # Stereo 44.1 kHz AAC, like MoviePy's audio export
+            cmd += [
+                "-i", audio_path, "-map", "0:v:0", "-map", "1:a:0",
+                "-acodec", "aac", "-ar", "44100", "-ac", "2",
+            ]
+        cmd += [
+            "-vcodec", "libx264", "-preset", preset, "-threads", str(threads),
+            "-pix_fmt", "yuv420p",
+        ]
+        cmd.append(output_path)
+
+        self._log = tempfile.TemporaryFile()
+        self._proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._log
+        )
+
+    def write_frame(self, frame: np.ndarray):
+        """
+        Send one frame to the encoder.
+
+        Args:
+            frame: C-contiguous (height, width, 3) uint8 array
+
+        Raises:
+            IOError: If ffmpeg exited (broken pipe)
+        """
+        if frame.nbytes != self._frame_bytes:
+            raise ValueError(f"Frame has {frame.nbytes} bytes, expected {self._frame_bytes}")
+        try:
+            self._proc.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError as e:
+            self._proc.wait()
+            raise IOError(
+                f"ffmpeg encoder for {self.output_path} exited after "
+                f"{self.frames_written} frames: {_read_log(self._log)}"
+            ) from e
+        self.frames_written += 1
+
+    def close(self):
+        """
+        Finish the stream and wait for ffmpeg to write the file.
+
+        Raises:
+            IOError: If ffmpeg exited with an error
+        """
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = self._proc.wait()
+        log = _read_log(self._log)
+        self._log.close()
+        if returncode != 0:
+            raise IOError(f"ffmpeg encoder for {self.output_path} failed: {log}")
+
+    def abort(self):
+        """Kill the encoder without finishing the file."""
+        if self._proc.poll() is None:
+            self._proc.kill()
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._proc.wait()
+        self._log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def escape_filter_value(value: str) -> str:
+    """
+    Escape a filter option value (such as a file path) for use in a filtergraph.
+
+    Applies both escaping levels ffmpeg parses: the option value (quote, colon,
+    backslash) and then the filtergraph description (brackets, comma, semicolon).
+    """
+    for char in ("\\", "'", ":"):
+        value = value.replace(char, "\\" + char)
+    for char in ("\\", "'", "[", "]", ",", ";"):
+        value = value.replace(char, "\\" + char)
+    return value
+
+
+def run_ffmpeg(args: list[str]):
+    """
+    Run one ffmpeg command to completion.
+
+    Args:
+        args: Arguments after the executable (inputs, filters, outputs)
+
+    Raises:
+        IOError: If ffmpeg exits with an error, carrying its error output
+    """
+    cmd = [ffmpeg_binary(), "-y", "-nostdin", "-loglevel", "error"] + args
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise IOError(f"ffmpeg failed: {result.stderr.decode(errors='replace').strip()}")
+
+
+def mux_subtitles(video_path: str, subtitle_path: str, output_path: str, language: str = "eng"):
+    """
+    Copy a video's streams into a new MP4 with a subtitle file added as a mov_text track.
+
+    Audio and video are stream-copied, so this costs about as much as copying the file.
+
+    Args:
+        video_path: Rendered video
+        subtitle_path: SubRip or WebVTT file
+        output_path: Output MP4 (overwritten)
+        language: ISO 639-2 language tag of the subtitle track
+
+    Raises:
+        IOError: If ffmpeg exits with an error
+    """
+    run_ffmpeg([
+        "-i", video_path, "-i", subtitle_path,
+        "-map", "0:v", "-map", "0:a?", "-map", "1:s",
+        "-c", "copy", "-c:s", "mov_text", "-metadata:s:s:0", f"language={language}",
+        output_path,
+    ])
+
+
+def concat_videos(
+    video_paths: list[str],
+    output_path: str,
+    audio_path: Optional[str] = None,
+    audio_duration: Optional[float] = None
+):
+    """
+    Join videos encoded with identical settings into one file without re-encoding.
+
+    The concat demuxer stream-copies the video packets one file after another, so
+    the join is lossless as long as every part starts on a keyframe (each
+    separately encoded part does). An audio file is encoded once over the whole
+    result, like FFmpegFrameWriter does (stereo 44.1 kHz AAC).
+
+    Args:
+        video_paths: Parts in playback order
+        output_path: Output video file (overwritten)
+        audio_path: Optional audio file muxed into the output
+        audio_duration: Cut the audio after this many seconds
+
+    Raises:
+        IOError: If ffmpeg exits with an error
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as list_file:
+        for path in video_paths:
+            # Single-quoted concat list entries escape a quote as '\''
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            list_file.write(f"file '{escaped}'\n")
+
+    args = ["-f", "concat", "-safe", "0", "-i", list_file.name]
+    if audio_path:
+        if audio_duration is not None:
+            args += ["-t", f"{audio_duration:.6f}"]
+        args += [
+            "-i", audio_path, "-map", "0:v:0", "-map", "1:a:0",
+            "-acodec", "aac", "-ar", "44100", "-ac", "2",
+        ]
+    args += ["-c:v", "copy", output_path]
+    try:
+        run_ffmpeg(args)
+    finally:
+        os.unlink(list_file.name)
@@ -0,0 +1,136 @@
+"""Process-wide font registry shared by caption, overlay and diagram rendering."""
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from PIL import ImageFont
+
+logger = logging.getLogger(__name__)
+
+_PIPELINE_DIR = Path(__file__).resolve().parent
+
+# Bundled fonts: assets/ sits next to backend/ in the repo and next to the
+# pipeline package in the Docker image (/app/assets, /app/pipeline)
+DEFAULT_FONT_DIRS = [
+    _PIPELINE_DIR.parent.parent / "assets" / "fonts",
+    _PIPELINE_DIR.parent / "assets" / "fonts",
+]
+
+# Caption face, then bold system fonts for machines without the bundled assets
+PREFERRED_FONT_FILES = ["Montserrat-Bold.ttf"]
+SYSTEM_FALLBACK_FONTS = [
+    "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
+    "/Library/Fonts/Arial Bold.ttf",
+    "/System/Library/Fonts/Helvetica.ttc",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+]
+
+
+class FontRegistry:
+    """
+    Resolves the caption font once and hands out loaded FreeTypeFont objects per size.
+
+    Resolution walks the font directories (FONTS_DIR first if set), then the system
+    fallbacks, and settles on the first file FreeType can open. If none can be opened
+    it falls back to Pillow's built-in default font at the requested size.
+    """
+
+    def __init__(self, font_dirs: list[Path], preferred_files: list[str], fallbacks: list[str]):
+        self.font_dirs = [Path(d) for d in font_dirs]
+        self.preferred_files = preferred_files
+        self.fallbacks = fallbacks
+        self._path: Optional[str] = None
+        self._resolved = False
+        self._fonts: dict[int, ImageFont.FreeTypeFont] = {}
+        self._lock = threading.Lock()
+
+    def _candidates(self) -> list[str]:
+        candidates = [
+            str(font_dir / name)
+            for font_dir in self.font_dirs
+            for name in self.preferred_files
+        ]
+        return candidates + self.fallbacks
+
+    def resolve(self) -> Optional[str]:
+        """
+        Pick the font file to use, once per process.
+
+        Returns:
+            Path of the chosen font file, or None if Pillow's default font is used
+        """
+        with self._lock:
+            if not self._resolved:
+                for candidate in self._candidates():
+                    if not os.path.isfile(candidate):
+                        continue
+                    try:
+                        ImageFont.truetype(candidate, 12)
+                    except OSError:
+                        continue
+                    self._path = candidate
+                    break
+                self._resolved = True
+                if self._path:
+                    logger.info("Font registry using %s", self._path)
+                else:
+                    logger.warning("No caption font found; using Pillow's default font")
+            return self._path
+
+    def get(self, size: int) -> ImageFont.FreeTypeFont:
+        """
+        Get the shared font object for a pixel size.
+
+        Args:
+            size: Font size in pixels
+
+        Returns:
+            Loaded font, cached for the lifetime of the process
+        """
+        font = self._fonts.get(size)
+        if font is not None:
+            return font
+
+        path = self.resolve()
+        with self._lock:
+            font = self._fonts.get(size)
+            if font is None:
+                font = ImageFont.truetype(path, size) if path else ImageFont.load_default(size)
+                self._fonts[size] = font
+        return font
+
+    def describe(self) -> str:
+        """Return a human-readable description of the chosen face."""
+        path = self.resolve()
+        font = self.get(12)
+        name = " ".join(n for n in font.getname() if n) if hasattr(font, "getname") else "default"
+        return f"{name} ({path})" if path else f"{name} (Pillow built-in default)"
+
+    @property
+    def path(self) -> Optional[str]:
+        """Path of the chosen font file (None for Pillow's default font)."""
+        return self.resolve()
+
+
+def _configured_font_dirs() -> list[Path]:
+    font_dir = os.environ.get("FONTS_DIR")
+    return ([Path(font_dir)] if font_dir else []) + DEFAULT_FONT_DIRS
+
+
+# Process-wide registry shared by all renderers
+font_registry = FontRegistry(_configured_font_dirs(), PREFERRED_FONT_FILES, SYSTEM_FALLBACK_FONTS)
+
+
+def get_font(size: int) -> ImageFont.FreeTypeFont:
+    """
+    Get the caption font at the given size from the process-wide registry.
+
+    Args:
+        size: Font size in pixels
+
+    Returns:
+        Shared PIL font object
+    """
+    return font_registry.get(size)
@@ -0,0 +1,75 @@
+"""Reusable frame buffers for the render loops."""
+import threading
+from typing import Optional
+
+import numpy as np
+
+
+class FramePool:
+    """
+    Free list of equally shaped frame buffers, handed out and returned per frame.
+
+    A full-HD RGB frame is ~6 MB, so every fresh np.empty/np.array per frame goes
+    to the allocator (and usually to mmap and page faults). The pool only allocates
+    when no released buffer is free, so once the frames in flight peak, a render
+    loop stops allocating. Acquire and release are thread-safe; a buffer may be
+    released by a different thread than the one that acquired it.
+    """
+
+    def __init__(
+        self,
+        shape: tuple[int, ...],
+        dtype=np.uint8,
+        max_free: Optional[int] = None
+    ):
+        """
+        Args:
+            shape: Buffer shape, e.g. (height, width, 3)
+            dtype: Buffer dtype
+            max_free: Keep at most this many released buffers (None: no limit;
+                      0 disables reuse, allocating on every acquire)
+        """
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.max_free = max_free
+        self._free: list[np.ndarray] = []
+        self._lock = threading.Lock()
+        self.allocated = 0
+        self.acquired = 0
+
+    def acquire(self) -> np.ndarray:
+        """
+        Take a buffer; its contents are whatever the last user left in it.
+
+        Returns:
+            Writable C-contiguous array of the pool's shape and dtype
+        """
+        with self._lock:
+            self.acquired += 1
+            if self._free:
+                return self._free.pop()
+            self.allocated += 1
+        return np.empty(self.shape, dtype=self.dtype)
+
+    def release(self, buffer: np.ndarray):
+        """
+        Return a buffer acquired from this pool; the caller must not use it afterwards.
+
+        Args:
+            buffer: Array previously returned by acquire()
+        """
+        with self._lock:
+            if self.max_free is None or len(self._free) < self.max_free:
+                self._free.append(buffer)
+
+    def stats(self) -> dict:
+        """Return allocation counters and the number of free buffers."""
+        with self._lock:
+            return {
+                "acquired": self.acquired,
+                "allocated": self.allocated,
+                "reused": self.acquired - self.allocated,
+                "allocations_per_frame": self.allocated / self.acquired if self.acquired else 0.0,
+                "free": len(self._free),
+                "bytes_allocated": self.allocated * int(np.prod(self.shape)) * self.dtype.itemsize,
+            }
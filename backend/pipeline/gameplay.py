@@ -0,0 +1,545 @@
+"""Gameplay clips: a probed index of the library, and proxies normalized to the output format."""
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from .ffmpeg_io import ffmpeg_binary, ffprobe_binary, probe_duration, run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+# Proxies go in this directory (default: a .proxies folder next to each clip,
+# which the *.mp4 globs of the gameplay directory don't descend into)
+GAMEPLAY_PROXY_DIR = os.getenv("GAMEPLAY_PROXY_DIR", "")
+
+# One keyframe per this many seconds, so seeks into a proxy decode little
+PROXY_KEYFRAME_SECONDS = 1.0
+
+# Proxies longer than this are split into segments of this length (rounded to
+# whole keyframe intervals, so every segment starts on a keyframe); a render
+# starting mid-clip then opens one short segment instead of the whole proxy
+GAMEPLAY_SEGMENT_SECONDS = float(os.getenv("GAMEPLAY_SEGMENT_SECONDS", "300"))
+
+# Bump when the proxy encoding changes, so stale proxies are not reused
+_PROXY_VERSION = 1
+
+# Codec and pixel format the render engines decode without conversion
+TARGET_CODEC = "h264"
+TARGET_PIX_FMT = "yuv420p"
+
+_hash_cache: dict[tuple[str, int, int], str] = {}
+_proxy_locks: dict[str, threading.Lock] = {}
+_proxy_locks_lock = threading.Lock()
+_segment_cache: dict[str, list["GameplaySegment"]] = {}
+
+
+def content_hash(path: str) -> str:
+    """
+    Return the SHA-256 of a file's contents.
+
+    Hashes are memoized per (path, size, mtime), so a clip is read once per
+    process unless it changes.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _hash_cache.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        digest = _hash_cache[key] = sha.hexdigest()
+    return digest
+
+
+def proxy_path(source_path: str, resolution: tuple, fps: int) -> Path:
+    """
+    Return where the proxy of a clip for an output format is cached.
+
+    Args:
+        source_path: Gameplay clip
+        resolution: Output (width, height)
+        fps: Output frame rate
+
+    Returns:
+        Proxy path, named by the clip's content hash and the format
+    """
+    width, height = resolution
+    proxy_dir = Path(GAMEPLAY_PROXY_DIR) if GAMEPLAY_PROXY_DIR else Path(source_path).parent / ".proxies"
+    name = f"{content_hash(source_path)[:32]}_{width}x{height}_{fps}fps_v{_PROXY_VERSION}.mp4"
+    return proxy_dir / name
+
+
+def _transcode_proxy(source_path: str, output_path: str, resolution: tuple, fps: int):
+    """Encode a clip center-cropped and scaled to resolution, at fps, with dense keyframes."""
+    width, height = resolution
+    gop = max(1, round(fps * PROXY_KEYFRAME_SECONDS))
+    run_ffmpeg([
+        "-i", source_path, "-an", "-sn",
+        # Scale to cover the frame, then crop the middle: no squashed 16:9 sources
+        "-vf", f"fps={fps},scale={width}:{height}:force_original_aspect_ratio=increase"
+               f":flags=lanczos,crop={width}:{height},setsar=1",
+        "-vcodec", "libx264", "-preset", "veryfast", "-crf", "18", "-pix_fmt", "yuv420p",
+        "-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0",
+        "-movflags", "+faststart",
+        output_path,
+    ])
+
+
+def _file_lock(path: Path) -> threading.Lock:
+    with _proxy_locks_lock:
+        return _proxy_locks.setdefault(str(path), threading.Lock())
+
+
+def get_gameplay_proxy(source_path: str, resolution: tuple, fps: int) -> str:
+    """
+    Return a clip's proxy for an output format, transcoding it on first use.
+
+    The proxy is already at the output size, frame rate and pixel format, so the
+    render engines' scaling and frame-rate conversion have nothing left to do.
+    Concurrent callers in this process wait for one transcode; the proxy is
+    written to a temporary name and renamed, so other processes never see a
+    partial file.
+
+    Args:
+        source_path: Gameplay clip
+        resolution: Output (width, height)
+        fps: Output frame rate
+
+    Returns:
+        Path to the proxy
+
+    Raises:
+        IOError: If ffmpeg cannot transcode the clip
+    """
+    proxy = proxy_path(source_path, resolution, fps)
+    if proxy.exists():
+        return str(proxy)
+
+    with _file_lock(proxy):
+        if proxy.exists():
+            return str(proxy)
+        proxy.parent.mkdir(parents=True, exist_ok=True)
+        partial = proxy.with_suffix(f".{os.getpid()}.part.mp4")
+        try:
+            _transcode_proxy(source_path, str(partial), resolution, fps)
+            os.replace(partial, proxy)
+        finally:
+            if partial.exists():
+                partial.unlink()
+    logger.info("Created gameplay proxy %s for %s", proxy, source_path)
+    return str(proxy)
+
+
+class GameplaySegment(NamedTuple):
+    """A stretch of a gameplay proxy, stored as its own file."""
+    path: str
+    start: float
+    end: float
+
+
+def _segment_seconds() -> float:
+    return max(1, round(GAMEPLAY_SEGMENT_SECONDS / PROXY_KEYFRAME_SECONDS)) * PROXY_KEYFRAME_SECONDS
+
+
+def _read_segment_list(segment_dir: Path) -> list[GameplaySegment]:
+    segments = []
+    for line in (segment_dir / "segments.csv").read_text().splitlines():
+        name, start, end = line.rsplit(",", 2)
+        segments.append(GameplaySegment(str(segment_dir / name), float(start), float(end)))
+    return segments
+
+
+def get_gameplay_segments(proxy: str) -> list[GameplaySegment]:
+    """
+    Return a proxy's segments, splitting a long proxy on first use.
+
+    The split is a stream copy at the proxy's keyframes, so it costs about as much
+    as copying the file, and each segment decodes from its first frame. A proxy
+    no longer than GAMEPLAY_SEGMENT_SECONDS is a single segment: itself.
+    Segments are cached in a ``.segments`` directory next to the proxy, which is
+    written under a temporary name and renamed once complete.
+
+    Args:
+        proxy: Proxy from get_gameplay_proxy
+
+    Returns:
+        Segments in order, covering the proxy
+
+    Raises:
+        IOError: If ffmpeg cannot read or split the proxy
+    """
+    segments = _segment_cache.get(proxy)
+    if segments is not None:
+        return segments
+
+    segment_dir = Path(proxy).with_suffix(".segments")
+    with _file_lock(segment_dir):
+        if not segment_dir.is_dir():
+            duration = probe_duration(proxy)
+            if duration <= _segment_seconds():
+                segments = _segment_cache[proxy] = [GameplaySegment(proxy, 0.0, duration)]
+                return segments
+            partial = segment_dir.with_name(f"{segment_dir.name}.{os.getpid()}.part")
+            partial.mkdir(parents=True, exist_ok=True)
+            try:
+                run_ffmpeg([
+                    "-i", proxy, "-map", "0:v", "-c", "copy",
+                    "-f", "segment", "-segment_time", f"{_segment_seconds():g}",
+                    "-reset_timestamps", "1", "-segment_format_options", "movflags=+faststart",
+                    str(partial / "%04d.mp4"),
+                ])
+                # The segment muxer's own list carries the encoder delay in its
+                # times, so record each segment's span from the probed lengths
+                lines, start = [], 0.0
+                for path in sorted(partial.glob("*.mp4")):
+                    end = start + probe_duration(str(path))
+                    lines.append(f"{path.name},{start:.6f},{end:.6f}")
+                    start = end
+                (partial / "segments.csv").write_text("\n".join(lines) + "\n")
+                os.replace(partial, segment_dir)
+            finally:
+                shutil.rmtree(partial, ignore_errors=True)
+            logger.info("Split gameplay proxy %s into segments", proxy)
+        segments = _segment_cache[proxy] = _read_segment_list(segment_dir)
+    return segments
+
+
+def random_gameplay_start(segments: list[GameplaySegment], duration: float) -> float:
+    """
+    Pick a random keyframe to start the gameplay at.
+
+    The start is chosen so the whole video plays from one segment without
+    looping when some segment is long enough; otherwise it is anywhere in the clip.
+
+    Args:
+        segments: The clip's segments (get_gameplay_segments)
+        duration: Video duration in seconds
+
+    Returns:
+        Seconds into the clip, on a whole keyframe interval
+    """
+    fitting = [seg for seg in segments if seg.end - seg.start >= duration]
+    if fitting:
+        segment = random.choice(fitting)
+        # Segments start on keyframes, so rounding down stays inside the segment
+        start = random.uniform(segment.start, segment.end - duration)
+    else:
+        start = random.uniform(0.0, segments[-1].end)
+    return math.floor(start / PROXY_KEYFRAME_SECONDS) * PROXY_KEYFRAME_SECONDS
+
+
+def locate_gameplay(
+    path: str,
+    segments: list[GameplaySegment],
+    start: float,
+    duration: float
+) -> tuple[str, float]:
+    """
+    Map a start offset into a clip to the segment a read from it stays within.
+
+    Args:
+        path: The whole clip (used when no single segment holds the read)
+        segments: The clip's segments (get_gameplay_segments)
+        start: Seconds into the clip
+        duration: Seconds to read
+
+    Returns:
+        (file to read, start offset within it)
+    """
+    for segment in segments:
+        # Segment ends are frame timestamps, so allow for their rounding
+        if segment.start <= start and start + duration <= segment.end + 1e-3:
+            return segment.path, start - segment.start
+    return path, start
+
+
+class ClipInfo(NamedTuple):
+    """Probed metadata of a gameplay clip; fields are None when the probe failed."""
+    path: str
+    duration: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    codec: Optional[str] = None
+    pix_fmt: Optional[str] = None
+
+    def long_enough(self, duration: float) -> bool:
+        """Return whether the clip plays for duration seconds without looping."""
+        return self.duration is not None and self.duration >= duration
+
+    def matches(self, resolution: tuple, fps: Optional[float] = None) -> bool:
+        """Return whether the clip is already at the output size, frame rate and pixel format."""
+        return (
+            (self.width, self.height) == tuple(resolution)
+            and (fps is None or (self.fps is not None and abs(self.fps - fps) < 0.01))
+            and self.codec == TARGET_CODEC
+            and self.pix_fmt == TARGET_PIX_FMT
+        )
+
+
+def _frame_rate(rate: str) -> Optional[float]:
+    """Parse an ffprobe rate such as "30000/1001" (None for "0/0")."""
+    num, _, den = rate.partition("/")
+    try:
+        value = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return value or None
+
+
+def _ffprobe(ffprobe: str, path: str) -> ClipInfo:
+    result = subprocess.run(
+        [ffprobe, "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "stream=codec_name,width,height,avg_frame_rate,pix_fmt:format=duration",
+         "-of", "json", path],
+        capture_output=True, text=True
+    )
+    info = json.loads(result.stdout or "{}")
+    if result.returncode != 0 or not info.get("streams"):
+        raise IOError(f"ffprobe could not read {path}: {result.stderr.strip()}")
+    stream = info["streams"][0]
+    duration = info.get("format", {}).get("duration")
+    return ClipInfo(
+        path,
+        duration=float(duration) if duration else None,
+        width=stream.get("width"),
+        height=stream.get("height"),
+        fps=_frame_rate(stream.get("avg_frame_rate", "0/0")),
+        codec=stream.get("codec_name"),
+        pix_fmt=stream.get("pix_fmt"),
+    )
+
+
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_VIDEO_RE = re.compile(r"Stream #.*?: Video: (\w+)[^,]*(?:, (\w+)(?:\([^)]*\))?)?.*?, (\d+)x(\d+)")
+_FPS_RE = re.compile(r"Stream #.*?: Video: .*?, (\d+(?:\.\d+)?) fps")
+
+
+def _ffmpeg_probe(path: str) -> ClipInfo:
+    # ffmpeg prints the input's streams on stderr and exits non-zero without an output
+    result = subprocess.run(
+        [ffmpeg_binary(), "-hide_banner", "-i", path], capture_output=True, text=True
+    )
+    video = _VIDEO_RE.search(result.stderr)
+    if video is None:
+        raise IOError(f"ffmpeg found no video stream in {path}")
+    duration = _DURATION_RE.search(result.stderr)
+    fps = _FPS_RE.search(result.stderr)
+    return ClipInfo(
+        path,
+        duration=(
+            int(duration[1]) * 3600 + int(duration[2]) * 60 + float(duration[3])
+            if duration else None
+        ),
+        width=int(video[3]),
+        height=int(video[4]),
+        fps=float(fps[1]) if fps else None,
+        codec=video[1],
+        pix_fmt=video[2],
+    )
+
+
+def probe_clip(path: str) -> ClipInfo:
+    """
+    Read a clip's duration, video size, frame rate, codec and pixel format.
+
+    Uses ffprobe when it is installed, and otherwise parses the stream summary
+    ffmpeg prints for its input.
+
+    Args:
+        path: Video file
+
+    Returns:
+        The clip's metadata
+
+    Raises:
+        IOError: If the file has no readable video stream
+    """
+    ffprobe = ffprobe_binary()
+    return _ffprobe(ffprobe, path) if ffprobe else _ffmpeg_probe(path)
+
+
+class ClipIndex:
+    """
+    Probed metadata of every clip in a gameplay directory.
+
+    The index re-lists the directory only when its modification time changes
+    (adding, removing or renaming a clip bumps it) and re-probes only clips whose
+    size or modification time changed, so looking up a clip per job is a stat
+    call. Clips that fail to probe stay in the index with unknown metadata: they
+    are still picked when nothing better exists, and the render surfaces the error.
+    """
+
+    def __init__(self, gameplay_dir: str):
+        self.gameplay_dir = Path(gameplay_dir)
+        self._lock = threading.Lock()
+        self._dir_mtime: Optional[int] = None
+        self._clips: dict[str, tuple[tuple[int, int], ClipInfo]] = {}
+
+    def refresh(self, force: bool = False):
+        """
+        Re-list the directory if it changed since the last refresh.
+
+        Args:
+            force: Re-stat every clip even if the directory itself is unchanged
+                   (a clip overwritten in place does not bump the directory)
+        """
+        with self._lock:
+            try:
+                dir_mtime = self.gameplay_dir.stat().st_mtime_ns
+            except OSError:
+                self._dir_mtime = None
+                self._clips = {}
+                return
+            if dir_mtime == self._dir_mtime and not force:
+                return
+
+            paths = sorted(self.gameplay_dir.glob("*.mp4")) + sorted(self.gameplay_dir.glob("*.MP4"))
+            clips = {}
+            for path in paths:
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                key = (stat.st_size, stat.st_mtime_ns)
+                cached = self._clips.get(str(path))
+                if cached is not None and cached[0] == key:
+                    clips[str(path)] = cached
+                    continue
+                try:
+                    info = probe_clip(str(path))
+                except IOError as e:
+                    logger.warning("Could not probe gameplay clip %s: %s", path, e)
+                    info = ClipInfo(str(path))
+                clips[str(path)] = (key, info)
+            self._clips = clips
+            self._dir_mtime = dir_mtime
+
+    def clips(self) -> list[ClipInfo]:
+        """Return the metadata of every clip, refreshing the index first."""
+        self.refresh()
+        return [info for _, info in self._clips.values()]
+
+    def select(
+        self,
+        duration: Optional[float] = None,
+        resolution: Optional[tuple] = None,
+        fps: Optional[float] = None
+    ) -> Optional[ClipInfo]:
+        """
+        Pick a random clip, preferring ones that need no looping or conversion.
+
+        Clips long enough for the narration come first, then, among those, clips
+        already at the output format; the pick is random among the best tier.
+
+        Args:
+            duration: Narration length in seconds (None: any length)
+            resolution: Output (width, height) (None: any format)
+            fps: Output frame rate
+
+        Returns:
+            The chosen clip, or None if the directory has no clips
+        """
+        clips = self.clips()
+        if not clips:
+            return None
+
+        def score(info: ClipInfo) -> tuple[bool, bool]:
+            return (
+                duration is None or info.long_enough(duration),
+                resolution is None or info.matches(resolution, fps),
+            )
+
+        best = max(score(info) for info in clips)
+        return random.choice([info for info in clips if score(info) == best])
+
+
+_indexes: dict[str, ClipIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def gameplay_index(gameplay_dir: str) -> ClipIndex:
+    """Return the process-wide clip index of a gameplay directory."""
+    key = os.path.abspath(gameplay_dir)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = ClipIndex(gameplay_dir)
+    return index
+
+
+_PROXY_NAME_RE = re.compile(r"([0-9a-f]{32})_.*_v(\d+)\.(?:mp4|segments)$")
+
+
+def _prune_proxies(gameplay_dir: str, clips: list[ClipInfo]):
+    """
+    Delete the proxies and segments of clips no longer in a gameplay directory.
+
+    A proxy is named by its clip's content hash, so editing or removing a clip
+    orphans the proxy (and segment directory) of its old contents; those of an
+    older _PROXY_VERSION are stale too. Partial files of in-progress transcodes
+    and splits are left alone.
+    """
+    live = set()
+    for info in clips:
+        try:
+            live.add(content_hash(info.path)[:32])
+        except OSError:
+            # A clip vanished mid-listing: skip pruning rather than guess
+            return
+    proxy_dir = Path(GAMEPLAY_PROXY_DIR) if GAMEPLAY_PROXY_DIR else Path(gameplay_dir) / ".proxies"
+    if not proxy_dir.is_dir():
+        return
+    for path in proxy_dir.iterdir():
+        match = _PROXY_NAME_RE.match(path.name)
+        if not match or (match[1] in live and int(match[2]) == _PROXY_VERSION):
+            continue
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+        _segment_cache.pop(str(path.with_suffix(".mp4")), None)
+        logger.info("Deleted stale gameplay proxy %s", path)
+
+
+def ingest_gameplay(
+    gameplay_dir: str,
+    resolution: tuple = (1080, 1920),
+    fps: int = 24
+) -> dict[str, Optional[str]]:
+    """
+    Create the proxies of every clip in a gameplay directory ahead of the first job.
+
+    Long proxies are also split into their segments, and the proxies and segments
+    of clips that were edited or removed since are deleted.
+
+    Args:
+        gameplay_dir: Directory containing gameplay video files
+        resolution: Output (width, height); compose_video's default
+        fps: Output frame rate; compose_video's default
+
+    Returns:
+        {clip path: proxy path, or None if the clip could not be transcoded or split}
+    """
+    proxies = {}
+    clips = gameplay_index(gameplay_dir).clips()
+    _prune_proxies(gameplay_dir, clips)
+    for info in clips:
+        clip = info.path
+        try:
+            proxy = get_gameplay_proxy(clip, resolution, fps)
+            get_gameplay_segments(proxy)
+        except IOError as e:
+            logger.warning("Could not prepare gameplay clip %s: %s", clip, e)
+            proxy = None
+        proxies[clip] = proxy
+    return proxies
@@ -0,0 +1,570 @@
+"""Gameplay decoders shared by concurrent renders through shared-memory frame rings."""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+import numpy as np
+
+from .ffmpeg_io import FFmpegFrameReader
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so every render decodes on its own
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Share gameplay decoders between renders of the same clip, size and frame rate
+# (set to 0 to give every render its own decoder)
+SHARED_DECODE = os.getenv("SHARED_DECODE", "1") != "0" and fcntl is not None
+
+# Renders with a random gameplay start begin where a running decoder of the clip
+# is about to be, so they share it (off by default: concurrent jobs on one clip
+# would then show nearly the same footage)
+LIVE_START = os.getenv("SHARED_DECODE_LIVE_START", "0") == "1"
+
+# Frames a shared ring holds (8 full-HD frames are ~50 MB of shared memory); no
+# reader falls further behind the decoder than this
+RING_FRAMES = int(os.getenv("SHARED_DECODE_FRAMES", "8"))
+
+# A render can join a decoder whose ring still holds its first frame, or that
+# reaches it within this many seconds of video; it waits for the shared decoder
+# instead of starting its own
+JOIN_AHEAD_S = 5.0
+
+# Readers one ring can serve at once
+MAX_READERS = 16
+
+# How long blocked readers and decoders sleep between checks of the ring header
+_POLL_S = 0.001
+
+# How often blocked decoders and readers check that the processes they wait on are alive
+_LIVENESS_S = 1.0
+
+# Where Linux lists POSIX shared memory, and the prefix of our rings' names
+_SHM_DIR = "/dev/shm"
+_RING_PREFIX = "brg_"
+
+# Ring header: int64 fields, then each reader's next frame and process id
+_HEAD = 0       # Frames published: frame i is in slot i % slots once i < head
+_WRITING = 1    # Frame the decoder last started writing (-1: none yet)
+_END = 2        # Frames the decoder produces
+_CLOSED = 3     # 1 once the decoder stopped (done, failed, or left without readers)
+_SLOTS = 4      # Frames the ring holds
+_OWNER = 5      # Process id of the decoder
+_OPEN = 6       # 1 while new readers may join
+_BASE = 7       # Microseconds into the looped clip of the decoder's frame 0
+_POSITIONS = 8
+_PIDS = _POSITIONS + MAX_READERS
+_HEADER_FIELDS = _PIDS + MAX_READERS
+_HEADER_BYTES = _HEADER_FIELDS * 8
+
+_stats_lock = threading.Lock()
+_decodes: Counter = Counter()
+_decodes_avoided: Counter = Counter()
+
+
+def shared_decode_stats() -> dict[str, dict[str, int]]:
+    """
+    Return this process's gameplay decode counters per clip.
+
+    Returns:
+        {clip path: {"decodes": decoders started, "decodes_avoided": reads
+         served by another render's decoder}}
+    """
+    with _stats_lock:
+        return {
+            path: {"decodes": _decodes[path], "decodes_avoided": _decodes_avoided[path]}
+            for path in sorted(set(_decodes) | set(_decodes_avoided))
+        }
+
+
+def _ring_name(path: str, size: tuple[int, int], fps: float) -> str:
+    key = f"{os.path.abspath(path)}|{size[0]}x{size[1]}|{fps}"
+    # POSIX shared memory names stay short for macOS (31 characters)
+    return _RING_PREFIX + hashlib.sha1(key.encode()).hexdigest()[:24]
+
+
+def _microseconds(seconds: float) -> int:
+    return round(seconds * 1e6)
+
+
+class _RegistryLock:
+    """Cross-process lock serializing the creating, joining and closing of rings."""
+
+    _path = os.path.join(tempfile.gettempdir(), "brainrot-shared-decode.lock")
+
+    def __enter__(self):
+        self._fd = os.open(self._path, os.O_CREAT | os.O_RDWR, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> shared_memory.SharedMemory:
+    # The decoder's process unlinks the ring itself (a crashed one's ring is
+    # swept by sweep_orphaned_rings), so the resource tracker shared by a process
+    # tree must not unlink it when whichever process registered it exits
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _unlink(shm: shared_memory.SharedMemory):
+    # unlink() unregisters the name from the resource tracker, which _untrack did already
+    resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+def _shm_has_room(size: int) -> bool:
+    # Writing past a full /dev/shm (64 MB in a default Docker container) is a SIGBUS
+    try:
+        stat = os.statvfs(_SHM_DIR)
+    except OSError:
+        return True
+    return stat.f_bavail * stat.f_frsize >= size
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        # A ring whose creator died before writing its header
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _attach(name: str) -> Optional[tuple[shared_memory.SharedMemory, np.ndarray]]:
+    """Attach to a ring by name; return (shm, header), or None if it is gone or not a ring."""
+    try:
+        shm = _untrack(shared_memory.SharedMemory(name=name))
+    except (FileNotFoundError, ValueError):
+        return None
+    if shm.size < _HEADER_BYTES:
+        shm.close()
+        return None
+    return shm, np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+
+
+def _sweep() -> int:
+    # Callers hold the registry lock
+    try:
+        names = [name for name in os.listdir(_SHM_DIR) if name.startswith(_RING_PREFIX)]
+    except OSError:
+        return 0
+    removed = 0
+    for name in names:
+        attached = _attach(name)
+        if attached is None:
+            continue
+        shm, header = attached
+        orphaned = not _pid_alive(int(header[_OWNER]))
+        del header
+        shm.close()
+        if orphaned:
+            _unlink(shm)
+            removed += 1
+    if removed:
+        logger.warning("Removed %d shared decode rings left behind by dead processes", removed)
+    return removed
+
+
+def sweep_orphaned_rings() -> int:
+    """
+    Unlink the shared decode rings of decoders whose process is gone.
+
+    A render that crashes leaves its ring in shared memory; the sweep runs before
+    every new ring is created and should run once at startup.
+
+    Returns:
+        Number of rings removed
+    """
+    if fcntl is None:
+        return 0
+    with _RegistryLock():
+        return _sweep()
+
+
+def live_gameplay_start(
+    segments: list,
+    size: tuple[int, int],
+    fps: float,
+    duration: float
+) -> Optional[float]:
+    """
+    Pick a start offset that joins a running shared decoder of the clip, if any.
+
+    For renders that take any start, if LIVE_START is on: the offset is
+    JOIN_AHEAD_S seconds of video past the frame a decoder of one of the clip's
+    segments last published, so the render joins it when it opens its reader, if
+    the video fits in that segment from there without looping and the decoder
+    runs that far.
+
+    Args:
+        segments: The clip's segments (gameplay.get_gameplay_segments)
+        size: Output (width, height)
+        fps: Output frame rate
+        duration: Video duration in seconds
+
+    Returns:
+        Seconds into the clip, or None if no decoder can take the render (or
+        LIVE_START is off)
+    """
+    if not (SHARED_DECODE and LIVE_START):
+        return None
+    with _RegistryLock():
+        for segment in segments:
+            attached = _attach(_ring_name(segment.path, size, fps))
+            if attached is None:
+                continue
+            shm, header = attached
+            frame = int(header[_HEAD]) + round(JOIN_AHEAD_S * fps)
+            running = (
+                _pid_alive(int(header[_OWNER])) and header[_OPEN] and not header[_CLOSED]
+                and frame < header[_END]
+            )
+            start = header[_BASE] / 1e6 + frame / fps
+            del header
+            shm.close()
+            if running and start + duration <= segment.end - segment.start:
+                return segment.start + start
+    return None
+
+
+class SharedGameplayReader:
+    """
+    Read a looped gameplay clip's frames through a decoder shared with other renders.
+
+    The first render to open a (clip, size, frame rate) creates a ring of frame
+    slots in named shared memory and decodes into it on a background thread,
+    from its own start offset. A render of the same key that opens later, from
+    this or any other process, joins at the decoder frame matching its own start
+    offset, if the ring still holds that frame or the decoder reaches it within
+    JOIN_AHEAD_S, and reads frames by index instead of starting a decoder of its
+    own. The decoder waits for the slowest attached reader, so readers stay
+    within one ring of it, and stops at the end of the first render's read.
+
+    A reader that cannot share (the decoder is past its start, too far from it,
+    full of readers, or stopped) decodes privately, and so does a reader that
+    needs frames past the end of the decoder it joined, from that frame on. Frames match an
+    FFmpegFrameReader opened with loop=True and the same start and duration.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: tuple[int, int],
+        fps: float,
+        duration: float,
+        start: float = 0.0
+    ):
+        """
+        Join or start the shared decoder of a clip.
+
+        Args:
+            path: Gameplay clip
+            size: Output (width, height)
+            fps: Output frame rate
+            duration: Seconds to read
+            start: Seconds into the looped clip to start at
+        """
+        self.path = path
+        self.size = size
+        self.fps = fps
+        self.start = start
+        self.duration = duration
+        width, height = size
+        self._frame_shape = (height, width, 3)
+        self._frame_count = len(np.arange(0, duration, 1.0 / fps))
+        self._next = 0
+        self._buffer = np.empty(self._frame_shape, dtype=np.uint8)
+        self._last_frame: Optional[np.ndarray] = None
+        self._private: Optional[FFmpegFrameReader] = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._slot: Optional[int] = None
+        self._first = 0
+        self._decoder: Optional[threading.Thread] = None
+        self._owner = False
+        self.shared = False
+        self.decodes = 0
+        self.decodes_avoided = 0
+        self._reported = False
+
+        self._name = _ring_name(path, size, fps)
+        with _RegistryLock():
+            try:
+                self._create()
+            except FileExistsError:
+                self._join()
+
+    def _count(self, avoided: bool):
+        if avoided:
+            self.decodes_avoided += 1
+        else:
+            self.decodes += 1
+        with _stats_lock:
+            (_decodes_avoided if avoided else _decodes)[self.path] += 1
+
+    def _map(self, shm: shared_memory.SharedMemory, slots: int):
+        self._shm = shm
+        self._header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        self._frames = np.ndarray(
+            (slots,) + self._frame_shape, dtype=np.uint8, buffer=shm.buf, offset=_HEADER_BYTES
+        )
+
+    def _claim_slot(self) -> bool:
+        free = np.flatnonzero(self._header[_POSITIONS:_PIDS] < 0)
+        if not len(free):
+            return False
+        self._slot = int(free[0])
+        self._header[_PIDS + self._slot] = os.getpid()
+        self._header[_POSITIONS + self._slot] = self._first
+        return True
+
+    def _create(self):
+        _sweep()
+        slots = max(1, min(RING_FRAMES, self._frame_count))
+        size = _HEADER_BYTES + slots * int(np.prod(self._frame_shape))
+        if not _shm_has_room(size):
+            logger.warning("No room in shared memory; decoding %s without sharing", self.path)
+            return
+        shm = _untrack(shared_memory.SharedMemory(name=self._name, create=True, size=size))
+        self._map(shm, slots)
+        self._header[:] = 0
+        self._header[_WRITING] = -1
+        self._header[_END] = self._frame_count
+        self._header[_SLOTS] = slots
+        self._header[_OWNER] = os.getpid()
+        self._header[_OPEN] = 1
+        self._header[_BASE] = _microseconds(self.start)
+        self._header[_POSITIONS:_PIDS] = -1
+        self._claim_slot()
+        self.shared = True
+        self._owner = True
+        self._decoder = threading.Thread(target=self._decode, daemon=True)
+        self._decoder.start()
+        self._count(avoided=False)
+
+    def _join(self):
+        attached = _attach(self._name)
+        if attached is None:
+            return
+        shm, header = attached
+        if not _pid_alive(int(header[_OWNER])):
+            # Left behind by a crashed render: replace it
+            del header
+            shm.close()
+            _unlink(shm)
+            self._create()
+            return
+
+        # The decoder frame our first frame is, if the offsets are whole frames apart
+        offset = (_microseconds(self.start) - int(header[_BASE])) * self.fps / 1e6
+        first = round(offset)
+        slots = int(header[_SLOTS])
+        joinable = (
+            header[_OPEN] and not header[_CLOSED]
+            and abs(offset - first) < 1e-3
+            # Still in the ring, or decoded soon
+            and max(0, int(header[_WRITING]) - slots + 1) <= first
+            and first <= int(header[_HEAD]) + JOIN_AHEAD_S * self.fps
+            and first < header[_END]
+        )
+        del header
+        if not joinable:
+            shm.close()
+            return
+        self._first = first
+        self._map(shm, slots)
+        if not self._claim_slot():
+            self._unmap()
+            return
+        self.shared = True
+        self._count(avoided=True)
+        logger.info(
+            "Joined the shared gameplay decoder of %s at frame %d (%.2fs)",
+            self.path, first, self.start
+        )
+
+    def _unmap(self):
+        self._header = self._frames = None
+        self._shm.close()
+        self._shm = None
+
+    def _decode(self):
+        header, frames = self._header, self._frames
+        slots = len(frames)
+        end = int(header[_END])
+        last_check = time.monotonic()
+        try:
+            with FFmpegFrameReader(
+                self.path, self.size, self.fps, duration=self.duration, loop=True,
+                start=self.start
+            ) as reader:
+                for i in range(end):
+                    # Wait until every reader has consumed the frame this slot holds
+                    while True:
+                        positions = header[_POSITIONS:_PIDS]
+                        active = positions >= 0
+                        if not active.any():
+                            return
+                        if positions[active].min() > i - slots:
+                            break
+                        if time.monotonic() - last_check > _LIVENESS_S:
+                            self._drop_dead_readers(i - slots)
+                            last_check = time.monotonic()
+                        time.sleep(_POLL_S)
+                    header[_WRITING] = i
+                    reader.read_frame(out=frames[i % slots])
+                    header[_HEAD] = i + 1
+        except Exception:
+            # Readers fall back to decoding privately, which raises the error
+            logger.exception("Shared gameplay decoder of %s failed", self.path)
+        finally:
+            header[_CLOSED] = 1
+
+    def _drop_dead_readers(self, behind: int):
+        header = self._header
+        for slot in range(MAX_READERS):
+            position = header[_POSITIONS + slot]
+            if 0 <= position <= behind and not _pid_alive(int(header[_PIDS + slot])):
+                logger.warning("Dropping a dead reader of the shared decoder of %s", self.path)
+                header[_POSITIONS + slot] = -1
+
+    def _go_private(self, frame_index: int):
+        """Continue with a decoder of our own from frame_index on."""
+        self._leave_ring()
+        self._private = FFmpegFrameReader(
+            self.path, self.size, self.fps, duration=self.duration - frame_index / self.fps,
+            loop=True, start=self.start + frame_index / self.fps
+        )
+        self._count(avoided=False)
+
+    def _read_shared(self, i: int, out: np.ndarray) -> bool:
+        header, frames = self._header, self._frames
+        slots = len(frames)
+        frame = self._first + i
+        last_check = time.monotonic()
+        while header[_HEAD] <= frame:
+            if header[_CLOSED]:
+                return False
+            if time.monotonic() - last_check > _LIVENESS_S:
+                if not _pid_alive(int(header[_OWNER])):
+                    return False
+                last_check = time.monotonic()
+            time.sleep(_POLL_S)
+        np.copyto(out, frames[frame % slots])
+        # The decoder may have started overwriting the slot while we copied
+        return header[_WRITING] < frame + slots
+
+    def read_frame(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Read the next frame.
+
+        Past the requested duration the last frame is repeated, like FFmpegFrameReader.
+
+        Args:
+            out: Optional (height, width, 3) uint8 array to copy the frame into
+
+        Returns:
+            Writable (height, width, 3) uint8 array (out, if given); without out,
+            valid until the next read
+
+        Raises:
+            IOError: If the clip cannot be decoded
+        """
+        i = self._next
+        if i >= self._frame_count and self._last_frame is not None:
+            frame = self._last_frame
+        else:
+            self._next += 1
+            # Copied from the ring straight into out, so a shared frame costs one copy
+            frame = self._buffer if out is None else out
+            if self._shm is not None:
+                if self._read_shared(i, frame):
+                    self._header[_POSITIONS + self._slot] = self._first + i + 1
+                else:
+                    self._go_private(i)
+            elif self._private is None:
+                self._go_private(i)
+            if self._private is not None:
+                frame = self._private.read_frame(out=out)
+            if i >= self._frame_count - 1:
+                self._last_frame = frame.copy()
+        if out is None or frame is out:
+            return frame
+        np.copyto(out, frame)
+        return out
+
+    def _leave_ring(self):
+        if self._shm is None:
+            return
+        with _RegistryLock():
+            self._header[_POSITIONS + self._slot] = -1
+            if self._owner:
+                # Stop new readers from joining before the name is released
+                self._header[_OPEN] = 0
+        if self._owner:
+            # Readers that joined keep the decoder running until they are done
+            self._decoder.join()
+            with _RegistryLock():
+                _unlink(self._shm)
+        self._unmap()
+
+    def close(self):
+        """Leave the shared ring (the owner waits for its readers) and stop any private decoder."""
+        self._leave_ring()
+        if self._private is not None:
+            self._private.close()
+            self._private = None
+        if not self._reported:
+            self._reported = True
+            logger.info(
+                "Gameplay reads of %s: %d decoder(s) started, %d decode(s) avoided by sharing",
+                self.path, self.decodes, self.decodes_avoided
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_gameplay_reader(
+    path: str,
+    size: tuple[int, int],
+    fps: float,
+    duration: float,
+    start: float = 0.0,
+    shared: bool = True
+):
+    """
+    Open a looped gameplay reader, shared with concurrent renders when possible.
+
+    Args:
+        path: Gameplay clip
+        size: Output (width, height)
+        fps: Output frame rate
+        duration: Seconds to read
+        start: Seconds into the looped clip to start at
+        shared: False to decode privately even if SHARED_DECODE is on
+
+    Returns:
+        A SharedGameplayReader, or an FFmpegFrameReader if sharing is off
+    """
+    if SHARED_DECODE and shared:
+        return SharedGameplayReader(path, size, fps, duration, start=start)
+    return FFmpegFrameReader(path, size, fps, duration=duration, loop=True, start=start)
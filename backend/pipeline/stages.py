@@ -0,0 +1,165 @@
+"""Frame stages run on their own threads, linked by bounded queues."""
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# End-of-stream marker passed down the queues
+_DONE = object()
+
+# How often a blocked stage checks whether another stage failed
+_POLL_S = 0.1
+
+
+class StageStats:
+    """
+    Where one pipeline stage spent its time.
+
+    busy is time in the stage's own work, starved is time waiting for the
+    previous stage, and blocked is time waiting for room in the queue to the next
+    stage. The stage with the most busy time limits throughput; the stages around
+    it show up as starved (downstream) or blocked (upstream).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy_s = 0.0
+        self.starved_s = 0.0
+        self.blocked_s = 0.0
+
+    def stats(self) -> dict:
+        """Return the counters as a dict."""
+        return {
+            "items": self.items,
+            "busy_s": self.busy_s,
+            "starved_s": self.starved_s,
+            "blocked_s": self.blocked_s,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.name}: {self.items} items, busy {self.busy_s:.2f}s, "
+            f"starved {self.starved_s:.2f}s, blocked {self.blocked_s:.2f}s"
+        )
+
+
+def bottleneck(stats: list[StageStats]) -> str:
+    """Return the name of the stage that limited throughput (the busiest one)."""
+    return max(stats, key=lambda stage: stage.busy_s).name
+
+
+def run_pipeline(
+    source: tuple[str, Iterable],
+    stages: list[tuple[str, Callable[[Any], Any]]],
+    depth: int = 4
+) -> list[StageStats]:
+    """
+    Run a source and a chain of stages concurrently, one thread each.
+
+    Each stage takes the previous stage's items in order and passes its results
+    on through a queue of at most `depth` items, so a fast stage runs ahead until
+    the queue fills instead of buffering without bound. The last stage's results
+    are dropped. If any stage raises, the others stop and the first exception is
+    re-raised here once every thread has exited.
+
+    Args:
+        source: (name, iterable) producing the items
+        stages: (name, function) pairs applied in order
+        depth: Capacity of each queue between stages
+
+    Returns:
+        Stats of the source and each stage, in pipeline order
+
+    Raises:
+        Exception: Whatever the first failing stage raised
+    """
+    source_name, items = source
+    stats = [StageStats(source_name)] + [StageStats(name) for name, _ in stages]
+    queues = [queue.Queue(maxsize=depth) for _ in stages]
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    def put(out_queue: queue.Queue, item, stage: StageStats) -> bool:
+        start = time.perf_counter()
+        try:
+            while not stop.is_set():
+                try:
+                    out_queue.put(item, timeout=_POLL_S)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        finally:
+            stage.blocked_s += time.perf_counter() - start
+
+    def get(in_queue: queue.Queue, stage: StageStats):
+        start = time.perf_counter()
+        try:
+            while not stop.is_set():
+                try:
+                    return in_queue.get(timeout=_POLL_S)
+                except queue.Empty:
+                    pass
+            return _DONE
+        finally:
+            stage.starved_s += time.perf_counter() - start
+
+    def fail(error: BaseException):
+        errors.append(error)
+        stop.set()
+
+    def run_source(stage: StageStats, out_queue: queue.Queue):
+        try:
+            iterator = iter(items)
+            while True:
+                start = time.perf_counter()
+                item = next(iterator, _DONE)
+                stage.busy_s += time.perf_counter() - start
+                if item is _DONE:
+                    break
+                stage.items += 1
+                if not put(out_queue, item, stage):
+                    return
+            put(out_queue, _DONE, stage)
+        except BaseException as e:
+            fail(e)
+
+    def run_stage(func, stage: StageStats, in_queue: queue.Queue, out_queue):
+        try:
+            while True:
+                item = get(in_queue, stage)
+                if item is _DONE:
+                    break
+                start = time.perf_counter()
+                result = func(item)
+                stage.busy_s += time.perf_counter() - start
+                stage.items += 1
+                if out_queue is not None and not put(out_queue, result, stage):
+                    return
+            if out_queue is not None:
+                put(out_queue, _DONE, stage)
+        except BaseException as e:
+            fail(e)
+
+    threads = [threading.Thread(
+        target=run_source, args=(stats[0], queues[0]), name=source_name, daemon=True
+    )]
+    for i, (name, func) in enumerate(stages):
+        out_queue = queues[i + 1] if i + 1 < len(queues) else None
+        threads.append(threading.Thread(
+            target=run_stage, args=(func, stats[i + 1], queues[i], out_queue),
+            name=name, daemon=True
+        ))
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    return stats
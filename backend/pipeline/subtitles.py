@@ -0,0 +1,82 @@
+"""SubRip and WebVTT caption tracks for soft-subtitle output."""
+from typing import NamedTuple
+
+
+class SubtitleCue(NamedTuple):
+    """One caption segment: its display span and the start time of every word."""
+    start: float
+    end: float
+    words: list[tuple[str, float]]
+
+    @property
+    def text(self) -> str:
+        return " ".join(word for word, _ in self.words)
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    milliseconds = max(0, round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{milliseconds:03d}"
+
+
+def srt_time(seconds: float) -> str:
+    """Format seconds as a SubRip timestamp (HH:MM:SS,mmm)."""
+    return _timestamp(seconds, ",")
+
+
+def vtt_time(seconds: float) -> str:
+    """Format seconds as a WebVTT timestamp (HH:MM:SS.mmm)."""
+    return _timestamp(seconds, ".")
+
+
+def _escape_markup(text: str) -> str:
+    # WebVTT cue text is markup; SubRip is plain text, shown as written
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def build_srt(cues: list[SubtitleCue]) -> str:
+    """
+    Build a SubRip track with one cue per caption segment.
+
+    Args:
+        cues: Caption segments in time order
+
+    Returns:
+        SRT text
+    """
+    blocks = [
+        f"{index}\n{srt_time(cue.start)} --> {srt_time(cue.end)}\n{cue.text}\n"
+        for index, cue in enumerate(cues, start=1)
+    ]
+    return "\n".join(blocks)
+
+
+def build_webvtt(cues: list[SubtitleCue]) -> str:
+    """
+    Build a WebVTT track with one cue per caption segment and per-word timestamps.
+
+    Each word after the first is preceded by an inline timestamp tag, so players
+    that style :past/:future cues can reproduce the word-by-word highlight.
+    Timestamps outside the cue or out of order are dropped, as WebVTT requires
+    them to increase within the cue.
+
+    Args:
+        cues: Caption segments in time order
+
+    Returns:
+        WebVTT text
+    """
+    blocks = ["WEBVTT\n"]
+    for cue in cues:
+        parts = []
+        last_stamp = cue.start
+        for word, word_start in cue.words:
+            word = _escape_markup(word)
+            if parts and last_stamp < word_start < cue.end:
+                word = f"<{vtt_time(word_start)}>{word}"
+                last_stamp = word_start
+            parts.append(word)
+        blocks.append(f"{vtt_time(cue.start)} --> {vtt_time(cue.end)}\n{' '.join(parts)}\n")
+    return "\n".join(blocks)
@@ -0,0 +1,67 @@
+"""Interval lookups over the video timeline."""
+import bisect
+from typing import Iterable, Optional
+
+
+class IntervalIndex:
+    """
+    Static index answering "which intervals are active at time t".
+
+    Intervals are half-open, [start, end), matching MoviePy's ``is_playing``;
+    an end of None means the interval never ends. The timeline is cut at every
+    interval boundary and each elementary span between two consecutive
+    boundaries stores the intervals that cover it, so a lookup costs one bisect
+    plus the size of the answer instead of a scan over every interval.
+    """
+
+    def __init__(self, intervals: Iterable[tuple[float, Optional[float]]]):
+        """
+        Build the index.
+
+        Args:
+            intervals: (start, end) pairs; their position in the iterable is the
+                       id reported by lookups
+        """
+        intervals = list(intervals)
+        self._size = len(intervals)
+
+        starts: dict[float, list[int]] = {}
+        ends: dict[float, list[int]] = {}
+        for i, (start, end) in enumerate(intervals):
+            if end is not None and end <= start:
+                continue
+            starts.setdefault(start, []).append(i)
+            if end is not None:
+                ends.setdefault(end, []).append(i)
+
+        self._boundaries = sorted(set(starts) | set(ends))
+        self._spans: list[tuple[int, ...]] = []
+
+        # Sweep the boundaries once, keeping the currently open intervals
+        active: set[int] = set()
+        for boundary in self._boundaries:
+            active.difference_update(ends.get(boundary, ()))
+            active.update(starts.get(boundary, ()))
+            self._spans.append(tuple(sorted(active)))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def active(self, t: float) -> tuple[int, ...]:
+        """
+        Return the ids of the intervals containing t, in insertion order.
+
+        Args:
+            t: Time in seconds
+
+        Returns:
+            Tuple of interval ids (empty if none is active)
+        """
+        i = bisect.bisect_right(self._boundaries, t) - 1
+        if i < 0:
+            return ()
+        return self._spans[i]
+
+    def any_active(self, t: float) -> bool:
+        """Return True if at least one interval contains t."""
+        return bool(self.active(t))
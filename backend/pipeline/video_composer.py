@@ -1,13 +1,19 @@
-"""Video compositing using MoviePy."""
+"""Video compositing using MoviePy or a direct ffmpeg frame pipe."""
+import contextlib
+import functools
 import logging
+import math
+import multiprocessing
 import os
-import random
+import shutil
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
 
 logger = logging.getLogger(__name__)
 
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 try:
     # moviepy 2.x
@@ -16,7 +22,6 @@ try:
         AudioFileClip,
         ImageClip,
         CompositeVideoClip,
-        concatenate_videoclips,
         vfx,
     )
     MOVIEPY_V2 = True
@@ -27,11 +32,79 @@ except ImportError:
         AudioFileClip,
         ImageClip,
         CompositeVideoClip,
-        concatenate_videoclips,
     )
     from moviepy.video.fx import resize as _resize_mod
     MOVIEPY_V2 = False
 
+from .ass_captions import CaptionWord, build_caption_script
+from .caption_renderer import (
+    get_text_measurer,
+    get_word_tile_cache_stats,
+    map_caption_jobs,
+    render_word_tile,
+)
+from .checkpoints import ChunkCheckpoint, ChunkRenderError, checkpoint_directory, split_frames
+from .ffmpeg_io import (
+    FFmpegFrameWriter,
+    concat_videos,
+    escape_filter_value,
+    looped_input,
+    mux_subtitles,
+    probe_duration,
+    run_ffmpeg,
+)
+from .fonts import font_registry, get_font
+from .frame_buffers import FramePool
+from .gameplay import (
+    GameplaySegment,
+    gameplay_index,
+    get_gameplay_proxy,
+    get_gameplay_segments,
+    locate_gameplay,
+    random_gameplay_start,
+)
+from .shared_decode import live_gameplay_start, open_gameplay_reader
+from .stages import bottleneck, run_pipeline
+from .subtitles import SubtitleCue, build_srt, build_webvtt
+from .timeline import IntervalIndex
+
+# TikTok-style caption look: white words, the active word in yellow, thick black outline
+CAPTION_FILL = 'white'
+CAPTION_HIGHLIGHT = '#FFFF00'
+CAPTION_STROKE = 'black'
+CAPTION_STROKE_WIDTH = 5
+
+# Font size of the word-by-word captions, in pixels
+CAPTION_FONT_SIZE = 52
+
+# Render engines: MoviePy compositing (encoded in checkpointed chunks), numpy frames
+# piped straight to ffmpeg, or a single ffmpeg filtergraph (libass captions, no
+# per-frame Python)
+RENDER_ENGINES = ("moviepy", "ffmpeg", "filtergraph")
+DEFAULT_RENDER_ENGINE = os.getenv("RENDER_ENGINE", "moviepy")
+OUTPUT_RESOLUTION = (1080, 1920)  # 9:16 vertical
+OUTPUT_FPS = 24
+
+# Frames in flight between the ffmpeg engine's decode, composite and encode threads
+RENDER_QUEUE_DEPTH = 4
+
+# Segment-parallel ffmpeg engine: timeline chunks rendered by worker processes
+# ("auto" or 0: one per CPU core; 1 renders in this process), and the shortest
+# chunk worth a process and a keyframe of its own
+DEFAULT_RENDER_CHUNKS = os.getenv("RENDER_CHUNKS", "1")
+MIN_CHUNK_SECONDS = 2.0
+
+# The MoviePy engine encodes checkpointed chunks of this many seconds, so a failed
+# encode resumes from the last finished chunk; a chunk that fails with an I/O error
+# (e.g. ffmpeg's pipe breaking) is retried this many times
+CHECKPOINT_SECONDS = float(os.getenv("CHECKPOINT_SECONDS", "10"))
+CHUNK_RETRIES = 1
+
+# Caption modes: drawn into the frames, or muxed as a mov_text track with
+# .srt/.vtt sidecars next to the video (nothing drawn)
+CAPTION_MODES = ("burned", "soft")
+DEFAULT_CAPTION_MODE = os.getenv("CAPTION_MODE", "burned")
+
 
 def _clip_set_start(clip, t):
     return clip.with_start(t) if MOVIEPY_V2 else clip.set_start(t)
@@ -45,10 +118,6 @@ def _clip_set_position(clip, pos):
     return clip.with_position(pos) if MOVIEPY_V2 else clip.set_position(pos)
 
 
-def _clip_set_audio(clip, audio):
-    return clip.with_audio(audio) if MOVIEPY_V2 else clip.set_audio(audio)
-
-
 def _clip_subclip(clip, start, end):
     return clip.subclipped(start, end) if MOVIEPY_V2 else clip.subclip(start, end)
 
@@ -69,10 +138,296 @@ def _clip_transform(clip, func):
     return clip.transform(func) if MOVIEPY_V2 else clip.fl(func)
 
 
+def _clip_time_transform(clip, func):
+    return clip.time_transform(func) if MOVIEPY_V2 else clip.fl_time(func)
+
+
+def _loop_clip(clip, duration: float, start: float = 0.0):
+    """
+    Loop a clip to a duration by reading source time (start + t) mod its length.
+
+    Every pass reads the clip's one decoder: wrapping around is a single seek back
+    to the start instead of a switch between concatenated copies, so a clip that
+    loops many times costs the same per frame as one that plays through once.
+    """
+    source_duration = clip.duration
+    looped = _clip_time_transform(clip, lambda t: (start + t) % source_duration)
+    return _clip_set_duration(looped, duration)
+
+
+def _div255(x: np.ndarray) -> np.ndarray:
+    """Divide uint16 products of two 8-bit values by 255 with rounding, in place."""
+    x += 128
+    x += x >> 8
+    x >>= 8
+    return x
+
+
+class GameplayDimmer:
+    """
+    Frame filter halving the gameplay's brightness while any diagram is showing.
+
+    The dim windows are indexed once, so each frame costs one bisect instead of a
+    scan over every diagram. Dimmed frames are shifted right by one bit into a
+    single reused buffer, which gives the same values as (frame * 0.5).astype(uint8)
+    without a float64 copy of the frame. The buffer is overwritten on the next dimmed
+    frame; compositing copies the gameplay frame before that happens.
+    """
+
+    def __init__(self, intervals: list[tuple[float, float]]):
+        """
+        Args:
+            intervals: (start, end) times during which the gameplay is dimmed
+        """
+        self._index = IntervalIndex(intervals)
+        self._buffer: Optional[np.ndarray] = None
+
+    def is_dimmed(self, t: float) -> bool:
+        """Return True if the gameplay is dimmed at time t."""
+        return self._index.any_active(t)
+
+    def __call__(self, get_frame, t):
+        frame = get_frame(t)
+        if not self._index.any_active(t):
+            return frame
+        if self._buffer is None or self._buffer.shape != frame.shape:
+            self._buffer = np.empty(frame.shape, dtype=np.uint8)
+        np.right_shift(frame, 1, out=self._buffer, casting='unsafe')
+        return self._buffer
+
+
+class OverlayClip(ImageClip):
+    """
+    ImageClip that also keeps its pixels premultiplied in uint8 for integer blending.
+
+    MoviePy blends a masked layer with float64 math and copies the whole frame for
+    every layer. IndexedCompositeVideoClip instead blends OverlayClips straight into
+    its frame buffer with uint16 math, over only the layer's bounding rectangle: the
+    pixels are trimmed to the rows and columns with visible alpha, so a full-frame
+    RGBA overlay only costs the area its content covers.
+    The regular float mask is kept, so the clip still works anywhere MoviePy expects
+    an ImageClip (other composites, mask compositing, MoviePy 2).
+    """
+
+    def __init__(self, img: np.ndarray, **kwargs):
+        super().__init__(img, **kwargs)
+        self.fade_duration = 0.0
+
+        if img.ndim == 3 and img.shape[2] == 4:
+            alpha = img[:, :, 3]
+            rows = np.flatnonzero(alpha.any(axis=1))
+            cols = np.flatnonzero(alpha.any(axis=0))
+            top, bottom = (int(rows[0]), int(rows[-1]) + 1) if rows.size else (0, 0)
+            left, right = (int(cols[0]), int(cols[-1]) + 1) if cols.size else (0, 0)
+            alpha = alpha[top:bottom, left:right]
+            premultiplied = img[top:bottom, left:right, :3].astype(np.uint16) * alpha[:, :, None]
+            self._premultiplied = _div255(premultiplied).astype(np.uint8)
+            # Fully opaque layers are plain copies; skip storing their alpha
+            self._alpha = None if (alpha == 255).all() else alpha.copy()
+            self._offset = (left, top)
+        else:
+            self._premultiplied = np.ascontiguousarray(img[:, :, :3], dtype=np.uint8)
+            self._alpha = None
+            self._offset = (0, 0)
+
+    def crossfade(self, fade_duration: float) -> "OverlayClip":
+        """
+        Fade the clip in and out, both on its mask and in the integer blend path.
+
+        Args:
+            fade_duration: Fade-in and fade-out length in seconds
+
+        Returns:
+            Faded copy of the clip
+        """
+        clip = _clip_crossfade(self, fade_duration)
+        clip.fade_duration = fade_duration
+        return clip
+
+    def _opacity(self, ct: float) -> int:
+        """Return the 0-255 crossfade opacity at clip time ct."""
+        if self.fade_duration <= 0:
+            return 255
+        fade = min(ct, self.duration - ct, self.fade_duration) / self.fade_duration
+        return int(round(255 * min(1.0, max(0.0, fade))))
+
+    def _frame_position(self, ct: float, frame_size: tuple) -> tuple[int, int]:
+        """Resolve the clip position against a (height, width) frame, as blit_on does."""
+        hf, wf = frame_size
+        wi, hi = self.size
+        pos = self.pos(ct)
+        if isinstance(pos, str):
+            pos = {'center': ['center', 'center'],
+                   'left': ['left', 'center'],
+                   'right': ['right', 'center'],
+                   'top': ['center', 'top'],
+                   'bottom': ['center', 'bottom']}[pos]
+        x, y = pos
+        if isinstance(x, str):
+            x = {'left': 0, 'center': (wf - wi) / 2, 'right': wf - wi}[x]
+        if isinstance(y, str):
+            y = {'top': 0, 'center': (hf - hi) / 2, 'bottom': hf - hi}[y]
+        return int(x), int(y)
+
+    def _pixels_position(self, ct: float, frame_size: tuple) -> tuple[int, int]:
+        """Frame position of the trimmed pixels' top-left corner at clip time ct."""
+        x, y = self._frame_position(ct, frame_size)
+        return x + self._offset[0], y + self._offset[1]
+
+    def frame_bounds(self, t: float, frame_size: tuple) -> Optional[tuple[int, int, int, int]]:
+        """
+        Return the frame rectangle the clip's visible pixels cover at time t.
+
+        Args:
+            t: Composite time in seconds
+            frame_size: Frame (height, width)
+
+        Returns:
+            (x1, y1, x2, y2) clipped to the frame, or None if nothing is on screen
+        """
+        h, w = self._premultiplied.shape[:2]
+        x, y = self._pixels_position(t - self.start, frame_size)
+        fh, fw = frame_size
+        x1, y1, x2, y2 = max(0, x), max(0, y), min(fw, x + w), min(fh, y + h)
+        if x1 >= x2 or y1 >= y2:
+            return None
+        return x1, y1, x2, y2
+
+    def blend_into(self, frame: np.ndarray, t: float, scratch: Optional[np.ndarray] = None):
+        """
+        Alpha-blend the clip into an RGB uint8 frame in place.
+
+        Args:
+            frame: Writable (height, width, 3) uint8 frame
+            t: Composite time in seconds
+            scratch: Optional flat uint16 array of at least height * width * 4
+                     elements, used for the blend's intermediates instead of new arrays
+        """
+        # Only the layer's own rectangle of the frame is touched
+        bounds = self.frame_bounds(t, frame.shape[:2])
+        if bounds is None:
+            return
+        x1, y1, x2, y2 = bounds
+        ct = t - self.start
+        x, y = self._pixels_position(ct, frame.shape[:2])
+        src = self._premultiplied[y1 - y:y2 - y, x1 - x:x2 - x]
+        region = frame[y1:y2, x1:x2]
+
+        opacity = self._opacity(ct)
+        if self._alpha is None and opacity == 255:
+            region[...] = src
+            return
+
+        if self._alpha is None:
+            alpha = np.full(src.shape[:2], 255, dtype=np.uint8)
+        else:
+            alpha = self._alpha[y1 - y:y2 - y, x1 - x:x2 - x]
+        if opacity < 255:
+            src = _div255(src.astype(np.uint16) * opacity).astype(np.uint8)
+            alpha = _div255(alpha.astype(np.uint16) * opacity).astype(np.uint8)
+
+        # out = src + dst * (255 - alpha) / 255, all in uint16
+        rh, rw = region.shape[:2]
+        if scratch is None:
+            blended = region.astype(np.uint16)
+            inverse = (255 - alpha)[:, :, None]
+        else:
+            # Contiguous views: strided ones make the uint16 math several times slower
+            pixels = rh * rw
+            blended = scratch[:3 * pixels].reshape(rh, rw, 3)
+            np.copyto(blended, region)
+            inverse = scratch[3 * pixels:4 * pixels].reshape(rh, rw, 1)
+            np.subtract(255, alpha[:, :, None], out=inverse, dtype=np.uint16)
+        blended *= inverse
+        _div255(blended)
+        blended += src
+        np.copyto(region, blended, casting='unsafe')
+
+    def blit_on(self, picture, t):
+        # Plain MoviePy composites: blend into a copy, like MoviePy's blit
+        if self.ismask or self.relative_pos:
+            return super().blit_on(picture, t)
+        frame = picture.astype(np.uint8)
+        self.blend_into(frame, t)
+        return frame
+
+
+class IndexedCompositeVideoClip(CompositeVideoClip):
+    """
+    CompositeVideoClip that finds the layers playing at time t through an interval index.
+
+    MoviePy's CompositeVideoClip scans every layer on every frame to decide what is
+    playing, which makes each frame O(words) for word-by-word captions. This subclass
+    indexes the layers' [start, end) intervals once, so each frame only costs a bisect
+    plus the layers that are actually active. Layer order is preserved.
+
+    With MoviePy 1.x, OverlayClip layers are blended into one frame buffer per frame
+    with integer math instead of each producing a new float-blended frame. Given a
+    frame_pool, that buffer (and the blend scratch space) is reused across frames;
+    each returned frame is then only valid until the next one is made, which suits
+    encoding frames one at a time but not callers that keep frames.
+    """
+
+    def __init__(self, clips, *args, frame_pool: Optional[FramePool] = None, **kwargs):
+        super().__init__(clips, *args, **kwargs)
+        self._timeline = IntervalIndex([(c.start, c.end) for c in self.clips])
+        self.frame_pool = frame_pool
+        self._pooled_frame: Optional[np.ndarray] = None
+        self._scratch: Optional[np.ndarray] = None
+        if not MOVIEPY_V2 and not self.ismask:
+            self.make_frame = self._make_frame
+
+    def _new_frame(self) -> np.ndarray:
+        w, h = self.size
+        if self.frame_pool is None:
+            return np.empty((h, w, 3), dtype=np.uint8)
+        # The previous frame has been consumed by now; hand its buffer back first
+        if self._pooled_frame is not None:
+            self.frame_pool.release(self._pooled_frame)
+        self._pooled_frame = self.frame_pool.acquire()
+        if self._scratch is None:
+            self._scratch = np.empty(h * w * 4, dtype=np.uint16)
+        return self._pooled_frame
+
+    def _covers_frame(self, clip, ct) -> bool:
+        # An unmasked, full-size layer at the origin replaces the frame outright
+        return (
+            clip.mask is None and not clip.relative_pos
+            and tuple(clip.size) == tuple(self.size)
+            and not isinstance(clip.pos(ct), str) and tuple(clip.pos(ct)) == (0, 0)
+        )
+
+    def _make_frame(self, t):
+        # Own the frame buffer so overlay layers can be blended into it in place
+        frame = self._new_frame()
+        playing = self.playing_clips(t)
+        if playing and self._covers_frame(playing[0], t - playing[0].start):
+            # Copy the gameplay straight in instead of the background plus a blit
+            np.copyto(frame, playing[0].get_frame(t - playing[0].start), casting='unsafe')
+            playing = playing[1:]
+        else:
+            np.copyto(frame, self.bg.get_frame(t), casting='unsafe')
+        for clip in playing:
+            if isinstance(clip, OverlayClip):
+                clip.blend_into(frame, t, self._scratch)
+            else:
+                frame = clip.blit_on(frame, t)
+        return frame
+
+    def playing_clips(self, t=0):
+        # Vectorised lookups (array of times) are rare; keep MoviePy's scan for them
+        if isinstance(t, np.ndarray):
+            return super().playing_clips(t)
+        return [self.clips[i] for i in self._timeline.active(t)]
+
+
 def _wrap_text(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> list[str]:
     """
     Wrap text to fit within max_width pixels.
 
+    Each candidate line is measured incrementally from memoized word measurements,
+    so wrapping is linear in the number of words.
+
     Args:
         text: Text to wrap
         font: PIL font object
@@ -81,21 +436,26 @@ def _wrap_text(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> list[
     Returns:
         List of text lines
     """
+    measurer = get_text_measurer(font)
     words = text.split()
     lines = []
     current_line = []
+    line_extent = None
 
     for word in words:
-        test_line = ' '.join(current_line + [word])
-        bbox = font.getbbox(test_line)
-        width = bbox[2] - bbox[0]
+        if current_line:
+            candidate = measurer.extend_line(line_extent, word)
+        else:
+            candidate = measurer.start_line(word)
 
-        if width <= max_width:
+        if candidate.width <= max_width:
             current_line.append(word)
+            line_extent = candidate
         else:
             if current_line:
                 lines.append(' '.join(current_line))
                 current_line = [word]
+                line_extent = measurer.start_line(word)
             else:
                 # Single word is too long, add it anyway
                 lines.append(word)
@@ -106,47 +466,86 @@ def _wrap_text(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> list[
     return lines
 
 
-def _create_text_overlay(
+def _caption_band(y_start: int, line_count: int, fontsize: int, height: int) -> tuple[int, int]:
+    """
+    Compute the vertical extent of the frame that a caption block can touch.
+
+    Glyphs are drawn from their ascender line and the black outline grows past the
+    line box, so the band is padded by one font size above and below the block.
+
+    Args:
+        y_start: Y position of the first text line
+        line_count: Number of text lines in the block
+        fontsize: Font size in pixels
+        height: Frame height in pixels
+
+    Returns:
+        (top, bottom) row range, clamped to the frame
+    """
+    line_height = fontsize + 10
+    top = max(0, y_start - fontsize)
+    bottom = min(height, y_start + line_count * line_height + fontsize)
+    return top, max(bottom, top + 1)
+
+
+def _crop_to_content(img: Image.Image, origin: tuple) -> tuple:
+    """
+    Crop an RGBA overlay to the bounding box of its non-transparent pixels.
+
+    Args:
+        img: RGBA overlay image
+        origin: Frame position (x, y) of the image's top-left corner
+
+    Returns:
+        (cropped image, frame position of the crop), or (None, origin) if the
+        image has no visible pixels
+    """
+    bbox = img.getbbox()
+    if bbox is None:
+        return None, origin
+    return img.crop(bbox), (origin[0] + bbox[0], origin[1] + bbox[1])
+
+
+def _image_to_array(img: Image.Image) -> np.ndarray:
+    """
+    Convert a Pillow image into the array layout MoviePy's ImageClip expects.
+
+    Images with transparency become RGBA arrays (ImageClip turns the alpha channel
+    into the clip mask); everything else becomes a plain RGB array.
+
+    Args:
+        img: Pillow image
+
+    Returns:
+        uint8 array of shape (height, width, 3 or 4)
+    """
+    if img.mode != 'RGBA' and (img.mode in ('LA', 'PA') or 'transparency' in img.info):
+        img = img.convert('RGBA')
+    elif img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGB')
+    return np.asarray(img)
+
+
+def _layout_static_caption(
     text: str,
     resolution: tuple,
     fontsize: int = 60,
     padding: int = 50
-) -> str:
+) -> list[tuple[str, int, int]]:
     """
-    Create a TikTok-style text overlay image using Pillow (static, for backward compatibility).
+    Wrap the static caption and center its lines in the frame.
 
     Args:
-        text: Text to render
+        text: Caption text
         resolution: Video resolution (width, height)
         fontsize: Font size in pixels
         padding: Horizontal padding in pixels
 
     Returns:
-        Path to temporary PNG file with text overlay
+        List of (line, x, y) draw positions
     """
     width, height = resolution
-
-    # Create transparent image
-    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-
-    # Load Montserrat Bold font with fallbacks
-    try:
-        font = ImageFont.truetype('/opt/andi/projects/brainrot-generator/assets/fonts/Montserrat-Bold.ttf', fontsize)
-    except OSError:
-        try:
-            # Try common bold font paths on macOS
-            font = ImageFont.truetype('/System/Library/Fonts/Supplemental/Arial Bold.ttf', fontsize)
-        except OSError:
-            try:
-                font = ImageFont.truetype('/Library/Fonts/Arial Bold.ttf', fontsize)
-            except OSError:
-                try:
-                    # Fall back to Helvetica Bold
-                    font = ImageFont.truetype('/System/Library/Fonts/Helvetica.ttc', fontsize)
-                except OSError:
-                    # Use default font as last resort
-                    font = ImageFont.load_default()
+    font = get_font(fontsize)
 
     # Wrap text to fit width
     max_text_width = width - (2 * padding)
@@ -157,16 +556,47 @@ def _create_text_overlay(
     total_text_height = len(lines) * line_height
 
     # Calculate starting Y position to center text vertically
-    y_start = (height - total_text_height) // 2
+    y_position = (height - total_text_height) // 2
 
-    # Draw each line of text with TikTok style (no background box, black outline)
-    y_position = y_start
+    layout = []
     for line in lines:
         # Get text bounding box to center it horizontally
         bbox = font.getbbox(line)
         text_width = bbox[2] - bbox[0]
-        x_position = (width - text_width) // 2
+        layout.append((line, (width - text_width) // 2, y_position))
+        y_position += line_height
+
+    return layout
+
+
+def _create_text_overlay(
+    text: str,
+    resolution: tuple,
+    fontsize: int = 60,
+    padding: int = 50
+) -> np.ndarray:
+    """
+    Create a TikTok-style text overlay image using Pillow (static, for backward compatibility).
+
+    Args:
+        text: Text to render
+        resolution: Video resolution (width, height)
+        fontsize: Font size in pixels
+        padding: Horizontal padding in pixels
 
+    Returns:
+        RGBA array (height, width, 4) with the text overlay
+    """
+    width, height = resolution
+
+    # Create transparent image
+    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+
+    font = get_font(fontsize)
+
+    # Draw each line of text with TikTok style (no background box, black outline)
+    for line, x_position, y_position in _layout_static_caption(text, resolution, fontsize, padding):
         # Draw white text with black outline (TikTok style)
         draw.text(
             (x_position, y_position),
@@ -176,60 +606,181 @@ def _create_text_overlay(
             stroke_width=5,
             stroke_fill='black'
         )
+
+    return _image_to_array(img)
+
+
+def _layout_caption_lines(
+    lines: list[str],
+    font: ImageFont.FreeTypeFont,
+    width: int,
+    y_start: int,
+    line_height: int
+) -> list[tuple[str, int, int]]:
+    """
+    Compute where each caption word is drawn, centering every line horizontally.
+
+    Called once per segment; the result is shared by the segment's base block and
+    all of its highlight patches.
+
+    Args:
+        lines: Wrapped caption lines
+        font: PIL font object
+        width: Frame width in pixels
+        y_start: Y position of the first line
+        line_height: Distance between line tops in pixels
+
+    Returns:
+        List of (word, x, y) draw positions in frame coordinates, in reading order
+    """
+    measurer = get_text_measurer(font)
+    space_width = measurer.space_width
+
+    layout = []
+    y_position = y_start
+    for line in lines:
+        line_words = line.split()
+
+        # Calculate total line width to center it
+        word_widths = [measurer.width(w) for w in line_words]
+        total_line_width = sum(word_widths) + space_width * max(len(line_words) - 1, 0)
+
+        x_position = (width - total_line_width) // 2
+        for word, word_width in zip(line_words, word_widths):
+            layout.append((word, x_position, y_position))
+            x_position += word_width + space_width
+
         y_position += line_height
 
-    # Save to temporary file
-    temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-    img.save(temp_file.name, 'PNG')
-    temp_file.close()
+    return layout
 
-    return temp_file.name
 
+def _render_caption_base(
+    layout: list[tuple[str, int, int]],
+    font: ImageFont.FreeTypeFont,
+    width: int,
+    band: tuple[int, int]
+) -> tuple:
+    """
+    Rasterize a caption block in white with the black TikTok outline.
 
-def _create_timed_captions(
+    Args:
+        layout: (word, x, y) positions from _layout_caption_lines
+        font: PIL font object
+        width: Frame width in pixels
+        band: (top, bottom) frame rows the block can touch, from _caption_band
+
+    Returns:
+        (RGBA array cropped to the visible text, frame position), or (None, (0, top))
+        if nothing is visible
+    """
+    band_top, band_bottom = band
+    img = Image.new('RGBA', (width, band_bottom - band_top), (0, 0, 0, 0))
+
+    # Assemble the block from cached word tiles instead of drawing it with Pillow
+    for word, x, y in layout:
+        tile, (left, top) = render_word_tile(
+            word, font, CAPTION_FILL, CAPTION_STROKE_WIDTH, CAPTION_STROKE
+        )
+        if tile.size:
+            img.alpha_composite(Image.fromarray(tile), (x + left, y + top - band_top))
+
+    img, position = _crop_to_content(img, (0, band_top))
+    if img is None:
+        return None, position
+    return _image_to_array(img), position
+
+
+def _render_word_patch(
+    word: str,
+    position: tuple[int, int],
+    font: ImageFont.FreeTypeFont,
+    fill: Optional[str] = None
+) -> tuple:
+    """
+    Rasterize the highlight patch for one caption word.
+
+    Only the fully opaque core of the outlined word is kept. The white base block
+    already has the identical anti-aliased outline edge underneath, so blending it a
+    second time would darken it; dropping it makes base + patch pixel-identical to
+    drawing the word in the highlight color in the first place.
+
+    Args:
+        word: Word to render
+        position: (x, y) draw position of the word in frame coordinates
+        font: PIL font object
+        fill: Highlight color (default: CAPTION_HIGHLIGHT)
+
+    Returns:
+        (RGBA array, frame position of its top-left corner), or (None, position)
+        for words with no visible pixels
+    """
+    tile, (left, top) = render_word_tile(
+        word, font, fill or CAPTION_HIGHLIGHT, CAPTION_STROKE_WIDTH, CAPTION_STROKE
+    )
+    if not tile.size:
+        return None, position
+
+    patch = tile.copy()
+    patch[:, :, 3] = np.where(patch[:, :, 3] == 255, 255, 0)
+    return patch, (position[0] + left, position[1] + top)
+
+
+def _render_segment_sprites(job: tuple) -> tuple:
+    """
+    Render one segment's white base block and the highlight patch of each word.
+
+    Runs in caption render workers, so it takes and returns only picklable values.
+
+    Args:
+        job: (layout, fontsize, width, band) as built by _create_timed_captions
+
+    Returns:
+        (base array or None, base position, [(patch array or None, position)] per
+        layout word)
+    """
+    layout, fontsize, width, band = job
+    font = get_font(fontsize)
+    base, position = _render_caption_base(layout, font, width, band)
+    if base is None:
+        return None, position, []
+    patches = [_render_word_patch(word, (x, y), font) for word, x, y in layout]
+    return base, position, patches
+
+
+def _plan_timed_captions(
     timed_segments: list,
     resolution: tuple,
-    fontsize: int = 52,
+    fontsize: int = CAPTION_FONT_SIZE,
     padding: int = 40,
     word_timings: Optional[list] = None
-) -> list:
+) -> list[dict]:
     """
-    Create TikTok-style synchronized caption clips with word-by-word yellow highlighting.
+    Lay out and time the word-by-word captions without rasterizing anything.
+
+    Shared by the sprite renderer and the ffmpeg filtergraph engine, so both put
+    the same words at the same place and time.
 
     Args:
         timed_segments: List of dicts with {text, start_ms, end_ms}
         resolution: Video resolution (width, height)
-        fontsize: Font size in pixels (default: 52 for TikTok style)
+        fontsize: Font size in pixels
         padding: Horizontal padding in pixels
         word_timings: Optional list of dicts with {word, start_ms, end_ms} from edge-tts
-                      WordBoundary events. When provided, uses real per-word timing for
-                      yellow highlight instead of proportional character estimates.
 
     Returns:
-        List of MoviePy ImageClip objects with timing set
+        One dict per captioned segment with its wrapped 'lines', 'y_start',
+        'layout' ((word, x, y) draw positions) and 'word_spans' ((word_idx, start,
+        duration) highlight spans, bridged to the next word's start)
     """
     width, height = resolution
-    caption_clips = []
     segment_render_data = []  # Collect per-segment data in first pass, render in second
 
     # Build a lookup from real word_timings if provided.
     # We consume them sequentially as we iterate through segments.
     real_word_idx = 0
 
-    # Load Montserrat Bold font with fallbacks
-    try:
-        font = ImageFont.truetype('/opt/andi/projects/brainrot-generator/assets/fonts/Montserrat-Bold.ttf', fontsize)
-    except OSError:
-        try:
-            font = ImageFont.truetype('/System/Library/Fonts/Supplemental/Arial Bold.ttf', fontsize)
-        except OSError:
-            try:
-                font = ImageFont.truetype('/Library/Fonts/Arial Bold.ttf', fontsize)
-            except OSError:
-                try:
-                    font = ImageFont.truetype('/System/Library/Fonts/Helvetica.ttc', fontsize)
-                except OSError:
-                    font = ImageFont.load_default()
+    font = get_font(fontsize)
 
     for segment in timed_segments:
         segment_text = segment["text"]
@@ -310,10 +861,6 @@ def _create_timed_captions(
             all_words_flat.append((seg_idx, w_idx, wt))
 
     for flat_idx, (seg_idx, word_idx, word_timing) in enumerate(all_words_flat):
-        seg_data = segment_render_data[seg_idx]
-        lines = seg_data['lines']
-        y_start = seg_data['y_start']
-
         # Compute clip duration: extend to next word's start to bridge silence gaps
         if flat_idx < len(all_words_flat) - 1:
             # Not the last word overall — extend to when the next word starts
@@ -326,85 +873,151 @@ def _create_timed_captions(
         # Ensure minimum duration to avoid zero-length clips
         word_clip_duration = max(word_clip_duration, 0.05)
 
-        # Create transparent image
-        img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
-
-        # Draw each line of text with word-by-word coloring
-        y_position = y_start
-        words_before = 0
-        for line_idx, line in enumerate(lines):
-            line_words = line.split()
-
-            # Calculate total line width to center it
-            total_line_width = 0
-            word_widths = []
-            for w in line_words:
-                bbox = font.getbbox(w)
-                w_width = bbox[2] - bbox[0]
-                word_widths.append(w_width)
-                total_line_width += w_width
-
-            # Add space widths
-            space_bbox = font.getbbox(' ')
-            space_width = space_bbox[2] - space_bbox[0]
-            if len(line_words) > 1:
-                total_line_width += space_width * (len(line_words) - 1)
-
-            # Start x position to center the line
-            x_position = (width - total_line_width) // 2
-
-            # Draw each word in the line
-            for w_idx, word in enumerate(line_words):
-                word_global_idx = words_before + w_idx
-
-                # Determine color: yellow for current word, white for others
-                if word_global_idx == word_idx:
-                    color = '#FFFF00'  # Yellow for current word
-                else:
-                    color = 'white'
+        segment_render_data[seg_idx].setdefault('word_spans', []).append(
+            (word_idx, word_timing['start'], word_clip_duration)
+        )
 
-                # Draw text with black outline (TikTok style)
-                draw.text(
-                    (x_position, y_position),
-                    word,
-                    fill=color,
-                    font=font,
-                    stroke_width=5,
-                    stroke_fill='black'
-                )
+    # Position every word once; the layout is shared by all renderers
+    line_height = fontsize + 10
+    for seg_data in segment_render_data:
+        seg_data['layout'] = _layout_caption_lines(
+            seg_data['lines'], font, width, seg_data['y_start'], line_height
+        )
+
+    return segment_render_data
+
+
+def _segment_end(seg_data: dict) -> float:
+    """Return when a planned caption segment's last word clip ends."""
+    _, last_start, last_duration = seg_data['word_spans'][-1]
+    return last_start + last_duration
 
-                # Move x position for next word
-                x_position += word_widths[w_idx] + space_width
 
-            words_before += len(line_words)
-            y_position += line_height
+def _overlaps(start: float, end: float, window: tuple[float, float]) -> bool:
+    """Return whether [start, end) intersects the (start, end) window."""
+    return start < window[1] and end > window[0]
+
+
+def _segment_render_job(seg_data: dict, resolution: tuple, fontsize: int) -> tuple:
+    """Return the _render_segment_sprites job of a planned caption segment."""
+    width, height = resolution
+    band = _caption_band(seg_data['y_start'], len(seg_data['lines']), fontsize, height)
+    return (seg_data['layout'], fontsize, width, band)
 
-        # Save to temporary file
-        temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-        img.save(temp_file.name, 'PNG')
-        temp_file.close()
+
+def _segment_clips(seg_data: dict, sprites: tuple) -> tuple:
+    """
+    Turn a caption segment's rendered sprites into timed, positioned clips.
+
+    Args:
+        seg_data: Planned segment from _plan_timed_captions
+        sprites: (base, position, patches) from _render_segment_sprites
+
+    Returns:
+        (base block OverlayClip or None if the segment drew nothing,
+        list of word highlight OverlayClips)
+    """
+    base, position, patches = sprites
+    if base is None:
+        return None, []
+    word_spans = seg_data['word_spans']
+
+    # The block stays up from its first word until the last word's clip ends
+    seg_start = word_spans[0][1]
+    seg_end = _segment_end(seg_data)
+    clip = OverlayClip(base)
+    clip = _clip_set_duration(_clip_set_start(clip, seg_start), seg_end - seg_start)
+    base_clip = _clip_set_position(clip, position)
+
+    patch_clips = []
+    for word_idx, word_start, word_clip_duration in word_spans:
+        # Words cut off by the 2-line limit have nothing to highlight
+        if word_idx >= len(patches):
+            continue
+        patch, patch_position = patches[word_idx]
+        if patch is None:
+            continue
 
         # Create ImageClip with extended timing for continuous caption visibility
-        clip = ImageClip(temp_file.name)
-        clip = _clip_set_duration(_clip_set_start(clip, word_timing['start']), word_clip_duration)
-        clip = _clip_set_position(clip, 'center')
+        clip = OverlayClip(patch)
+        clip = _clip_set_duration(_clip_set_start(clip, word_start), word_clip_duration)
+        patch_clips.append(_clip_set_position(clip, patch_position))
 
-        caption_clips.append({
-            'clip': clip,
-            'temp_file': temp_file.name
-        })
+    return base_clip, patch_clips
 
-    return caption_clips
 
+def _create_timed_captions(
+    timed_segments: list,
+    resolution: tuple,
+    fontsize: int = CAPTION_FONT_SIZE,
+    padding: int = 40,
+    word_timings: Optional[list] = None,
+    render_workers: Optional[int] = None,
+    window: Optional[tuple[float, float]] = None
+) -> list:
+    """
+    Create TikTok-style synchronized caption clips with word-by-word yellow highlighting.
 
-def _create_diagram_overlays(
+    Args:
+        timed_segments: List of dicts with {text, start_ms, end_ms}
+        resolution: Video resolution (width, height)
+        fontsize: Font size in pixels (default: CAPTION_FONT_SIZE)
+        padding: Horizontal padding in pixels
+        word_timings: Optional list of dicts with {word, start_ms, end_ms} from edge-tts
+                      WordBoundary events. When provided, uses real per-word timing for
+                      yellow highlight instead of proportional character estimates.
+        render_workers: Caption render worker processes (default:
+                        CAPTION_RENDER_WORKERS; 0 or 1 renders in this thread)
+        window: Optional (start, end) time range; only segments shown during it
+                are rasterized
+
+    Returns:
+        List of OverlayClip objects with timing and position set: one white
+        text block per segment, followed by one yellow highlight patch per word
+    """
+    width, height = resolution
+    segment_render_data = _plan_timed_captions(
+        timed_segments, resolution, fontsize, padding, word_timings
+    )
+    if window is not None:
+        segment_render_data = [
+            seg_data for seg_data in segment_render_data
+            if _overlaps(seg_data['word_spans'][0][1], _segment_end(seg_data), window)
+        ]
+
+    # Rasterize each segment's white text block once, and put a small
+    # yellow patch over the active word instead of redrawing every line per word.
+    # Segments are independent, so they can be rendered in worker processes.
+    render_jobs = [
+        _segment_render_job(seg_data, resolution, fontsize) for seg_data in segment_render_data
+    ]
+    rendered = map_caption_jobs(_render_segment_sprites, render_jobs, render_workers)
+
+    # Base blocks go below all highlight patches.
+    base_clips = []
+    patch_clips = []
+    for seg_data, sprites in zip(segment_render_data, rendered):
+        base_clip, segment_patch_clips = _segment_clips(seg_data, sprites)
+        if base_clip is not None:
+            base_clips.append(base_clip)
+            patch_clips += segment_patch_clips
+
+    tile_stats = get_word_tile_cache_stats()
+    logger.info(
+        "Caption word tile cache: %d hits, %d misses (%.0f%% hit rate), %d tiles",
+        tile_stats["hits"], tile_stats["misses"], 100 * tile_stats["hit_rate"], tile_stats["entries"]
+    )
+
+    return base_clips + patch_clips
+
+
+def _plan_diagram_overlays(
     diagram_timings: list[dict],
     resolution: tuple,
     video_duration: float
-) -> list:
+) -> list[dict]:
     """
-    Create diagram overlay clips with fade in/out and positioning.
+    Compute when, where and how big each diagram is shown.
 
     Args:
         diagram_timings: List of {png_path, start_s, duration_s, label} dicts
@@ -412,25 +1025,25 @@ def _create_diagram_overlays(
         video_duration: Total video duration to ensure clips don't exceed
 
     Returns:
-        List of dicts with {clip, temp_file} for diagram overlays
+        List of {png_path, start_s, duration_s, size, position, fade_s} dicts, where
+        position is the top-left corner in frame pixels and fade_s is 0 for no fade
     """
     width, height = resolution
-    diagram_clips = []
+    plans = []
 
     for diagram in diagram_timings:
-        png_path = diagram["png_path"]
         start_s = diagram["start_s"]
         duration_s = min(diagram["duration_s"], video_duration - start_s)
 
         if duration_s <= 0:
             continue
 
-        # Load diagram image
-        diagram_img = Image.open(png_path)
+        with Image.open(diagram["png_path"]) as diagram_img:
+            source_width, source_height = diagram_img.size
 
         # Resize to 70% of screen width while maintaining aspect ratio
         target_width = int(width * 0.7)
-        aspect_ratio = diagram_img.height / diagram_img.width
+        aspect_ratio = source_height / source_width
         target_height = int(target_width * aspect_ratio)
 
         # Ensure diagram fits in upper 60% of screen
@@ -439,43 +1052,839 @@ def _create_diagram_overlays(
             target_height = max_height
             target_width = int(target_height / aspect_ratio)
 
-        diagram_img = diagram_img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+        # Add fade in/out (0.5s each, if duration allows)
+        fade_duration = min(0.5, duration_s / 3)
 
-        # Create temporary file for resized diagram
-        temp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-        diagram_img.save(temp_file.name, 'PNG')
-        temp_file.close()
+        plans.append({
+            "png_path": diagram["png_path"],
+            "start_s": start_s,
+            "duration_s": duration_s,
+            "size": (target_width, target_height),
+            # Centered horizontally (as MoviePy places 'center'), 15% from the top
+            "position": (int((width - target_width) / 2), int(height * 0.15)),
+            "fade_s": fade_duration if duration_s > fade_duration * 2 else 0.0,
+        })
 
-        # Create ImageClip
-        clip = ImageClip(temp_file.name)
-        clip = _clip_set_duration(_clip_set_start(clip, start_s), duration_s)
+    return plans
 
-        # Position: centered horizontally, in upper 60% (at 30% from top)
-        clip = _clip_set_position(clip, ('center', int(height * 0.15)))
 
-        # Add fade in/out (0.5s each, if duration allows)
-        fade_duration = min(0.5, duration_s / 3)
-        if duration_s > fade_duration * 2:
-            clip = _clip_crossfade(clip, fade_duration)
+def _create_diagram_overlays(
+    diagram_timings: list[dict],
+    resolution: tuple,
+    video_duration: float,
+    window: Optional[tuple[float, float]] = None
+) -> list:
+    """
+    Create diagram overlay clips with fade in/out and positioning.
 
-        diagram_clips.append({
-            'clip': clip,
-            'temp_file': temp_file.name
-        })
+    A diagram shown in several windows is decoded and resized once; its clips are
+    MoviePy copies sharing the same pixel arrays.
+
+    Args:
+        diagram_timings: List of {png_path, start_s, duration_s, label} dicts
+        resolution: Video resolution (width, height)
+        video_duration: Total video duration to ensure clips don't exceed
+        window: Optional (start, end) time range; only diagrams shown during it
+                are loaded
+
+    Returns:
+        List of OverlayClip objects for diagram overlays
+    """
+    diagram_clips = []
+    sources = {}
+
+    for plan in _plan_diagram_overlays(diagram_timings, resolution, video_duration):
+        if window is not None and not _overlaps(
+            plan["start_s"], plan["start_s"] + plan["duration_s"], window
+        ):
+            continue
+        key = (plan["png_path"], plan["size"])
+        if key not in sources:
+            sources[key] = _load_diagram(plan)
+        diagram_clips.append(_time_diagram(sources[key], plan))
 
     return diagram_clips
 
 
+def _load_diagram(plan: dict) -> OverlayClip:
+    """Load and resize a planned diagram, then create the clip straight from its pixels."""
+    with Image.open(plan["png_path"]) as diagram_img:
+        diagram_img = diagram_img.resize(plan["size"], Image.Resampling.LANCZOS)
+    return OverlayClip(_image_to_array(diagram_img))
+
+
+def _time_diagram(clip: OverlayClip, plan: dict) -> OverlayClip:
+    """Return a copy of a diagram clip placed and faded at its planned window."""
+    clip = _clip_set_duration(_clip_set_start(clip, plan["start_s"]), plan["duration_s"])
+    clip = _clip_set_position(clip, plan["position"])
+    if plan["fade_s"]:
+        clip = clip.crossfade(plan["fade_s"])
+    return clip
+
+
+def _render_with_ffmpeg(
+    gameplay_clip_path: str,
+    audio_path: Optional[str],
+    output_path: str,
+    resolution: tuple,
+    duration: float,
+    overlays: "list | StreamingOverlays",
+    dim_intervals: list[tuple[float, float]],
+    fps: int = OUTPUT_FPS,
+    queue_depth: int = RENDER_QUEUE_DEPTH,
+    frame_pool: Optional[FramePool] = None,
+    total_duration: Optional[float] = None,
+    frame_range: Optional[tuple[int, int]] = None,
+    gameplay_start: float = 0.0,
+    share_decoder: bool = True
+) -> dict:
+    """
+    Render the video by piping numpy-composited frames from one ffmpeg to another.
+
+    The decoder loops, resamples and scales the gameplay (concurrent renders of the
+    same clip may share one decoder); each frame is dimmed while
+    a diagram is up, the active overlays are blended into it in place, and it is
+    written to the encoder's stdin. No MoviePy clip is evaluated per frame.
+
+    Decoding, compositing and encoding run on three threads linked by bounded
+    queues, so reading from the decoder pipe and writing to the encoder pipe
+    overlap with the numpy work (both pipes and numpy release the GIL). Frames
+    travel in buffers from a FramePool that the encode stage hands back, so the
+    loop stops allocating once the queues have filled.
+
+    Args:
+        gameplay_clip_path: Path to background gameplay video
+        audio_path: Path to the narration audio, muxed into the output (None: video only)
+        output_path: Path to save output video
+        resolution: Output resolution (width, height)
+        duration: Gameplay duration in seconds (the video runs on if an overlay ends later)
+        overlays: OverlayClips, bottom to top, or StreamingOverlays building them
+                  as the render reaches them
+        dim_intervals: (start, end) times during which the gameplay is dimmed to 50%
+        fps: Output frame rate
+        queue_depth: Frames each stage may run ahead of the next
+        frame_pool: Pool of (height, width, 3) uint8 frame buffers (default: a new one)
+        total_duration: Length of the whole video (default: until the last
+                        overlay or the gameplay ends)
+        frame_range: Optional [first, end) frame numbers to render, for one chunk
+                     of a segment-parallel render (default: every frame)
+        gameplay_start: Seconds into the gameplay clip the video starts at
+        share_decoder: Join or start a gameplay decoder shared with concurrent
+                       renders (False: decode privately)
+
+    Returns:
+        {"stages": StageStats of decode, composite and encode,
+         "frame_buffers": frame pool counters}
+    """
+    if isinstance(overlays, StreamingOverlays):
+        layers_at = overlays.active
+        overlays_end = overlays.end
+    else:
+        overlay_index = IntervalIndex([(c.start, c.end) for c in overlays])
+
+        def layers_at(t: float) -> list:
+            return [overlays[layer] for layer in overlay_index.active(t)]
+        overlays_end = max([c.end for c in overlays], default=0.0)
+    dimmer = GameplayDimmer(dim_intervals)
+
+    # Like the MoviePy composite, run until the last layer ends, over black once the
+    # gameplay has been trimmed, and on the same frame times as the MoviePy engine
+    if total_duration is None:
+        total_duration = max(duration, overlays_end)
+    frame_count = len(np.arange(0, total_duration, 1.0 / fps))
+    first_frame, end_frame = frame_range or (0, frame_count)
+    start = first_frame / fps
+    width, height = resolution
+    if frame_pool is None:
+        frame_pool = FramePool((height, width, 3))
+    scratch = np.empty(height * width * 4, dtype=np.uint16)
+
+    # A chunk past the end of the gameplay has no frames to decode
+    reader = contextlib.nullcontext()
+    if start < duration:
+        # Renders of the same clip share one decoder when their offsets are close
+        reader = open_gameplay_reader(
+            gameplay_clip_path, resolution, fps, duration - start, start=gameplay_start + start,
+            shared=share_decoder
+        )
+
+    with reader, FFmpegFrameWriter(
+        output_path, resolution, fps, audio_path=audio_path, audio_duration=total_duration
+    ) as writer:
+        def decode():
+            for i in range(first_frame, end_frame):
+                t = i / fps
+                # The reader reuses its buffer, so each queued frame gets a pool buffer
+                frame = frame_pool.acquire()
+                if t < duration:
+                    reader.read_frame(out=frame)
+                else:
+                    frame.fill(0)
+                yield t, frame
+
+        def composite(item):
+            t, frame = item
+            if dimmer.is_dimmed(t):
+                # Same as (frame * 0.5).astype('uint8'), in place
+                np.right_shift(frame, 1, out=frame)
+            for layer in layers_at(t):
+                layer.blend_into(frame, t, scratch)
+            return frame
+
+        def encode(frame):
+            writer.write_frame(frame)
+            frame_pool.release(frame)
+
+        stats = run_pipeline(
+            ("decode", decode()),
+            [("composite", composite), ("encode", encode)],
+            depth=queue_depth,
+        )
+
+    buffer_stats = frame_pool.stats()
+    logger.info(
+        "ffmpeg engine wrote %d frames to %s (limited by %s; %s; %d frame buffers allocated)",
+        end_frame - first_frame, output_path, bottleneck(stats), "; ".join(map(repr, stats)),
+        buffer_stats["allocated"]
+    )
+    return {"stages": stats, "frame_buffers": buffer_stats}
+
+
+def _caption_words(segment_plans: list[dict]) -> list[CaptionWord]:
+    """
+    Turn planned caption segments into positioned words for the ASS script.
+
+    Each word shows for as long as its segment's white block would, and is
+    highlighted during the same span as its yellow patch.
+
+    Args:
+        segment_plans: Output of _plan_timed_captions
+
+    Returns:
+        Caption words in reading order
+    """
+    words = []
+    for seg_data in segment_plans:
+        word_spans = seg_data['word_spans']
+        seg_start = word_spans[0][1]
+        seg_end = _segment_end(seg_data)
+        highlights = {
+            word_idx: (word_start, word_start + word_clip_duration)
+            for word_idx, word_start, word_clip_duration in word_spans
+        }
+        for word_idx, (word, x, y) in enumerate(seg_data['layout']):
+            words.append(CaptionWord(word, x, y, seg_start, seg_end, highlights.get(word_idx)))
+    return words
+
+
+def _render_with_filtergraph(
+    gameplay_clip_path: str,
+    audio_path: str,
+    output_path: str,
+    resolution: tuple,
+    duration: float,
+    total_duration: float,
+    caption_script: Optional[str],
+    diagram_plans: list[dict],
+    dim_intervals: list[tuple[float, float]],
+    fps: int = OUTPUT_FPS,
+    gameplay_start: float = 0.0
+):
+    """
+    Render the whole video with one ffmpeg invocation and no per-frame Python.
+
+    The gameplay is looped, resampled, scaled and dimmed with colorchannelmixer,
+    diagrams are scaled once and overlaid (with alpha fades) only while they are
+    up, and captions are drawn by libass from the ASS script, using the caption
+    font's directory.
+
+    Args:
+        gameplay_clip_path: Path to background gameplay video
+        audio_path: Path to the narration audio, muxed into the output
+        output_path: Path to save output video
+        resolution: Output resolution (width, height)
+        duration: Gameplay duration in seconds
+        total_duration: Video duration (black after the gameplay if longer)
+        caption_script: ASS script from build_caption_script, or None for no captions
+        diagram_plans: Output of _plan_diagram_overlays
+        dim_intervals: (start, end) times during which the gameplay is dimmed to 50%
+        fps: Output frame rate
+        gameplay_start: Seconds into the gameplay clip the video starts at
+    """
+    width, height = resolution
+
+    def window(start, end):
+        # Half-open [start, end), like the clip timing of the other engines
+        return f"gte(t,{start:.6f})*lt(t,{end:.6f})"
+
+    inputs, source, input_count = looped_input(gameplay_clip_path, gameplay_start, duration)
+    chain = f"{source}fps={fps},scale={width}:{height}:flags=lanczos,setsar=1,format=rgb24"
+    if input_count > 1:
+        # The seeked pass and the looped copy are each limited, not their concatenation
+        chain += f",trim=duration={duration:.6f}"
+    if total_duration > duration:
+        chain += f",tpad=stop_mode=add:stop_duration={total_duration - duration:.6f}:color=black"
+    if dim_intervals:
+        enable = "+".join(window(start, end) for start, end in dim_intervals)
+        chain += f",colorchannelmixer=rr=0.5:gg=0.5:bb=0.5:enable='{enable}'"
+    filters = [chain + "[base0]"]
+
+    base = "base0"
+    for i, plan in enumerate(diagram_plans, start=1):
+        inputs += ["-i", plan["png_path"]]
+        start, end = plan["start_s"], plan["start_s"] + plan["duration_s"]
+        target_width, target_height = plan["size"]
+        # Scale the still once, then repeat it only for the frames it is up
+        frames = int(np.ceil(plan["duration_s"] * fps)) + 1
+        chain = (
+            f"[{input_count + i - 1}:v]scale={target_width}:{target_height}:flags=lanczos,format=rgba,"
+            f"loop=loop={frames - 1}:size=1,settb=AVTB,setpts=N/{fps}/TB+{start:.6f}/TB"
+        )
+        if plan["fade_s"]:
+            fade = plan["fade_s"]
+            chain += (
+                f",fade=t=in:st={start:.6f}:d={fade:.6f}:alpha=1"
+                f",fade=t=out:st={end - fade:.6f}:d={fade:.6f}:alpha=1"
+            )
+        x, y = plan["position"]
+        filters.append(f"{chain}[diagram{i}]")
+        filters.append(
+            f"[{base}][diagram{i}]overlay=x={x}:y={y}:enable='{window(start, end)}'[base{i}]"
+        )
+        base = f"base{i}"
+
+    script_path = None
+    if caption_script is None:
+        filters.append(f"[{base}]null[video]")
+    else:
+        with tempfile.NamedTemporaryFile('w', suffix='.ass', encoding='utf-8', delete=False) as f:
+            f.write(caption_script)
+            script_path = f.name
+        filters.append(
+            f"[{base}]ass=filename={escape_filter_value(script_path)}"
+            f":fontsdir={escape_filter_value(str(Path(font_registry.path).parent))}[video]"
+        )
+
+    audio_input = input_count + len(diagram_plans)
+    try:
+        run_ffmpeg(
+            inputs
+            + ["-t", f"{total_duration:.6f}", "-i", audio_path]
+            + ["-filter_complex", ";".join(filters)]
+            + ["-map", "[video]", "-map", f"{audio_input}:a:0"]
+            + ["-vcodec", "libx264", "-preset", "ultrafast", "-threads", "2", "-pix_fmt", "yuv420p"]
+            + ["-acodec", "aac", "-ar", "44100", "-ac", "2"]
+            + [output_path]
+        )
+    finally:
+        if script_path:
+            os.unlink(script_path)
+
+    logger.info("filtergraph engine wrote %s", output_path)
+
+
+def _create_overlay_clips(
+    text: str,
+    resolution: tuple,
+    video_duration: float,
+    timed_segments: Optional[list] = None,
+    word_timings: Optional[list] = None,
+    diagram_timings: Optional[list] = None,
+    burn_captions: bool = True,
+    window: Optional[tuple[float, float]] = None,
+    render_workers: Optional[int] = None
+) -> list:
+    """
+    Create the overlay layers of a video: diagrams, then captions on top.
+
+    Args:
+        text: Caption text to overlay (used if timed_segments is None)
+        resolution: Video resolution (width, height)
+        video_duration: Narration duration in seconds
+        timed_segments: Optional list of dicts with {text, start_ms, end_ms}
+        word_timings: Optional list of dicts with {word, start_ms, end_ms}
+        diagram_timings: Optional list of {png_path, start_s, duration_s, label} dicts
+        burn_captions: Draw the captions (False when they go in a subtitle track)
+        window: Optional (start, end) time range; layers not shown during it
+                may be left out
+        render_workers: Caption render worker processes (default:
+                        CAPTION_RENDER_WORKERS)
+
+    Returns:
+        OverlayClips, bottom to top
+    """
+    # Create captions - either timed or static (none when they go in a subtitle track)
+    if not burn_captions:
+        caption_clips = []
+    elif timed_segments and len(timed_segments) > 0:
+        # Use synchronized line-by-line captions
+        caption_clips = _create_timed_captions(
+            timed_segments, resolution, word_timings=word_timings,
+            render_workers=render_workers, window=window
+        )
+    else:
+        # Fall back to static overlay (backward compatibility)
+        caption = OverlayClip(_create_text_overlay(text, resolution))
+        caption = _clip_set_duration(caption, video_duration)
+        caption = _clip_set_position(caption, 'center')
+        caption_clips = [caption]
+
+    # Create diagram overlays if provided
+    diagram_clips = []
+    if diagram_timings and len(diagram_timings) > 0:
+        diagram_clips = _create_diagram_overlays(
+            diagram_timings, resolution, video_duration, window=window
+        )
+
+    return diagram_clips + caption_clips
+
+
+class StreamingOverlays:
+    """
+    Caption and diagram layers rasterized from the timeline as playback reaches them.
+
+    Only the caption and diagram plans are kept for the whole video. A caption
+    segment's sprites, or a diagram's pixels, are built when the first frame
+    showing them is composited and dropped once playback has moved past them, so
+    memory holds the layers of the current moment however long the narration is.
+    Frames should be requested in time order (going back rebuilds layers). Active
+    layers come in the order _create_overlay_clips stacks them: diagrams, then
+    caption blocks, then word highlights.
+    """
+
+    # Stacking order of the layer kinds, bottom to top
+    _DIAGRAM, _CAPTION_BLOCK, _WORD_PATCH = range(3)
+
+    def __init__(
+        self,
+        text: str,
+        resolution: tuple,
+        video_duration: float,
+        timed_segments: Optional[list] = None,
+        word_timings: Optional[list] = None,
+        diagram_timings: Optional[list] = None,
+        burn_captions: bool = True,
+        window: Optional[tuple[float, float]] = None
+    ):
+        """
+        Plan the layers without rasterizing any.
+
+        Args: as _create_overlay_clips (window: layers not shown during it are skipped)
+        """
+        builders: list[Callable[[], list]] = []
+        spans: list[tuple[float, float]] = []
+
+        def add(start: float, end: float, build: Callable[[], list]):
+            if window is None or _overlaps(start, end, window):
+                spans.append((start, end))
+                builders.append(build)
+
+        for plan in _plan_diagram_overlays(diagram_timings or [], resolution, video_duration):
+            add(plan["start_s"], plan["start_s"] + plan["duration_s"],
+                functools.partial(self._build_diagram, plan))
+        if burn_captions and timed_segments:
+            for seg_data in _plan_timed_captions(timed_segments, resolution, word_timings=word_timings):
+                add(seg_data['word_spans'][0][1], _segment_end(seg_data),
+                    functools.partial(self._build_segment, seg_data, resolution))
+        elif burn_captions:
+            add(0.0, video_duration,
+                functools.partial(self._build_static_caption, text, resolution, video_duration))
+
+        self._builders = builders
+        self._index = IntervalIndex(spans)
+        self._built: dict[int, list[tuple[int, OverlayClip]]] = {}
+        self.end = max([end for _, end in spans], default=0.0)
+        self.groups_built = 0
+        self.peak_groups = 0
+
+    @classmethod
+    def _build_diagram(cls, plan: dict) -> list:
+        return [(cls._DIAGRAM, _time_diagram(_load_diagram(plan), plan))]
+
+    @classmethod
+    def _build_segment(cls, seg_data: dict, resolution: tuple) -> list:
+        sprites = _render_segment_sprites(_segment_render_job(seg_data, resolution, CAPTION_FONT_SIZE))
+        base_clip, patch_clips = _segment_clips(seg_data, sprites)
+        if base_clip is None:
+            return []
+        return [(cls._CAPTION_BLOCK, base_clip)] + [(cls._WORD_PATCH, clip) for clip in patch_clips]
+
+    @classmethod
+    def _build_static_caption(cls, text: str, resolution: tuple, video_duration: float) -> list:
+        caption = OverlayClip(_create_text_overlay(text, resolution))
+        caption = _clip_set_duration(caption, video_duration)
+        return [(cls._CAPTION_BLOCK, _clip_set_position(caption, 'center'))]
+
+    def active(self, t: float) -> list:
+        """
+        Return the layers shown at time t, bottom to top.
+
+        Args:
+            t: Time in seconds
+
+        Returns:
+            OverlayClips active at t
+        """
+        groups = self._index.active(t)
+        for group in [group for group in self._built if group not in groups]:
+            del self._built[group]
+        layers = []
+        for group in groups:
+            if group not in self._built:
+                self._built[group] = self._builders[group]()
+                self.groups_built += 1
+            layers += [
+                (kind, clip) for kind, clip in self._built[group] if clip.start <= t < clip.end
+            ]
+        self.peak_groups = max(self.peak_groups, len(self._built))
+        # Stable: within a kind, layers keep timeline order
+        layers.sort(key=lambda layer: layer[0])
+        return [clip for _, clip in layers]
+
+
+def _composite_duration(
+    resolution: tuple,
+    video_duration: float,
+    timed_segments: Optional[list] = None,
+    word_timings: Optional[list] = None,
+    diagram_timings: Optional[list] = None,
+    burn_captions: bool = True
+) -> float:
+    """
+    Return how long the composite runs: until the gameplay or the last overlay ends.
+
+    Computed from the caption and diagram plans, without rasterizing anything, the
+    same way the clips from _create_overlay_clips would end.
+    """
+    ends = [video_duration]
+    if burn_captions and timed_segments:
+        for seg_data in _plan_timed_captions(timed_segments, resolution, word_timings=word_timings):
+            ends.append(_segment_end(seg_data))
+            ends += [start + duration for _, start, duration in seg_data['word_spans']]
+    ends += [
+        plan["start_s"] + plan["duration_s"]
+        for plan in _plan_diagram_overlays(diagram_timings or [], resolution, video_duration)
+    ]
+    return max(ends)
+
+
+def _render_chunk_count(chunks: Optional[int], total_duration: float) -> int:
+    """
+    Resolve how many chunks a segment-parallel render uses.
+
+    Args:
+        chunks: Requested count (None: RENDER_CHUNKS env var; 0 or "auto": one per
+                CPU core)
+        total_duration: Video length in seconds; chunks are kept at least
+                        MIN_CHUNK_SECONDS long
+
+    Returns:
+        Chunk count, at least 1
+    """
+    if chunks is None:
+        chunks = 0 if DEFAULT_RENDER_CHUNKS == "auto" else int(DEFAULT_RENDER_CHUNKS)
+    if chunks <= 0:
+        chunks = os.cpu_count() or 1
+    return max(1, min(chunks, int(total_duration / MIN_CHUNK_SECONDS)))
+
+
+def _render_checkpointed(
+    checkpoint: ChunkCheckpoint,
+    frame_ranges: list[tuple[int, int]],
+    render: Callable[[Any], Any],
+    jobs: list,
+    executor: Optional[ProcessPoolExecutor] = None
+):
+    """
+    Render the chunks a checkpoint does not have yet, retrying I/O failures.
+
+    Each job must write its chunk to checkpoint.partial_path(index); the chunk is
+    committed as soon as its job returns, in whatever order the jobs finish. Chunks
+    that fail with an OSError are retried up to CHUNK_RETRIES times (with the same
+    settings). Any other failure, or a chunk still failing after its retries, stops
+    the render: chunks not started yet are dropped, the ones already running are
+    committed if they finish, and the committed chunks stay for the next attempt.
+
+    Args:
+        checkpoint: Checkpoint directory of the render
+        frame_ranges: [first, end) frames of each chunk
+        render: Function rendering one job (module-level when an executor is used)
+        jobs: One job per chunk
+        executor: Optional process pool to render chunks in parallel (default:
+                  one after another in this thread)
+
+    Raises:
+        ChunkRenderError: Carrying the index of the chunk that failed
+    """
+    pending = [i for i in range(len(jobs)) if not checkpoint.is_done(i)]
+    if len(pending) < len(jobs):
+        logger.info("Resuming render: %d of %d chunks already done", len(jobs) - len(pending), len(jobs))
+
+    for attempt in range(CHUNK_RETRIES + 1):
+        futures = {}
+        if executor is None:
+            outcomes = _run_serially(render, jobs, pending)
+        else:
+            futures = {executor.submit(render, jobs[i]): i for i in pending}
+            outcomes = (
+                (futures[future], future.exception())
+                for future in as_completed(futures) if not future.cancelled()
+            )
+
+        failed = []
+        fatal = None
+        for i, error in outcomes:
+            if error is None:
+                checkpoint.commit(i)
+            elif fatal is not None:
+                continue
+            elif isinstance(error, OSError) and attempt < CHUNK_RETRIES:
+                logger.warning("Render chunk %d of %d failed, retrying: %s", i, len(jobs), error)
+                failed.append(i)
+            else:
+                fatal = (i, error)
+                if executor is None:
+                    break
+                for future in futures:
+                    future.cancel()
+        if fatal is not None:
+            i, error = fatal
+            raise ChunkRenderError(i, len(jobs), frame_ranges[i], error) from error
+
+        pending = failed
+        if not pending:
+            break
+
+
+def _run_serially(render: Callable[[Any], Any], jobs: list, indices: list[int]):
+    """Render jobs one after another, yielding (index, exception or None) for each."""
+    for i in indices:
+        try:
+            render(jobs[i])
+        except Exception as e:
+            yield i, e
+        else:
+            yield i, None
+
+
+def _render_chunk(job: dict) -> dict:
+    """
+    Render one chunk of a segment-parallel ffmpeg render; runs in a worker process.
+
+    Args:
+        job: "overlay_args" for _create_overlay_clips (or StreamingOverlays if
+             "long_form"), "render_args" for _render_with_ffmpeg and the chunk's
+             [first, end) "frame_range"
+
+    Returns:
+        _render_with_ffmpeg's stats for the chunk
+    """
+    first_frame, end_frame = job["frame_range"]
+    fps = job["render_args"]["fps"]
+    window = (first_frame / fps, end_frame / fps)
+    if job["long_form"]:
+        overlays = StreamingOverlays(**job["overlay_args"], window=window)
+    else:
+        overlays = _create_overlay_clips(**job["overlay_args"], window=window, render_workers=0)
+    return _render_with_ffmpeg(
+        overlays=overlays, frame_range=job["frame_range"], **job["render_args"]
+    )
+
+
+def _render_chunked(
+    gameplay_clip_path: str,
+    audio_path: str,
+    output_path: str,
+    resolution: tuple,
+    duration: float,
+    total_duration: float,
+    overlay_args: dict,
+    dim_intervals: list[tuple[float, float]],
+    chunks: int,
+    fps: int = OUTPUT_FPS,
+    long_form: bool = False,
+    gameplay_start: float = 0.0
+):
+    """
+    Render with the ffmpeg engine as parallel timeline chunks joined without re-encoding.
+
+    The frames are split into contiguous chunks, each rendered by a spawned worker
+    process into its own video-only file with the same encoder settings, so each
+    chunk starts on a keyframe and the concat demuxer can stream-copy them into
+    one file. The narration is encoded once over the joined video. Workers decode
+    the gameplay privately from their chunk's start and rasterize only the overlays their
+    chunk shows, so the chunks share no state. Finished chunks are checkpointed,
+    so a failed render of the same job resumes after them.
+
+    Args:
+        gameplay_clip_path: Path to background gameplay video
+        audio_path: Path to the narration audio, muxed into the output
+        output_path: Path to save output video
+        resolution: Output resolution (width, height)
+        duration: Gameplay duration in seconds
+        total_duration: Length of the whole video
+        overlay_args: _create_overlay_clips arguments, rebuilt in each worker
+        dim_intervals: (start, end) times during which the gameplay is dimmed to 50%
+        chunks: Number of chunks
+        fps: Output frame rate
+        long_form: Workers stream their layers (StreamingOverlays) instead of
+                   building them up front
+        gameplay_start: Seconds into the gameplay clip the video starts at
+
+    Raises:
+        ChunkRenderError: If a chunk fails; the finished chunks are kept
+    """
+    frame_count = len(np.arange(0, total_duration, 1.0 / fps))
+    frame_ranges = split_frames(frame_count, chunks)
+    render_args = {
+        "gameplay_clip_path": gameplay_clip_path,
+        "audio_path": None,
+        "resolution": resolution,
+        "duration": duration,
+        "dim_intervals": dim_intervals,
+        "fps": fps,
+        "total_duration": total_duration,
+        "gameplay_start": gameplay_start,
+        # Chunks of one render must not join each other's decoder: a joined chunk
+        # waits for the frames its neighbour reads first, serializing the workers
+        "share_decoder": False,
+    }
+    checkpoint = ChunkCheckpoint(output_path, {
+        "engine": "ffmpeg", "render_args": render_args, "overlay_args": overlay_args,
+        "frame_ranges": frame_ranges, "audio_path": audio_path,
+    })
+    jobs = [{
+        "overlay_args": overlay_args,
+        "render_args": {**render_args, "output_path": checkpoint.partial_path(i)},
+        "frame_range": frame_range,
+        "long_form": long_form,
+    } for i, frame_range in enumerate(frame_ranges)]
+
+    workers = min(chunks, os.cpu_count() or 1)
+    # Spawned, like the caption render pool: forking would copy held locks
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        _render_checkpointed(checkpoint, frame_ranges, _render_chunk, jobs, executor=pool)
+    concat_videos(
+        [checkpoint.chunk_path(i) for i in range(chunks)], output_path, audio_path,
+        audio_duration=total_duration
+    )
+    checkpoint.remove()
+
+    logger.info(
+        "ffmpeg engine wrote %d frames to %s in %d chunks on %d workers",
+        frame_count, output_path, chunks, workers
+    )
+
+
+def _write_clip_frames(clip, times: np.ndarray, output_path: str, resolution: tuple, fps: int):
+    """Encode a clip's frames at the given times into a video-only file."""
+    with FFmpegFrameWriter(output_path, resolution, fps) as writer:
+        for t in times:
+            writer.write_frame(clip.get_frame(t))
+
+
+def _dim_intervals(diagram_timings: list[dict]) -> list[tuple[float, float]]:
+    """Return the (start, end) windows during which diagrams dim the gameplay."""
+    return [(d["start_s"], d["start_s"] + d["duration_s"]) for d in diagram_timings]
+
+
+def _subtitle_cues(
+    text: str,
+    timed_segments: Optional[list],
+    word_timings: Optional[list],
+    resolution: tuple,
+    duration: float
+) -> list[SubtitleCue]:
+    """
+    Time soft-subtitle cues the way the burned-in captions would show.
+
+    Each timed segment becomes one cue spanning its words' highlight spans (so a
+    cue lasts until the next segment starts), carrying every word's start time
+    for WebVTT word timestamps. Untimed text is one cue for the whole video.
+
+    Args:
+        text: Caption text (used if timed_segments is None)
+        timed_segments: Optional list of dicts with {text, start_ms, end_ms}
+        word_timings: Optional list of dicts with {word, start_ms, end_ms}
+        resolution: Video resolution (width, height)
+        duration: Video duration; cues are cut off there
+
+    Returns:
+        Cues in time order
+    """
+    if not timed_segments:
+        words = text.split()
+        return [SubtitleCue(0.0, duration, [(word, 0.0) for word in words])] if words else []
+
+    cues = []
+    for seg_data in _plan_timed_captions(timed_segments, resolution, word_timings=word_timings):
+        word_spans = seg_data['word_spans']
+        start = word_spans[0][1]
+        end = min(_segment_end(seg_data), duration)
+        if end > start:
+            cues.append(SubtitleCue(
+                start, end, [(wt['word'], wt['start']) for wt in seg_data['word_timings']]
+            ))
+    return cues
+
+
+def _attach_subtitles(
+    render_path: str,
+    output_path: str,
+    cues: Optional[list[SubtitleCue]]
+) -> str:
+    """
+    Finish a soft-caption render: write the sidecars and mux the mov_text track.
+
+    The .srt and .vtt sidecars are written next to output_path, and the rendered
+    video is stream-copied into output_path with the SubRip cues as a subtitle
+    track. Burned-in renders (cues is None) already wrote output_path.
+
+    Args:
+        render_path: Video rendered without captions (deleted afterwards)
+        output_path: Final video path
+        cues: Subtitle cues, or None for burned-in captions
+
+    Returns:
+        output_path
+    """
+    if cues is None:
+        return output_path
+
+    srt_path = Path(output_path).with_suffix(".srt")
+    srt_path.write_text(build_srt(cues), encoding="utf-8")
+    Path(output_path).with_suffix(".vtt").write_text(build_webvtt(cues), encoding="utf-8")
+
+    if not cues:
+        # ffmpeg rejects an empty subtitle input; there is nothing to mux
+        os.replace(render_path, output_path)
+        return output_path
+    try:
+        mux_subtitles(render_path, str(srt_path), output_path)
+    finally:
+        os.unlink(render_path)
+
+    logger.info("Muxed %d subtitle cues into %s", len(cues), output_path)
+    return output_path
+
+
 def compose_video(
     text: str,
     audio_path: str,
     gameplay_clip_path: str,
     output_path: str,
-    resolution: tuple = (1080, 1920),  # 9:16 vertical
+    resolution: tuple = OUTPUT_RESOLUTION,
     caption_duration: Optional[float] = None,
     timed_segments: Optional[list] = None,
     word_timings: Optional[list] = None,
-    diagram_timings: Optional[list] = None
+    diagram_timings: Optional[list] = None,
+    engine: Optional[str] = None,
+    caption_mode: Optional[str] = None,
+    chunks: Optional[int] = None,
+    long_form: bool = False,
+    gameplay_start: Optional[float] = 0.0
 ) -> str:
     """
     Compose a brainrot-style video with gameplay background and captions.
@@ -490,103 +1899,230 @@ def compose_video(
         timed_segments: Optional list of dicts with {text, start_ms, end_ms} for synchronized captions
         word_timings: Optional list of dicts with {word, start_ms, end_ms} for per-word highlight timing
         diagram_timings: Optional list of dicts with {png_path, start_s, duration_s, label} for architecture diagrams
+        engine: "moviepy" (MoviePy composite), "ffmpeg" (direct frame pipe) or
+                "filtergraph" (one ffmpeg run, libass captions); default:
+                RENDER_ENGINE env var, else "moviepy"
+        caption_mode: "burned" (captions drawn into the frames) or "soft" (a
+                      mov_text track plus .srt/.vtt sidecars next to the video,
+                      nothing drawn); default: CAPTION_MODE env var, else "burned"
+        chunks: ffmpeg engine only: render the timeline as this many chunks in
+                parallel worker processes and join them losslessly (0: one per
+                CPU core; 1: a single pass); default: RENDER_CHUNKS env var, else 1
+        long_form: Stream caption and diagram layers from the timeline instead of
+                   building them all up front, so peak memory does not grow with
+                   the narration length; needs the ffmpeg engine (the default
+                   engine in this mode)
+        gameplay_start: Seconds into the gameplay clip to start at (None: a
+                        random keyframe, preferring a stretch that covers the
+                        whole video without looping; with the ffmpeg engine,
+                        the position of a running render of the clip if one
+                        can share its decoder)
 
     Returns:
         Path to the generated video file
+
+    Raises:
+        ValueError: If the engine or caption mode is unknown, or long_form is
+                    combined with another engine than ffmpeg
+        ChunkRenderError: If a chunk of a chunked render fails; rendering the
+                          same job to the same output_path again resumes after
+                          the chunks that were finished
     """
+    engine = engine or ("ffmpeg" if long_form else DEFAULT_RENDER_ENGINE)
+    if engine not in RENDER_ENGINES:
+        raise ValueError(f"Unknown render engine {engine!r}; expected one of {RENDER_ENGINES}")
+    if long_form and engine != "ffmpeg":
+        # MoviePy composites every layer clip up front, and the filtergraph opens
+        # one input per diagram window
+        raise ValueError(f"Long-form mode needs the ffmpeg engine, not {engine!r}")
+    caption_mode = caption_mode or DEFAULT_CAPTION_MODE
+    if caption_mode not in CAPTION_MODES:
+        raise ValueError(f"Unknown caption mode {caption_mode!r}; expected one of {CAPTION_MODES}")
+
     # Ensure output directory exists
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
+    # Render from a proxy already at the output size and frame rate (made once per
+    # clip and cached), so no engine scales the gameplay frame by frame
+    segments = None
+    try:
+        gameplay_clip_path = get_gameplay_proxy(gameplay_clip_path, resolution, OUTPUT_FPS)
+        segments = get_gameplay_segments(gameplay_clip_path)
+    except IOError as e:
+        logger.warning("No gameplay proxy, rendering from %s: %s", gameplay_clip_path, e)
+
     # Load audio to get duration
     audio = AudioFileClip(audio_path)
     video_duration = caption_duration or audio.duration
 
-    # Load and prepare gameplay clip
-    gameplay = VideoFileClip(gameplay_clip_path)
+    # Start mid-clip with an input-side seek; a long proxy's segments let the
+    # read open just the segment it stays within
+    if gameplay_start is None:
+        segments = segments or [
+            GameplaySegment(gameplay_clip_path, 0.0, probe_duration(gameplay_clip_path))
+        ]
+        if engine == "ffmpeg":
+            # Start where a running render of the clip is about to be, sharing its
+            # decoder (only if SHARED_DECODE_LIVE_START is on)
+            gameplay_start = live_gameplay_start(segments, resolution, OUTPUT_FPS, video_duration)
+        if gameplay_start is None:
+            gameplay_start = random_gameplay_start(segments, video_duration)
+    if gameplay_start and segments:
+        gameplay_clip_path, gameplay_start = locate_gameplay(
+            gameplay_clip_path, segments, gameplay_start, video_duration
+        )
 
-    # If gameplay is shorter than needed, loop it
-    if gameplay.duration < video_duration:
-        loops_needed = int(video_duration / gameplay.duration) + 1
-        gameplay = concatenate_videoclips([gameplay] * loops_needed)
+    # Soft captions: render only gameplay, dimming and diagrams into a scratch
+    # file, then stream-copy it into output_path alongside the subtitle track
+    subtitle_cues = None
+    render_path = output_path
+    if caption_mode == "soft":
+        subtitle_cues = _subtitle_cues(
+            text, timed_segments, word_timings, resolution, video_duration
+        )
+        render_path = _soft_render_path(output_path)
+
+    if engine == "filtergraph":
+        audio.close()
+        caption_script = None
+        caption_words = []
+        if subtitle_cues is None:
+            if font_registry.path is None:
+                raise ValueError("The filtergraph engine needs a caption font file; none was found")
+
+            if timed_segments and len(timed_segments) > 0:
+                caption_font = get_font(CAPTION_FONT_SIZE)
+                caption_words = _caption_words(_plan_timed_captions(
+                    timed_segments, resolution, word_timings=word_timings
+                ))
+            else:
+                caption_font = get_font(60)
+                caption_words = [
+                    CaptionWord(line, x, y, 0.0, video_duration)
+                    for line, x, y in _layout_static_caption(text, resolution)
+                ]
+            caption_script = build_caption_script(
+                caption_words, resolution, caption_font,
+                CAPTION_FILL, CAPTION_HIGHLIGHT, CAPTION_STROKE, CAPTION_STROKE_WIDTH
+            )
+        diagram_plans = _plan_diagram_overlays(diagram_timings or [], resolution, video_duration)
 
-    # Trim to exact duration
-    gameplay = _clip_subclip(gameplay, 0, video_duration)
+        # Like the MoviePy composite, run until the last caption or diagram ends
+        total_duration = max(
+            [video_duration]
+            + [word.end for word in caption_words]
+            + [plan["start_s"] + plan["duration_s"] for plan in diagram_plans]
+        )
+        dim_intervals = _dim_intervals(diagram_timings or [])
+        _render_with_filtergraph(
+            gameplay_clip_path, audio_path, render_path, resolution, video_duration,
+            total_duration, caption_script, diagram_plans, dim_intervals,
+            gameplay_start=gameplay_start
+        )
+        return _attach_subtitles(render_path, output_path, subtitle_cues)
+
+    overlay_args = {
+        "text": text,
+        "resolution": resolution,
+        "video_duration": video_duration,
+        "timed_segments": timed_segments,
+        "word_timings": word_timings,
+        "diagram_timings": diagram_timings,
+        "burn_captions": subtitle_cues is None,
+    }
+
+    if engine == "ffmpeg":
+        audio.close()
+        dim_intervals = _dim_intervals(diagram_timings or [])
+        total_duration = _composite_duration(
+            resolution, video_duration, timed_segments, word_timings, diagram_timings,
+            burn_captions=subtitle_cues is None
+        )
+        chunk_count = _render_chunk_count(chunks, total_duration)
+        if chunk_count > 1:
+            # Each worker rasterizes only the overlays its chunk shows
+            _render_chunked(
+                gameplay_clip_path, audio_path, render_path, resolution, video_duration,
+                total_duration, overlay_args, dim_intervals, chunk_count, long_form=long_form,
+                gameplay_start=gameplay_start
+            )
+        elif long_form:
+            overlays = StreamingOverlays(**overlay_args)
+            _render_with_ffmpeg(
+                gameplay_clip_path, audio_path, render_path, resolution, video_duration,
+                overlays, dim_intervals, total_duration=total_duration,
+                gameplay_start=gameplay_start
+            )
+            logger.info(
+                "Long-form render built %d layer groups, at most %d held at once",
+                overlays.groups_built, overlays.peak_groups
+            )
+        else:
+            _render_with_ffmpeg(
+                gameplay_clip_path, audio_path, render_path, resolution, video_duration,
+                _create_overlay_clips(**overlay_args), dim_intervals,
+                gameplay_start=gameplay_start
+            )
+        return _attach_subtitles(render_path, output_path, subtitle_cues)
 
-    # Resize gameplay to target resolution (9:16) only if needed
-    if gameplay.size != resolution:
-        gameplay = _clip_resize(gameplay, newsize=resolution)
+    overlays = _create_overlay_clips(**overlay_args)
 
-    # Create captions - either timed or static
-    temp_files_to_cleanup = []
+    # Load and prepare gameplay clip (the narration is muxed separately, so
+    # the gameplay audio is never decoded)
+    gameplay = VideoFileClip(gameplay_clip_path, audio=False)
 
-    if timed_segments and len(timed_segments) > 0:
-        # Use synchronized line-by-line captions
-        caption_data = _create_timed_captions(timed_segments, resolution, word_timings=word_timings)
-        caption_clips = [item['clip'] for item in caption_data]
-        temp_files_to_cleanup = [item['temp_file'] for item in caption_data]
+    # Loop gameplay shorter than needed (or read from an offset), otherwise trim
+    # to exact duration
+    if gameplay_start or gameplay.duration < video_duration:
+        gameplay = _loop_clip(gameplay, video_duration, gameplay_start)
     else:
-        # Fall back to static overlay (backward compatibility)
-        caption_image_path = _create_text_overlay(text, resolution)
-        temp_files_to_cleanup.append(caption_image_path)
+        gameplay = _clip_subclip(gameplay, 0, video_duration)
 
-        # Load the text overlay as an ImageClip
-        caption = ImageClip(caption_image_path)
-        caption = _clip_set_duration(caption, video_duration)
-        caption = _clip_set_position(caption, 'center')
-        caption_clips = [caption]
+    # Resize gameplay to target resolution (9:16) only if needed (MoviePy's size is a list)
+    if tuple(gameplay.size) != tuple(resolution):
+        gameplay = _clip_resize(gameplay, newsize=resolution)
 
-    # Create diagram overlays if provided
-    diagram_clips = []
     if diagram_timings and len(diagram_timings) > 0:
-        diagram_data = _create_diagram_overlays(diagram_timings, resolution, video_duration)
-        diagram_clips = [item['clip'] for item in diagram_data]
-        temp_files_to_cleanup.extend([item['temp_file'] for item in diagram_data])
-
-        # Add dimming to gameplay during diagram display
-        # Create a function to dim the frame during diagram times
-        def apply_dimming(get_frame, t):
-            """Dim the frame to 50% opacity when a diagram is showing."""
-            frame = get_frame(t)
-            # Check if any diagram is active at time t
-            for diagram in diagram_timings:
-                if diagram["start_s"] <= t < (diagram["start_s"] + diagram["duration_s"]):
-                    # Apply 50% dimming
-                    return (frame * 0.5).astype('uint8')
-            return frame
-
-        gameplay = _clip_transform(gameplay, apply_dimming)
+        # Dim gameplay to 50% during diagram display
+        gameplay = _clip_transform(gameplay, GameplayDimmer(_dim_intervals(diagram_timings)))
 
     # Composite video: gameplay (dimmed during diagrams) -> diagrams -> captions (always on top)
     # Layer order matters: earlier elements are below later elements
-    final_video = CompositeVideoClip([gameplay] + diagram_clips + caption_clips)
-
-    # Set audio
-    final_video = _clip_set_audio(final_video, audio)
+    # Each frame is encoded before the next is composited, so one pooled frame
+    # buffer is reused for the whole render
+    frame_pool = FramePool((resolution[1], resolution[0], 3))
+    final_video = IndexedCompositeVideoClip(
+        [gameplay] + overlays, frame_pool=frame_pool
+    )
 
-    # Write output file with retry on broken pipe
+    # Composite the frames (at t = i / fps) and pipe each checkpointed chunk to an
+    # FFmpegFrameWriter as a video-only file, so a broken encoder pipe costs one
+    # retried chunk instead of a full re-render, then join the chunks with the
+    # concat demuxer and encode the narration once
+    times = np.arange(0, final_video.duration, 1.0 / OUTPUT_FPS)
+    chunk_count = max(1, math.ceil(len(times) / (CHECKPOINT_SECONDS * OUTPUT_FPS)))
+    frame_ranges = split_frames(len(times), chunk_count)
     try:
-        try:
-            final_video.write_videofile(
-                output_path,
-                fps=24,
-                codec='libx264',
-                audio_codec='aac',
-                preset='ultrafast',
-                threads=2
-            )
-        except (BrokenPipeError, OSError) as e:
-            logger.exception(
-                "write_videofile failed (preset=medium), retrying with ultrafast: %s", e
-            )
-            # Retry once with ultrafast preset (less ffmpeg buffering)
-            final_video.write_videofile(
-                output_path,
-                fps=30,
-                codec='libx264',
-                audio_codec='aac',
-                preset='ultrafast',
-                threads=2
+        checkpoint = ChunkCheckpoint(render_path, {
+            "engine": engine, "gameplay_clip_path": gameplay_clip_path,
+            "gameplay_start": gameplay_start,
+            "audio_path": audio_path, "overlay_args": overlay_args,
+            "fps": OUTPUT_FPS, "frame_ranges": frame_ranges,
+        })
+
+        def write_chunk(index: int):
+            first_frame, end_frame = frame_ranges[index]
+            _write_clip_frames(
+                final_video, times[first_frame:end_frame], checkpoint.partial_path(index),
+                resolution, OUTPUT_FPS
             )
+
+        _render_checkpointed(checkpoint, frame_ranges, write_chunk, list(range(chunk_count)))
+        concat_videos(
+            [checkpoint.chunk_path(i) for i in range(chunk_count)], render_path, audio_path,
+            audio_duration=final_video.duration
+        )
+        checkpoint.remove()
     finally:
         # Ensure all clips are closed even on failure
         for clip_obj in (audio, gameplay, final_video):
@@ -595,35 +2131,53 @@ def compose_video(
             except Exception:
                 pass
 
-        # Remove temporary caption image files
-        for temp_file in temp_files_to_cleanup:
-            try:
-                if os.path.exists(temp_file):
-                    os.unlink(temp_file)
-            except OSError:
-                pass
+    logger.info("moviepy engine frame buffers: %s", frame_pool.stats())
+    return _attach_subtitles(render_path, output_path, subtitle_cues)
 
-    return output_path
 
+def _soft_render_path(output_path: str) -> str:
+    """Return the scratch file a soft-caption render writes before muxing the subtitles."""
+    return str(Path(output_path).with_suffix(".nosubs.mp4"))
+
+
+def discard_checkpoints(output_path: str):
+    """
+    Delete what a failed compose_video to output_path left behind.
+
+    Removes the chunk checkpoints (kept so a render of the same plan can resume)
+    and the soft-caption scratch file; call it once the render will not be retried.
 
-def get_random_gameplay_clip(gameplay_dir: str = "assets/gameplay") -> Optional[str]:
+    Args:
+        output_path: Output path the render was given
+    """
+    soft_path = _soft_render_path(output_path)
+    for path in (output_path, soft_path):
+        shutil.rmtree(checkpoint_directory(path), ignore_errors=True)
+    if os.path.exists(soft_path):
+        os.remove(soft_path)
+
+
+def get_random_gameplay_clip(
+    gameplay_dir: str = "assets/gameplay",
+    duration: Optional[float] = None,
+    resolution: Optional[tuple] = None,
+    fps: float = OUTPUT_FPS
+) -> Optional[str]:
     """
     Get a random gameplay clip from the assets directory.
 
+    Clips come from the directory's probed clip index. Clips at least as long as
+    the narration are preferred (no looping), then clips already at the output
+    size, frame rate and pixel format (no conversion).
+
     Args:
         gameplay_dir: Directory containing gameplay video files
+        duration: Narration length in seconds, if known
+        resolution: Output (width, height), if known
+        fps: Output frame rate
 
     Returns:
         Path to a random gameplay clip, or None if directory is empty
     """
-    gameplay_path = Path(gameplay_dir)
-    if not gameplay_path.exists():
-        return None
-
-    # Find all MP4 files
-    clips = list(gameplay_path.glob("*.mp4")) + list(gameplay_path.glob("*.MP4"))
-
-    if not clips:
-        return None
-
-    return str(random.choice(clips))
+    clip = gameplay_index(gameplay_dir).select(duration, resolution, fps)
+    return clip.path if clip else None
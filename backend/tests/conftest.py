@@ -0,0 +1,26 @@
+"""Fixtures shared by the backend tests."""
+
+import subprocess
+
+import pytest
+
+from backend.pipeline.ffmpeg_io import ffmpeg_binary
+
+
+@pytest.fixture(scope="session")
+def testsrc_clip():
+    """
+    Factory encoding an ffmpeg testsrc clip, whose frames all differ so a wrong frame shows.
+
+    Call it with the output path, (width, height), frame rate and seconds; it
+    returns the path.
+    """
+    def make(path, size: tuple[int, int], fps: int = 24, duration: float = 1):
+        subprocess.run(
+            [ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi",
+             "-i", f"testsrc=size={size[0]}x{size[1]}:rate={fps}:duration={duration}",
+             "-pix_fmt", "yuv420p", str(path)],
+            check=True
+        )
+        return path
+    return make
@@ -6,8 +6,12 @@ Tests cover:
 - TTS service edge cases (empty text, very long text, special characters)
 - Video composition edge cases (missing assets, invalid dimensions)
 - Caption generation with edge cases (punctuation-only, unicode)
+- Failed jobs leaving no render checkpoints behind
+- Jobs picking gameplay at the output format off the event loop
+- A failed background gameplay ingest being logged
 """
 
+import asyncio
 import pytest
 import tempfile
 from pathlib import Path
@@ -15,6 +19,7 @@ from io import BytesIO
 from unittest.mock import Mock, patch, AsyncMock, MagicMock
 import httpx
 
+from backend import main
 from backend.main import app
 from backend.models import JobStatus
 from backend.pipeline.input_processor import extract_text
@@ -335,6 +340,79 @@ class TestVideoCompositionEdgeCases:
             assert nested_output.parent.exists()
 
 
+class TestVideoGenerationFailures:
+    """Test the background job when the render fails."""
+
+    async def test_failed_render_checkpoints_removed(self, tmp_path):
+        """A failed job is not retried, so its chunk checkpoints should be deleted."""
+        checkpoint = tmp_path / ".job-1.mp4.chunks"
+
+        def failing_compose(*args, **kwargs):
+            checkpoint.mkdir()
+            (checkpoint / "chunk_0000.mp4").write_bytes(b"chunk")
+            raise RuntimeError("chunk 1 failed")
+
+        tts_result = {"audio_path": str(tmp_path / "job-1.mp3"), "word_timings": []}
+        with patch.object(main, "OUTPUT_DIR", tmp_path), \
+                patch.object(main, "TEMP_DIR", tmp_path), \
+                patch.object(main, "generate_tts", AsyncMock(return_value=tts_result)), \
+                patch.object(main, "get_random_gameplay_clip", return_value="gameplay.mp4"), \
+                patch.object(main, "compose_video", side_effect=failing_compose), \
+                patch.object(main, "job_manager") as jobs:
+            jobs.update_job_progress = AsyncMock()
+            jobs.mark_job_error = AsyncMock()
+            await main.process_video_generation("job-1", "text", transform=False, diagrams=False)
+
+        jobs.mark_job_error.assert_awaited_once()
+        assert not checkpoint.exists()
+
+
+class TestGameplaySelection:
+    """Test how the background job picks its gameplay clip."""
+
+    async def test_clip_picked_for_output_format_in_thread(self, tmp_path):
+        """The pick should know the output format and run off the event loop."""
+        tts_result = {
+            "audio_path": str(tmp_path / "job-2.mp3"),
+            "word_timings": [{"word": "fr", "start_ms": 0, "end_ms": 1500}],
+        }
+        with patch.object(main, "OUTPUT_DIR", tmp_path), \
+                patch.object(main, "TEMP_DIR", tmp_path), \
+                patch.object(main, "generate_tts", AsyncMock(return_value=tts_result)), \
+                patch.object(main, "get_random_gameplay_clip", return_value=None) as pick, \
+                patch.object(main.asyncio, "to_thread", wraps=main.asyncio.to_thread) as to_thread, \
+                patch.object(main, "job_manager") as jobs:
+            jobs.update_job_progress = AsyncMock()
+            jobs.mark_job_error = AsyncMock()
+            await main.process_video_generation("job-2", "text", transform=False, diagrams=False)
+
+        pick.assert_called_once_with(
+            str(main.GAMEPLAY_DIR), duration=1.5,
+            resolution=main.OUTPUT_RESOLUTION, fps=main.OUTPUT_FPS
+        )
+        assert to_thread.call_args_list[0].args[0] is pick
+
+
+class TestGameplayIngest:
+    """Test the background gameplay ingest started at startup."""
+
+    async def test_failure_logged(self, tmp_path, caplog):
+        """An ingest that fails should be logged, since nothing awaits its task."""
+        index = Mock()
+        index.clips.return_value = []
+        with patch.object(main, "GAMEPLAY_DIR", tmp_path), \
+                patch.object(main, "sweep_orphaned_rings"), \
+                patch.object(main, "gameplay_index", return_value=index), \
+                patch.object(main, "ingest_gameplay", side_effect=OSError("disk full")):
+            await main.startup_event()
+            with pytest.raises(OSError):
+                await main._ingest_task
+            await asyncio.sleep(0)
+
+        assert "Gameplay proxy ingest failed" in caplog.text
+        assert "disk full" in caplog.text
+
+
 @pytest.mark.skip(reason="Requires httpx/starlette version compatibility for ASGI TestClient")
 class TestJobStatusEndpoints:
     """Test job status endpoints error handling."""
@@ -357,6 +435,12 @@ class TestJobStatusEndpoints:
         assert response.status_code == 404
         assert "Video not found" in response.json()["detail"]
 
+    async def test_get_captions_unknown_format(self):
+        """Should return 404 for subtitle formats other than srt and vtt."""
+        response = await self.client.get("/api/videos/nonexistent-video-id-123/captions.ass")
+        assert response.status_code == 404
+        assert "Unknown subtitle format" in response.json()["detail"]
+
     async def test_health_check(self):
         """Should return health status."""
         transport = httpx.ASGITransport(app=app)
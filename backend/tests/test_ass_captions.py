@@ -0,0 +1,115 @@
+"""
+Tests for ass_captions module.
+
+Tests cover:
+- ASS timestamps and colors
+- Pillow-to-libass font size and baseline translation
+- Caption scripts: one positioned event per word and instant highlight transforms
+"""
+
+from pathlib import Path
+
+import pytest
+from PIL import ImageFont
+
+from backend.pipeline.ass_captions import (
+    CaptionWord,
+    ass_color,
+    ass_font_metrics,
+    ass_time,
+    build_caption_script,
+)
+
+
+FONT_PATH = Path(__file__).parents[2] / "assets" / "fonts" / "Montserrat-Bold.ttf"
+
+
+@pytest.fixture
+def font():
+    return ImageFont.truetype(str(FONT_PATH), 52)
+
+
+def _dialogues(script):
+    return [line for line in script.splitlines() if line.startswith("Dialogue:")]
+
+
+class TestAssFormatting:
+    """Test ASS value formatting."""
+
+    def test_time(self):
+        """Timestamps should be h:mm:ss.cc, rounded to centiseconds."""
+        assert ass_time(0) == "0:00:00.00"
+        assert ass_time(1.234) == "0:00:01.23"
+        assert ass_time(3725.5) == "1:02:05.50"
+
+    def test_color_is_bgr(self):
+        """Colors should be written as &HAABBGGRR&."""
+        assert ass_color("#FFFF00") == "&H0000FFFF&"
+        assert ass_color("white") == "&H00FFFFFF&"
+        assert ass_color("#102030") == "&H00302010&"
+
+    def test_font_metrics(self, font):
+        """ASS size is the Windows cell height; the baseline moves up to Pillow's."""
+        size, y_offset = ass_font_metrics(font)
+        # Montserrat: unitsPerEm 1000, usWinAscent 1109, usWinDescent 453
+        assert size == pytest.approx(52 * 1.562)
+        assert y_offset == pytest.approx(font.getmetrics()[0] - 52 * 1.109)
+
+
+class TestCaptionScript:
+    """Test ASS caption script generation."""
+
+    def test_style_matches_caption_look(self, font):
+        """The style should use the caption face, white fill and a 5px black outline."""
+        script = build_caption_script([], (1080, 1920), font, "white", "#FFFF00", "black", 5)
+        assert "PlayResX: 1080" in script
+        assert "PlayResY: 1920" in script
+        style = next(line for line in script.splitlines() if line.startswith("Style:"))
+        fields = style.split(",")
+        assert fields[1] == "Montserrat"
+        assert fields[3] == "&H00FFFFFF&"
+        assert fields[5] == "&H00000000&"
+        assert fields[7] == "-1"
+        assert fields[16] == "5"
+
+    def test_one_positioned_event_per_word(self, font):
+        """Each word should be drawn at its own \\pos for the whole segment."""
+        words = [
+            CaptionWord("no", 100, 1440, 1.0, 2.5, (1.0, 1.4)),
+            CaptionWord("cap", 180, 1440, 1.0, 2.5, (1.4, 2.5)),
+        ]
+        script = build_caption_script(words, (1080, 1920), font, "white", "#FFFF00", "black", 5)
+        dialogues = _dialogues(script)
+        _, y_offset = ass_font_metrics(font)
+        assert len(dialogues) == 2
+        assert dialogues[0].startswith("Dialogue: 0,0:00:01.00,0:00:02.50,Caption,")
+        assert f"\\pos(180,{1440 + y_offset:.2f})" in dialogues[1]
+        assert dialogues[1].endswith("}cap")
+
+    def test_highlight_transforms(self, font):
+        """The highlight should switch on and off at the word span, in ms from the event start."""
+        words = [CaptionWord("cap", 0, 0, 1.0, 2.5, (1.4, 2.5))]
+        dialogue = _dialogues(
+            build_caption_script(words, (1080, 1920), font, "white", "#FFFF00", "black", 5)
+        )[0]
+        assert "\\t(400,400,\\1c&H0000FFFF&)" in dialogue
+        assert "\\t(1500,1500,\\1c&H00FFFFFF&)" in dialogue
+
+    def test_first_word_starts_lit(self, font):
+        """A highlight starting with the event should be set directly, not via \\t(0,0)."""
+        words = [CaptionWord("no", 0, 0, 1.0, 2.5, (1.0, 1.4))]
+        dialogue = _dialogues(
+            build_caption_script(words, (1080, 1920), font, "white", "#FFFF00", "black", 5)
+        )[0]
+        assert "\\1c&H0000FFFF&\\t(400,400,\\1c&H00FFFFFF&)" in dialogue
+        assert "\\t(0,0," not in dialogue
+
+    def test_override_characters_escaped(self, font):
+        """Braces and backslashes in the narration must not become ASS tags."""
+        words = [CaptionWord("{\\b1}", 0, 0, 0.0, 1.0)]
+        dialogue = _dialogues(
+            build_caption_script(words, (1080, 1920), font, "white", "#FFFF00", "black", 5)
+        )[0]
+        text = dialogue.split("}", 1)[1]
+        assert "{" not in text and "}" not in text
+        assert "\\b" not in text
@@ -0,0 +1,232 @@
+"""
+Tests for caption_renderer module.
+
+Tests cover:
+- Word tiles match direct Pillow drawing
+- Process-wide LRU cache hits, eviction and statistics
+- Glyph atlas output identical to Pillow's stroked text rendering
+- Memoized text measurement matching font.getbbox
+"""
+
+import random
+import string
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from backend.pipeline.caption_renderer import (
+    GlyphAtlas,
+    TextMeasurer,
+    WordTileCache,
+    _rasterize_word_pillow,
+    get_glyph_atlas,
+    get_text_measurer,
+    get_word_tile_cache_stats,
+    render_word_tile,
+    word_tile_cache,
+)
+
+
+FONT_PATH = Path(__file__).parents[2] / "assets" / "fonts" / "Montserrat-Bold.ttf"
+
+
+@pytest.fixture
+def font():
+    return ImageFont.truetype(str(FONT_PATH), 52)
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    word_tile_cache.clear()
+    yield
+    word_tile_cache.clear()
+
+
+class TestWordTiles:
+    """Test word tile rasterization."""
+
+    @pytest.mark.parametrize("word", ["bro", "cache", "no", "Wq,", "AVAToyota"])
+    def test_tile_matches_pillow_draw(self, font, word):
+        """Pasting the tile at its offset should equal drawing the word directly."""
+        expected = Image.new('RGBA', (600, 200), (0, 0, 0, 0))
+        ImageDraw.Draw(expected).text(
+            (100, 50), word, fill='white', font=font, stroke_width=5, stroke_fill='black'
+        )
+
+        tile, (left, top) = render_word_tile(word, font, 'white', 5, 'black')
+        actual = Image.new('RGBA', (600, 200), (0, 0, 0, 0))
+        actual.alpha_composite(Image.fromarray(tile), (100 + left, 50 + top))
+
+        assert np.array_equal(np.asarray(actual), np.asarray(expected))
+
+    def test_tile_is_read_only(self, font):
+        """Shared tiles must not be writable by callers."""
+        tile, _ = render_word_tile("bro", font, 'white', 5, 'black')
+        with pytest.raises(ValueError):
+            tile[0, 0, 0] = 1
+
+    def test_whitespace_word_gives_empty_tile(self, font):
+        """Words with no ink should produce an empty tile, not an error."""
+        tile, _ = render_word_tile(" ", font, 'white', 0, 'black')
+        assert tile.size == 0
+
+
+class TestWordTileCache:
+    """Test the process-wide word tile cache."""
+
+    def test_repeated_words_hit_cache(self, font):
+        """Rendering the same word/style twice should reuse the tile."""
+        first, _ = render_word_tile("bro", font, 'white', 5, 'black')
+        second, _ = render_word_tile("bro", font, 'white', 5, 'black')
+
+        assert first is second
+        stats = get_word_tile_cache_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(0.5)
+
+    def test_key_includes_color_size_and_stroke(self, font):
+        """Different colors, sizes or strokes must not share tiles."""
+        render_word_tile("cap", font, 'white', 5, 'black')
+        render_word_tile("cap", font, '#FFFF00', 5, 'black')
+        render_word_tile("cap", font, 'white', 3, 'black')
+        render_word_tile("cap", ImageFont.truetype(str(FONT_PATH), 40), 'white', 5, 'black')
+
+        stats = get_word_tile_cache_stats()
+        assert stats["misses"] == 4
+        assert stats["hits"] == 0
+
+    def test_evicts_least_recently_used(self):
+        """Cache should stay under its byte budget, evicting the oldest tiles."""
+        cache = WordTileCache(max_bytes=3 * 100)
+        render = lambda: (np.zeros((5, 5, 4), dtype=np.uint8), (0, 0))  # 100 bytes
+
+        for key in ("a", "b", "c"):
+            cache.get_or_render(key, render)
+        cache.get_or_render("a", render)  # refresh "a"
+        cache.get_or_render("d", render)  # evicts "b"
+
+        stats = cache.stats()
+        assert stats["entries"] == 3
+        assert stats["bytes"] <= 300
+
+        cache.get_or_render("a", render)
+        cache.get_or_render("b", render)
+        assert cache.stats()["misses"] == 5
+
+    def test_concurrent_jobs_share_tiles(self, font):
+        """Threads rendering the same words should end up with one tile per word."""
+        words = ["bro", "the", "cache", "no", "cap"] * 20
+
+        def job():
+            for word in words:
+                render_word_tile(word, font, 'white', 5, 'black')
+
+        threads = [threading.Thread(target=job) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = get_word_tile_cache_stats()
+        assert stats["entries"] == 5
+        assert stats["hits"] + stats["misses"] == 400
+        assert stats["hit_rate"] > 0.9
+
+
+class TestGlyphAtlas:
+    """Test word composition from pre-rasterized glyphs."""
+
+    @staticmethod
+    def _words():
+        words = "bro the cache no cap Redis AVAToyota Wq, fr lowkey bussin ÄÖÜ naïve 42% don't".split()
+        rng = random.Random(7)
+        alphabet = string.ascii_letters + string.digits + ".,!?'\"-"
+        for _ in range(150):
+            words.append(''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 12))))
+        return words
+
+    @pytest.mark.parametrize("stroke_width", [5, 2, 0])
+    def test_matches_pillow_output(self, font, stroke_width):
+        """Atlas tiles should be pixel-identical to ImageDraw.text tiles."""
+        atlas = GlyphAtlas(font, stroke_width)
+        for word in self._words():
+            tile, offset = atlas.render(word, '#FFFF00', 'black')
+            expected, expected_offset = _rasterize_word_pillow(
+                word, font, '#FFFF00', stroke_width, 'black'
+            )
+            assert offset == expected_offset, word
+            assert np.array_equal(tile, expected), word
+
+    def test_matches_pillow_at_other_sizes(self):
+        """Caption sizes other than 52 should match as well."""
+        for size in (24, 60, 96):
+            small = ImageFont.truetype(str(FONT_PATH), size)
+            atlas = GlyphAtlas(small, 5)
+            for word in ("Architecture", "fr,", "Wave"):
+                tile, _ = atlas.render(word, 'white', 'black')
+                expected, _ = _rasterize_word_pillow(word, small, 'white', 5, 'black')
+                assert np.array_equal(tile, expected), (size, word)
+
+    def test_empty_word(self, font):
+        """Words without ink should give a fully transparent tile."""
+        tile, _ = GlyphAtlas(font, 5).render(" ", 'white', 'black')
+        assert not tile[:, :, 3].any()
+
+    def test_atlas_shared_per_font_and_stroke(self, font):
+        """One atlas per face, size and stroke width for the whole process."""
+        assert get_glyph_atlas(font, 5) is get_glyph_atlas(ImageFont.truetype(str(FONT_PATH), 52), 5)
+        assert get_glyph_atlas(font, 5) is not get_glyph_atlas(font, 3)
+
+    def test_supports_basic_layout_only(self, font):
+        """Raqm-shaped fonts must fall back to Pillow."""
+        assert GlyphAtlas.supports(font)
+        assert not GlyphAtlas.supports(ImageFont.load_default_imagefont())
+
+
+class TestTextMeasurer:
+    """Test memoized text measurement."""
+
+    NARRATION = (Path(__file__).parents[2] / "test_inputs" / "redis_entity_caching_brainrot.txt").read_text().split()
+
+    def test_line_width_matches_getbbox(self, font):
+        """Incremental line widths should equal measuring the joined string."""
+        measurer = TextMeasurer(font)
+        rng = random.Random(3)
+        for _ in range(300):
+            count = rng.randint(1, 8)
+            start = rng.randint(0, len(self.NARRATION) - count)
+            words = self.NARRATION[start:start + count]
+
+            line = measurer.start_line(words[0])
+            for word in words[1:]:
+                line = measurer.extend_line(line, word)
+
+            bbox = font.getbbox(' '.join(words))
+            assert line.width == bbox[2] - bbox[0], words
+
+    def test_measurements_are_memoized(self, font):
+        """Each distinct word should only reach the font once."""
+        calls = []
+
+        class CountingFont:
+            def getbbox(self, text):
+                calls.append(text)
+                return font.getbbox(text)
+
+            def getlength(self, text):
+                return font.getlength(text)
+
+        measurer = TextMeasurer(CountingFont())
+        for _ in range(10):
+            for word in ("bro", "the", "cache"):
+                measurer.width(word)
+
+        assert sorted(calls) == sorted([' ', 'bro', 'the', 'cache'])
+
+    def test_measurer_shared_per_font(self, font):
+        """Jobs using the same face and size share one measurer."""
+        assert get_text_measurer(font) is get_text_measurer(ImageFont.truetype(str(FONT_PATH), 52))
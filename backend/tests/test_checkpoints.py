@@ -0,0 +1,82 @@
+"""
+Tests for checkpointed chunk files.
+
+Tests cover:
+- Splitting frames into contiguous near-equal chunks
+- Chunks only counted as done once committed
+- Finished chunks kept for a resumed render of the same plan
+- A different plan discarding stale chunks
+- Chunk failures reported with the chunk index
+"""
+
+from pathlib import Path
+
+import pytest
+
+from backend.pipeline.checkpoints import ChunkCheckpoint, ChunkRenderError, split_frames
+
+PLAN = {"fps": 24, "frame_ranges": [(0, 10), (10, 20)], "text": "no cap"}
+
+
+class TestSplitFrames:
+    """Test split_frames."""
+
+    def test_covers_all_frames_in_order(self):
+        ranges = split_frames(100, 3)
+        assert ranges == [(0, 33), (33, 67), (67, 100)]
+
+    def test_single_chunk(self):
+        assert split_frames(48, 1) == [(0, 48)]
+
+
+class TestChunkCheckpoint:
+    """Test ChunkCheckpoint."""
+
+    def _finish(self, checkpoint, index):
+        Path(checkpoint.partial_path(index)).write_bytes(b"chunk")
+        checkpoint.commit(index)
+
+    def test_directory_next_to_output(self, tmp_path):
+        checkpoint = ChunkCheckpoint(str(tmp_path / "out.mp4"), PLAN)
+        assert checkpoint.directory == tmp_path / ".out.mp4.chunks"
+        assert checkpoint.directory.is_dir()
+
+    def test_partial_chunk_is_not_done(self, tmp_path):
+        checkpoint = ChunkCheckpoint(str(tmp_path / "out.mp4"), PLAN)
+        Path(checkpoint.partial_path(0)).write_bytes(b"half a chunk")
+        assert not checkpoint.is_done(0)
+        checkpoint.commit(0)
+        assert checkpoint.is_done(0)
+        assert not Path(checkpoint.partial_path(0)).exists()
+
+    def test_same_plan_resumes(self, tmp_path):
+        self._finish(ChunkCheckpoint(str(tmp_path / "out.mp4"), PLAN), 0)
+        resumed = ChunkCheckpoint(str(tmp_path / "out.mp4"), dict(PLAN))
+        assert resumed.is_done(0)
+        assert not resumed.is_done(1)
+
+    def test_changed_plan_starts_over(self, tmp_path):
+        self._finish(ChunkCheckpoint(str(tmp_path / "out.mp4"), PLAN), 0)
+        changed = ChunkCheckpoint(str(tmp_path / "out.mp4"), {**PLAN, "text": "fr fr"})
+        assert not changed.is_done(0)
+
+    def test_remove(self, tmp_path):
+        checkpoint = ChunkCheckpoint(str(tmp_path / "out.mp4"), PLAN)
+        self._finish(checkpoint, 0)
+        checkpoint.remove()
+        assert not checkpoint.directory.exists()
+
+
+class TestChunkRenderError:
+    """Test ChunkRenderError."""
+
+    def test_carries_chunk_index(self):
+        error = ChunkRenderError(2, 5, (48, 72), BrokenPipeError("pipe closed"))
+        assert error.chunk_index == 2
+        assert error.frame_range == (48, 72)
+        assert "chunk 2 of 5 (frames 48-71)" in str(error)
+        assert "pipe closed" in str(error)
+
+    def test_is_an_ioerror(self):
+        with pytest.raises(IOError):
+            raise ChunkRenderError(0, 1, (0, 1), OSError("disk full"))
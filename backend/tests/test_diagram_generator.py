@@ -8,6 +8,7 @@ Tests cover:
 - mmdc rendering (mocked subprocess)
 - Pillow fallback when mmdc unavailable
 - Graceful degradation (all failure paths return empty list)
+- One overlay per keyword window, with no overlay cap
 """
 
 import pytest
@@ -351,6 +352,24 @@ The API handles all requests.
                     assert result[0]["start_s"] == 0.2
 
 
+    @pytest.mark.asyncio
+    async def test_every_keyword_window_gets_an_overlay(self, tmp_path):
+        """More than four keyword windows should all become overlays."""
+        blocks = "\n".join(f"```mermaid\ngraph TD\n    A{i} --> B{i}\n```" for i in range(6))
+        word_timings = [
+            {"word": "database", "start_ms": 5000 * i, "end_ms": 5000 * i + 400}
+            for i in range(6)
+        ]
+
+        mock_result = Mock()
+        mock_result.returncode = 0
+
+        with patch("subprocess.run", return_value=mock_result):
+            with patch.object(Path, "exists", return_value=True):
+                result = await generate_diagram_overlays(blocks, word_timings, tmp_path)
+        assert [overlay["start_s"] for overlay in result] == [0.0, 5.0, 10.0, 15.0, 20.0, 25.0]
+
+
 class TestTopicContextExtraction:
     """Test _extract_topic_context helper."""
 
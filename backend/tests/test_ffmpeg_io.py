@@ -0,0 +1,168 @@
+"""
+Tests for ffmpeg_io module.
+
+Tests cover:
+- Decoding to a fixed size and frame rate, with looping
+- Starting a looped read at an offset past the end of the clip
+- Repeating the last frame past the end of the input
+- Encoding frames with muxed audio
+- Broken encoder pipes surfaced as IOError with ffmpeg's message
+- Joining separately encoded parts with the concat demuxer, audio muxed once
+"""
+
+import subprocess
+
+import numpy as np
+import pytest
+
+from backend.pipeline.ffmpeg_io import (
+    FFmpegFrameReader,
+    FFmpegFrameWriter,
+    concat_videos,
+    ffmpeg_binary,
+)
+
+
+@pytest.fixture(scope="module")
+def media_dir(tmp_path_factory, testsrc_clip):
+    """A 1 second 64x48 test video and a 2 second tone."""
+    path = tmp_path_factory.mktemp("media")
+    testsrc_clip(path / "clip.mp4", (64, 48), fps=30)
+    subprocess.run(
+        [ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi",
+         "-i", "sine=frequency=440:duration=2", str(path / "tone.mp3")],
+        check=True
+    )
+    return path
+
+
+def _probe_frames(path) -> int:
+    """Count the video frames of a file by decoding it."""
+    with FFmpegFrameReader(str(path), (32, 24), 24) as reader:
+        count = 0
+        while reader._proc.stdout.read(32 * 24 * 3):
+            count += 1
+        return count
+
+
+class TestFFmpegFrameReader:
+    """Test the raw frame decoder."""
+
+    def test_scales_frames(self, media_dir):
+        """Frames should come out at the requested size as writable uint8."""
+        with FFmpegFrameReader(str(media_dir / "clip.mp4"), (32, 40), 24) as reader:
+            frame = reader.read_frame()
+        assert frame.shape == (40, 32, 3)
+        assert frame.dtype == np.uint8
+        assert frame.flags.writeable
+
+    def test_loops_short_input(self, media_dir):
+        """A looped 1s clip should deliver distinct frames for 2.5 seconds."""
+        with FFmpegFrameReader(
+            str(media_dir / "clip.mp4"), (64, 48), 24, duration=2.5, loop=True
+        ) as reader:
+            count = 0
+            while reader._proc.stdout.read(64 * 48 * 3):
+                count += 1
+        assert count == 60
+
+    @pytest.mark.parametrize("start_frame", [10, 34, 48])
+    def test_looped_start_matches_skipping_ahead(self, media_dir, start_frame):
+        """A looped read from an offset should continue the loop, not restart at the offset."""
+        path = str(media_dir / "clip.mp4")
+        with FFmpegFrameReader(path, (64, 48), 24, duration=3.0, loop=True) as reader:
+            frames = [reader.read_frame().copy() for _ in range(72)]
+        with FFmpegFrameReader(
+            path, (64, 48), 24, duration=3.0 - start_frame / 24, loop=True,
+            start=start_frame / 24
+        ) as reader:
+            # The first frame may be a neighbouring source frame (30 fps input)
+            reader.read_frame()
+            for expected in frames[start_frame + 1:]:
+                assert np.array_equal(reader.read_frame(), expected)
+
+    def test_repeats_last_frame_after_end(self, media_dir):
+        """Reads past the end should repeat the final frame instead of failing."""
+        with FFmpegFrameReader(str(media_dir / "clip.mp4"), (64, 48), 24) as reader:
+            for _ in range(24):
+                last = reader.read_frame().copy()
+            extra = reader.read_frame()
+        assert np.array_equal(extra, last)
+
+    def test_reads_into_caller_buffer(self, media_dir):
+        """read_frame(out=...) should fill the caller's buffer, also when repeating."""
+        out = np.zeros((48, 64, 3), dtype=np.uint8)
+        with FFmpegFrameReader(str(media_dir / "clip.mp4"), (64, 48), 24) as reader:
+            for _ in range(24):
+                assert reader.read_frame(out=out) is out
+            last = out.copy()
+            out[...] = 0
+            reader.read_frame(out=out)
+        assert np.array_equal(out, last)
+
+    def test_unreadable_input_raises(self, tmp_path):
+        """A file ffmpeg cannot decode should raise IOError."""
+        bogus = tmp_path / "bogus.mp4"
+        bogus.write_bytes(b"not a video")
+        with FFmpegFrameReader(str(bogus), (64, 48), 24) as reader:
+            with pytest.raises(IOError, match="could not decode"):
+                reader.read_frame()
+
+
+class TestFFmpegFrameWriter:
+    """Test the raw frame encoder."""
+
+    def test_writes_video_with_audio(self, media_dir, tmp_path):
+        """Written frames should all land in the output file."""
+        output = tmp_path / "out.mp4"
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        with FFmpegFrameWriter(str(output), (64, 48), 24, audio_path=str(media_dir / "tone.mp3")) as writer:
+            for i in range(12):
+                frame[:] = i * 20
+                writer.write_frame(frame)
+        assert writer.frames_written == 12
+        assert _probe_frames(output) == 12
+
+    def test_wrong_frame_size_rejected(self, tmp_path):
+        """Frames of the wrong size should be rejected before reaching ffmpeg."""
+        with pytest.raises(ValueError):
+            with FFmpegFrameWriter(str(tmp_path / "out.mp4"), (64, 48), 24) as writer:
+                writer.write_frame(np.zeros((10, 10, 3), dtype=np.uint8))
+
+    def test_broken_pipe_raises_ioerror(self, tmp_path):
+        """If ffmpeg dies, writes should raise IOError with ffmpeg's output."""
+        writer = FFmpegFrameWriter(str(tmp_path / "missing" / "out.mp4"), (64, 48), 24)
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        with pytest.raises(IOError, match="ffmpeg encoder"):
+            for _ in range(1000):
+                writer.write_frame(frame)
+            writer.close()
+        writer.abort()
+
+
+class TestConcatVideos:
+    """Test joining separately encoded parts."""
+
+    def test_joins_parts_with_audio(self, media_dir, tmp_path):
+        """Every part's frames should land in the output, with the audio muxed in."""
+        parts = []
+        for i, count in enumerate((12, 20)):
+            part = tmp_path / f"part '{i}'.mp4"
+            frame = np.full((48, 64, 3), 60 * (i + 1), dtype=np.uint8)
+            with FFmpegFrameWriter(str(part), (64, 48), 24) as writer:
+                for _ in range(count):
+                    writer.write_frame(frame)
+            parts.append(str(part))
+
+        output = tmp_path / "joined.mp4"
+        concat_videos(parts, str(output), str(media_dir / "tone.mp3"), audio_duration=32 / 24)
+        assert _probe_frames(output) == 32
+        probe = subprocess.run(
+            [ffmpeg_binary(), "-hide_banner", "-i", str(output)], capture_output=True, text=True
+        )
+        assert "Audio: aac" in probe.stderr
+
+    def test_missing_part_raises(self, tmp_path):
+        """A part that does not exist should raise IOError."""
+        with pytest.raises(IOError, match="ffmpeg failed"):
+            concat_videos([str(tmp_path / "missing.mp4")], str(tmp_path / "out.mp4"))
@@ -0,0 +1,61 @@
+"""
+Tests for the font registry.
+
+Tests cover:
+- Resolving the bundled Montserrat face from assets/fonts
+- Fallback order and Pillow's default font as last resort
+- Per-size font object reuse
+"""
+
+from pathlib import Path
+from unittest.mock import patch
+
+from PIL import ImageFont
+
+from backend.pipeline.fonts import FontRegistry, font_registry, get_font
+
+
+ASSET_FONTS = Path(__file__).parents[2] / "assets" / "fonts"
+
+
+class TestFontRegistry:
+    """Test font resolution and caching."""
+
+    def test_resolves_bundled_font(self):
+        """The process-wide registry should find Montserrat Bold in assets/fonts."""
+        assert font_registry.path == str(ASSET_FONTS / "Montserrat-Bold.ttf")
+        assert "Montserrat" in font_registry.describe()
+
+    def test_fonts_reused_per_size(self):
+        """Renderers asking for the same size should share one font object."""
+        assert get_font(52) is get_font(52)
+        assert get_font(52).size == 52
+        assert get_font(24) is not get_font(52)
+
+    def test_resolves_only_once(self):
+        """The fallback chain should be walked once, not per call."""
+        registry = FontRegistry([ASSET_FONTS], ["Montserrat-Bold.ttf"], [])
+        with patch("backend.pipeline.fonts.ImageFont.truetype", wraps=ImageFont.truetype) as truetype:
+            for size in (52, 52, 52, 24):
+                registry.get(size)
+        # One probe during resolution, then one load per distinct size
+        assert truetype.call_count == 3
+
+    def test_skips_missing_and_broken_files(self, tmp_path):
+        """Missing or unreadable candidates should be skipped."""
+        broken = tmp_path / "Broken.ttf"
+        broken.write_bytes(b"not a font")
+        registry = FontRegistry(
+            [tmp_path / "missing", tmp_path],
+            ["Broken.ttf", "Montserrat-Bold.ttf"],
+            [str(ASSET_FONTS / "Montserrat-ExtraBold.ttf")],
+        )
+        assert registry.path == str(ASSET_FONTS / "Montserrat-ExtraBold.ttf")
+
+    def test_default_font_as_last_resort(self, tmp_path):
+        """With no usable files, Pillow's default font is used at the requested size."""
+        registry = FontRegistry([tmp_path], ["Montserrat-Bold.ttf"], [])
+        font = registry.get(40)
+        assert registry.path is None
+        assert font.size == 40
+        assert "default" in registry.describe()
@@ -0,0 +1,69 @@
+"""
+Tests for the reusable frame buffer pool.
+
+Tests cover:
+- Released buffers handed out again instead of new allocations
+- Allocation counters and allocations per frame
+- max_free bounding (and disabling) reuse
+- Buffers acquired and released across threads
+"""
+
+import threading
+
+import numpy as np
+
+from backend.pipeline.frame_buffers import FramePool
+
+
+class TestFramePool:
+    """Test FramePool."""
+
+    def test_released_buffer_is_reused(self):
+        pool = FramePool((4, 6, 3))
+        first = pool.acquire()
+        assert first.shape == (4, 6, 3) and first.dtype == np.uint8
+        pool.release(first)
+        assert pool.acquire() is first
+        assert pool.stats()["allocated"] == 1
+
+    def test_counters(self):
+        pool = FramePool((2, 2, 3))
+        in_flight = [pool.acquire() for _ in range(3)]
+        for buffer in in_flight:
+            pool.release(buffer)
+        for _ in range(7):
+            pool.release(pool.acquire())
+        stats = pool.stats()
+        assert stats["acquired"] == 10
+        assert stats["allocated"] == 3
+        assert stats["reused"] == 7
+        assert stats["allocations_per_frame"] == 0.3
+        assert stats["free"] == 3
+        assert stats["bytes_allocated"] == 3 * 12
+
+    def test_max_free_zero_disables_reuse(self):
+        pool = FramePool((2, 2, 3), max_free=0)
+        for _ in range(5):
+            pool.release(pool.acquire())
+        assert pool.stats()["allocations_per_frame"] == 1.0
+
+    def test_release_from_other_thread(self):
+        """A producer/consumer pair should settle on a handful of buffers."""
+        pool = FramePool((8, 8, 3))
+        handoff = []
+        ready = threading.Semaphore(0)
+
+        def consumer():
+            for _ in range(200):
+                ready.acquire()
+                pool.release(handoff.pop())
+
+        thread = threading.Thread(target=consumer)
+        thread.start()
+        for _ in range(200):
+            handoff.append(pool.acquire())
+            ready.release()
+        thread.join()
+        stats = pool.stats()
+        assert stats["acquired"] == 200
+        assert stats["free"] == stats["allocated"]
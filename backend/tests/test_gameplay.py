@@ -0,0 +1,286 @@
+"""
+Tests for the gameplay proxy cache.
+
+Tests cover:
+- Proxies at the exact output size and frame rate, with dense keyframes
+- 16:9 sources center-cropped to 9:16 instead of squashed
+- Proxies cached by content hash (copies share one, edits get a new one)
+- Ingesting every clip of a gameplay directory, deleting proxies of edited or removed clips
+- Probing clip metadata, with or without ffprobe
+- The clip index refreshing only when the directory changes
+- Selection preferring long-enough clips, then clips at the output format
+- Long proxies split at keyframes into segments, and offsets mapped into them
+- Random starts on keyframes, inside a segment that covers the video
+"""
+
+import os
+import re
+import shutil
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from backend.pipeline.ffmpeg_io import FFmpegFrameReader, ffmpeg_binary
+from backend.pipeline.gameplay import (
+    ClipIndex,
+    ClipInfo,
+    GameplaySegment,
+    get_gameplay_proxy,
+    get_gameplay_segments,
+    ingest_gameplay,
+    locate_gameplay,
+    probe_clip,
+    proxy_path,
+    random_gameplay_start,
+)
+
+RESOLUTION = (90, 160)
+
+
+@pytest.fixture(scope="module")
+def wide_clip(tmp_path_factory):
+    """A 2s 320x180 (16:9) 30 fps clip: blue, with a red band in the middle third."""
+    path = tmp_path_factory.mktemp("gameplay") / "wide.mp4"
+    subprocess.run(
+        [ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi",
+         "-i", "color=c=blue:s=320x180:r=30:d=2",
+         "-vf", "drawbox=x=110:y=0:w=100:h=180:color=red:t=fill",
+         "-pix_fmt", "yuv420p", str(path)],
+        check=True
+    )
+    return path
+
+
+class TestGameplayProxy:
+    """Test get_gameplay_proxy."""
+
+    def test_matches_output_format(self, wide_clip):
+        """The proxy should be at the output size and frame rate."""
+        proxy = get_gameplay_proxy(str(wide_clip), RESOLUTION, 24)
+        infos = ffmpeg_parse_infos(proxy)
+        assert tuple(infos["video_size"]) == RESOLUTION
+        assert infos["video_fps"] == 24
+        assert infos["duration"] == pytest.approx(2.0, abs=0.1)
+
+    def test_keyframe_every_second(self, wide_clip):
+        """Keyframes should come every second, so seeks decode little."""
+        proxy = get_gameplay_proxy(str(wide_clip), RESOLUTION, 24)
+        result = subprocess.run(
+            [ffmpeg_binary(), "-hide_banner", "-i", proxy, "-vf", "showinfo", "-f", "null", "-"],
+            capture_output=True, text=True
+        )
+        assert len(re.findall(r"iskey:1", result.stderr)) == 2
+
+    def test_center_cropped_not_squashed(self, wide_clip):
+        """The middle of a 16:9 source should fill the 9:16 frame."""
+        proxy = get_gameplay_proxy(str(wide_clip), RESOLUTION, 24)
+        with FFmpegFrameReader(proxy, RESOLUTION, 24) as reader:
+            frame = reader.read_frame().astype(int)
+        # Squashing would keep the blue sides; cropping leaves only the red band
+        red, blue = frame[..., 0].mean(), frame[..., 2].mean()
+        assert red > 200 and blue < 50
+
+    def test_cached(self, wide_clip):
+        """A second request should reuse the proxy without running ffmpeg."""
+        first = get_gameplay_proxy(str(wide_clip), RESOLUTION, 24)
+        with patch("backend.pipeline.gameplay.run_ffmpeg") as run:
+            assert get_gameplay_proxy(str(wide_clip), RESOLUTION, 24) == first
+        run.assert_not_called()
+
+    def test_keyed_by_content(self, wide_clip, tmp_path):
+        """A copy of a clip maps to the same proxy; a different clip does not."""
+        copy = tmp_path / "copy.mp4"
+        shutil.copy(wide_clip, copy)
+        assert proxy_path(str(copy), RESOLUTION, 24).name == proxy_path(str(wide_clip), RESOLUTION, 24).name
+
+        other = tmp_path / "other.mp4"
+        other.write_bytes(wide_clip.read_bytes() + b"\0")
+        assert proxy_path(str(other), RESOLUTION, 24).name != proxy_path(str(wide_clip), RESOLUTION, 24).name
+        assert proxy_path(str(wide_clip), (180, 320), 24) != proxy_path(str(wide_clip), RESOLUTION, 24)
+
+    def test_unreadable_clip_raises(self, tmp_path):
+        """A clip ffmpeg cannot decode should raise IOError and leave no partial proxy."""
+        bogus = tmp_path / "bogus.mp4"
+        bogus.write_bytes(b"not a video")
+        with pytest.raises(IOError):
+            get_gameplay_proxy(str(bogus), RESOLUTION, 24)
+        assert not list((tmp_path / ".proxies").glob("*"))
+
+
+class TestIngestGameplay:
+    """Test ingest_gameplay."""
+
+    def test_creates_every_proxy(self, wide_clip, tmp_path):
+        shutil.copy(wide_clip, tmp_path / "a.mp4")
+        (tmp_path / "b.mp4").write_bytes(b"not a video")
+        proxies = ingest_gameplay(str(tmp_path), RESOLUTION, 24)
+        assert proxies[str(tmp_path / "b.mp4")] is None
+        proxy = proxies[str(tmp_path / "a.mp4")]
+        assert proxy.startswith(str(tmp_path / ".proxies"))
+        # The proxy directory is not mistaken for clips on the next ingest
+        assert set(ingest_gameplay(str(tmp_path), RESOLUTION, 24)) == set(proxies)
+        assert np.isclose(ffmpeg_parse_infos(proxy)["duration"], 2.0, atol=0.1)
+
+    def test_deletes_stale_proxies(self, wide_clip, tmp_path):
+        shutil.copy(wide_clip, tmp_path / "a.mp4")
+        old = Path(ingest_gameplay(str(tmp_path), RESOLUTION, 24)[str(tmp_path / "a.mp4")])
+        old_segments = old.with_suffix(".segments")
+        old_segments.mkdir()
+        older_version = old.with_name(old.name.replace("_v1.mp4", "_v0.mp4"))
+        older_version.write_bytes(b"proxy")
+        partial = old.with_suffix(".123.part.mp4")
+        partial.write_bytes(b"transcoding")
+
+        # Edit the clip: its proxy is now named by the new contents
+        (tmp_path / "a.mp4").unlink()
+        _make_clip(tmp_path / "b.mp4")
+        new = Path(ingest_gameplay(str(tmp_path), RESOLUTION, 24)[str(tmp_path / "b.mp4")])
+
+        assert new.exists()
+        assert not old.exists() and not old_segments.exists() and not older_version.exists()
+        assert partial.exists()
+
+
+def _make_clip(path, size="90x160", fps=24, seconds=1):
+    subprocess.run(
+        [ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi",
+         "-i", f"color=c=green:s={size}:r={fps}:d={seconds}", "-pix_fmt", "yuv420p", str(path)],
+        check=True
+    )
+
+
+class TestProbeClip:
+    """Test probe_clip."""
+
+    def test_reads_metadata(self, wide_clip):
+        info = probe_clip(str(wide_clip))
+        assert info.duration == pytest.approx(2.0, abs=0.1)
+        assert (info.width, info.height) == (320, 180)
+        assert info.fps == pytest.approx(30)
+        assert (info.codec, info.pix_fmt) == ("h264", "yuv420p")
+
+    def test_without_ffprobe(self, wide_clip):
+        """Parsing ffmpeg's stream summary should give the same metadata."""
+        with patch("backend.pipeline.gameplay.ffprobe_binary", return_value=None):
+            info = probe_clip(str(wide_clip))
+        assert info == ClipInfo(str(wide_clip), 2.0, 320, 180, 30.0, "h264", "yuv420p")
+
+    def test_unreadable_clip_raises(self, tmp_path):
+        bogus = tmp_path / "bogus.mp4"
+        bogus.write_bytes(b"not a video")
+        with pytest.raises(IOError):
+            probe_clip(str(bogus))
+
+
+class TestClipIndex:
+    """Test ClipIndex."""
+
+    def test_probes_each_clip_once(self, wide_clip, tmp_path):
+        shutil.copy(wide_clip, tmp_path / "a.mp4")
+        index = ClipIndex(str(tmp_path))
+        assert [info.path for info in index.clips()] == [str(tmp_path / "a.mp4")]
+        with patch("backend.pipeline.gameplay.probe_clip") as probe:
+            index.clips()
+        probe.assert_not_called()
+
+    def test_refreshes_when_directory_changes(self, wide_clip, tmp_path):
+        shutil.copy(wide_clip, tmp_path / "a.mp4")
+        index = ClipIndex(str(tmp_path))
+        index.clips()
+        shutil.copy(wide_clip, tmp_path / "b.mp4")
+        # Make sure the directory's mtime moves even on coarse-grained filesystems
+        os.utime(tmp_path, ns=(0, os.stat(tmp_path).st_mtime_ns + 1))
+        with patch("backend.pipeline.gameplay.probe_clip", wraps=probe_clip) as probe:
+            assert len(index.clips()) == 2
+        probe.assert_called_once_with(str(tmp_path / "b.mp4"))
+
+    def test_unprobeable_clip_kept_with_unknown_metadata(self, tmp_path):
+        (tmp_path / "bogus.mp4").write_bytes(b"not a video")
+        assert ClipIndex(str(tmp_path)).clips() == [ClipInfo(str(tmp_path / "bogus.mp4"))]
+
+    def test_missing_directory_is_empty(self, tmp_path):
+        index = ClipIndex(str(tmp_path / "missing"))
+        assert index.clips() == []
+        assert index.select(duration=10) is None
+
+    def test_prefers_clips_long_enough(self, tmp_path):
+        _make_clip(tmp_path / "short.mp4", seconds=1)
+        _make_clip(tmp_path / "long.mp4", size="320x180", fps=30, seconds=3)
+        index = ClipIndex(str(tmp_path))
+        for _ in range(5):
+            assert index.select(duration=2.5, resolution=RESOLUTION, fps=24).path.endswith("long.mp4")
+
+    def test_then_prefers_output_format(self, tmp_path):
+        _make_clip(tmp_path / "native.mp4", size="90x160", fps=24)
+        _make_clip(tmp_path / "wide.mp4", size="320x180", fps=30)
+        index = ClipIndex(str(tmp_path))
+        for _ in range(5):
+            assert index.select(duration=1, resolution=RESOLUTION, fps=24).path.endswith("native.mp4")
+
+    def test_picks_among_all_without_requirements(self, tmp_path):
+        _make_clip(tmp_path / "a.mp4")
+        (tmp_path / "bogus.mp4").write_bytes(b"not a video")
+        index = ClipIndex(str(tmp_path))
+        picks = {index.select().path for _ in range(50)}
+        assert picks == {str(tmp_path / "a.mp4"), str(tmp_path / "bogus.mp4")}
+
+
+class TestGameplaySegments:
+    """Test get_gameplay_segments, random_gameplay_start and locate_gameplay."""
+
+    @pytest.fixture
+    def long_proxy(self, tmp_path):
+        """The proxy of a 5s clip, long enough to split into 2s segments."""
+        _make_clip(tmp_path / "long.mp4", size="320x180", fps=30, seconds=5)
+        with patch("backend.pipeline.gameplay.GAMEPLAY_SEGMENT_SECONDS", 2.0):
+            proxy = get_gameplay_proxy(str(tmp_path / "long.mp4"), RESOLUTION, 24)
+            yield proxy, get_gameplay_segments(proxy)
+
+    def test_split_at_keyframes(self, long_proxy):
+        proxy, segments = long_proxy
+        assert [(seg.start, seg.end) for seg in segments] == [
+            pytest.approx((0.0, 2.0)), pytest.approx((2.0, 4.0)), pytest.approx((4.0, 5.0))
+        ]
+        # Each segment starts with the proxy's frame at the segment start
+        for segment in segments:
+            with FFmpegFrameReader(proxy, RESOLUTION, 24, loop=True, duration=0.1,
+                                   start=segment.start) as whole, \
+                    FFmpegFrameReader(segment.path, RESOLUTION, 24) as part:
+                np.testing.assert_array_equal(whole.read_frame(), part.read_frame())
+
+    def test_cached(self, long_proxy):
+        proxy, segments = long_proxy
+        with patch("backend.pipeline.gameplay.run_ffmpeg") as run:
+            assert get_gameplay_segments(proxy) == segments
+        run.assert_not_called()
+
+    def test_short_proxy_is_one_segment(self, wide_clip):
+        proxy = get_gameplay_proxy(str(wide_clip), RESOLUTION, 24)
+        segments = get_gameplay_segments(proxy)
+        assert len(segments) == 1
+        assert segments[0].path == proxy
+        assert segments[0].end == pytest.approx(2.0, abs=0.1)
+
+    def test_locate(self, long_proxy):
+        proxy, segments = long_proxy
+        assert locate_gameplay(proxy, segments, 2.0, 1.5) == (segments[1].path, pytest.approx(0.0))
+        # A read across a segment boundary uses the whole proxy
+        assert locate_gameplay(proxy, segments, 1.0, 1.5) == (proxy, 1.0)
+
+    def test_random_start_fits_a_segment(self):
+        segments = [GameplaySegment("a", 0.0, 300.0), GameplaySegment("b", 300.0, 600.0),
+                    GameplaySegment("c", 600.0, 630.0)]
+        for _ in range(50):
+            start = random_gameplay_start(segments, 60.0)
+            assert start == int(start)
+            assert locate_gameplay("clip", segments, start, 60.0)[0] in ("a", "b")
+
+    def test_random_start_in_short_clip(self):
+        segments = [GameplaySegment("a", 0.0, 10.0)]
+        starts = {random_gameplay_start(segments, 60.0) for _ in range(100)}
+        assert starts <= set(range(10))
+        assert len(starts) > 1
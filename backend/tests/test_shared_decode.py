@@ -0,0 +1,286 @@
+"""
+Tests for shared gameplay decoding.
+
+Tests cover:
+- Shared readers returning the frames of a private looped reader
+- Concurrent readers of one clip and offset sharing a decoder, in and across processes
+- Readers of a later offset joining the decoder at their own frame
+- Readers that arrive late, start before the decoder or read past its end decoding privately
+- Rings left behind by a dead process replaced instead of joined, and swept
+- Start offsets picked to join a running decoder, only when SHARED_DECODE_LIVE_START is on
+- Per-clip and per-reader counts of decodes started and avoided
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from backend.pipeline import shared_decode
+from backend.pipeline.ffmpeg_io import FFmpegFrameReader
+from backend.pipeline.gameplay import GameplaySegment
+from backend.pipeline.shared_decode import (
+    SharedGameplayReader,
+    live_gameplay_start,
+    open_gameplay_reader,
+    shared_decode_stats,
+    sweep_orphaned_rings,
+)
+
+SIZE = (64, 36)
+FPS = 24
+
+
+@pytest.fixture(scope="module")
+def clip(tmp_path_factory, testsrc_clip):
+    """A 1s clip whose frames all differ, so a wrong frame index shows."""
+    return str(testsrc_clip(tmp_path_factory.mktemp("shared") / "clip.mp4", SIZE, fps=FPS))
+
+
+def _read_all(reader, frames: int) -> list[np.ndarray]:
+    return [reader.read_frame().copy() for _ in range(frames)]
+
+
+def _reference(clip, duration, start=0.0):
+    with FFmpegFrameReader(clip, SIZE, FPS, duration=duration, loop=True, start=start) as reader:
+        return _read_all(reader, round(duration * FPS))
+
+
+def _read_concurrently(*readers) -> list[list[np.ndarray]]:
+    """Read each (reader, frame count) on its own thread; return the frames in order."""
+    results = [None] * len(readers)
+
+    def read(index, reader, frames):
+        with reader:
+            results[index] = _read_all(reader, frames)
+
+    threads = [threading.Thread(target=read, args=(i, reader, frames))
+               for i, (reader, frames) in enumerate(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _orphan(clip, start):
+    """Open a ring and make its decoder look like it belongs to a dead process."""
+    orphan = SharedGameplayReader(clip, SIZE, FPS, 1.0, start=start)
+    dead = multiprocessing.get_context("spawn").Process(target=int)
+    dead.start()
+    dead.join()
+    orphan._header[shared_decode._OWNER] = dead.pid
+    return orphan
+
+
+def _release(orphan):
+    # The orphan's mapping outlives the unlinked name; just release it
+    orphan._header[shared_decode._POSITIONS + orphan._slot] = -1
+    orphan._decoder.join()
+    orphan._unmap()
+
+
+def _join_in_child(clip: str, duration: float, start: float):
+    """Read every frame from another process (runs in a spawned worker)."""
+    with SharedGameplayReader(clip, SIZE, FPS, duration, start=start) as reader:
+        frames = _read_all(reader, round(duration * FPS))
+        return reader.shared, shared_decode_stats(), frames
+
+
+class TestSharedGameplayReader:
+    """Test SharedGameplayReader."""
+
+    def test_matches_private_reader(self, clip):
+        expected = _reference(clip, 2.0, start=0.25)
+        with SharedGameplayReader(clip, SIZE, FPS, 2.0, start=0.25) as reader:
+            assert reader.shared
+            actual = _read_all(reader, len(expected))
+        for a, b in zip(actual, expected):
+            np.testing.assert_array_equal(a, b)
+
+    def test_concurrent_readers_share_a_decoder(self, clip):
+        expected = _reference(clip, 2.0, start=0.5)
+        before = shared_decode_stats().get(clip, {"decodes": 0, "decodes_avoided": 0})
+        first = SharedGameplayReader(clip, SIZE, FPS, 2.0, start=0.5)
+        second = SharedGameplayReader(clip, SIZE, FPS, 2.0, start=0.5)
+        assert first.shared and second.shared
+
+        results = {}
+
+        def read(name, reader):
+            with reader:
+                results[name] = _read_all(reader, len(expected))
+
+        threads = [threading.Thread(target=read, args=(name, reader))
+                   for name, reader in (("first", first), ("second", second))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for frames in results.values():
+            for a, b in zip(frames, expected):
+                np.testing.assert_array_equal(a, b)
+
+        after = shared_decode_stats()[clip]
+        assert after["decodes"] == before["decodes"] + 1
+        assert after["decodes_avoided"] == before["decodes_avoided"] + 1
+
+    def test_shared_across_processes(self, clip):
+        expected = _reference(clip, 1.5, start=0.75)
+        owner = SharedGameplayReader(clip, SIZE, FPS, 1.5, start=0.75)
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            child = pool.apply_async(_join_in_child, (clip, 1.5, 0.75))
+            # Hold the ring at frame 0 until the child has joined
+            deadline = time.monotonic() + 60
+            positions = owner._header[shared_decode._POSITIONS:shared_decode._PIDS]
+            while (positions >= 0).sum() < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            del positions
+            with owner:
+                # Serve the child: the decoder waits for the slowest reader
+                owner_frames = _read_all(owner, len(expected))
+            shared, child_stats, child_frames = child.get(timeout=60)
+        assert shared
+        assert child_stats[clip] == {"decodes": 0, "decodes_avoided": 1}
+        for a, b, c in zip(owner_frames, child_frames, expected):
+            np.testing.assert_array_equal(a, c)
+            np.testing.assert_array_equal(b, c)
+
+    def test_later_offset_joins_at_its_frame(self, clip):
+        expected = _reference(clip, 1.0, start=0.5)
+        owner = SharedGameplayReader(clip, SIZE, FPS, 2.0, start=0.25)
+        joiner = SharedGameplayReader(clip, SIZE, FPS, 1.0, start=0.5)
+        assert joiner.shared and joiner._first == 6
+        _, actual = _read_concurrently((owner, 2 * FPS), (joiner, FPS))
+        for a, b in zip(actual, expected):
+            np.testing.assert_array_equal(a, b)
+        assert (owner.decodes, owner.decodes_avoided) == (1, 0)
+        assert (joiner.decodes, joiner.decodes_avoided) == (0, 1)
+
+    @pytest.mark.parametrize("start", [0.25, 0.51])
+    def test_offset_before_decoder_or_between_frames_decodes_privately(self, clip, start):
+        expected = _reference(clip, 1.0, start=start)
+        with SharedGameplayReader(clip, SIZE, FPS, 1.0, start=0.5):
+            with SharedGameplayReader(clip, SIZE, FPS, 1.0, start=start) as reader:
+                assert not reader.shared
+                actual = _read_all(reader, FPS)
+        for a, b in zip(actual, expected):
+            np.testing.assert_array_equal(a, b)
+
+    def test_late_reader_decodes_privately(self, clip):
+        expected = _reference(clip, 2.0)
+        with patch.object(shared_decode, "RING_FRAMES", 4):
+            with SharedGameplayReader(clip, SIZE, FPS, 2.0) as first:
+                _read_all(first, 10)
+                with SharedGameplayReader(clip, SIZE, FPS, 2.0) as late:
+                    assert not late.shared
+                    actual = _read_all(late, len(expected))
+        for a, b in zip(actual, expected):
+            np.testing.assert_array_equal(a, b)
+
+    def test_reads_past_the_decoders_end_privately(self, clip):
+        expected = _reference(clip, 2.0, start=0.125)
+        with SharedGameplayReader(clip, SIZE, FPS, 1.0, start=0.125) as short, \
+                SharedGameplayReader(clip, SIZE, FPS, 2.0, start=0.125) as long:
+            assert long.shared
+            short_frames = []
+            long_frames = []
+            for _ in range(FPS):
+                short_frames.append(short.read_frame().copy())
+                long_frames.append(long.read_frame().copy())
+            short.close()
+            long_frames += _read_all(long, len(expected) - FPS)
+        for a, b in zip(long_frames, expected):
+            np.testing.assert_array_equal(a, b)
+        for a, b in zip(short_frames, expected):
+            np.testing.assert_array_equal(a, b)
+
+    def test_repeats_last_frame_past_duration(self, clip):
+        with SharedGameplayReader(clip, SIZE, FPS, 0.5) as reader:
+            frames = _read_all(reader, 14)
+        np.testing.assert_array_equal(frames[-1], frames[11])
+
+    def test_ring_of_dead_process_replaced(self, clip):
+        orphan = _orphan(clip, 0.375)
+        try:
+            with SharedGameplayReader(clip, SIZE, FPS, 1.0, start=0.375) as reader:
+                assert reader.shared and reader._owner
+                actual = _read_all(reader, FPS)
+        finally:
+            _release(orphan)
+        for a, b in zip(actual, _reference(clip, 1.0, start=0.375)):
+            np.testing.assert_array_equal(a, b)
+
+    def test_unreadable_clip_raises(self, tmp_path):
+        bogus = tmp_path / "bogus.mp4"
+        bogus.write_bytes(b"not a video")
+        with SharedGameplayReader(str(bogus), SIZE, FPS, 1.0) as reader:
+            with pytest.raises(IOError):
+                reader.read_frame()
+
+
+class TestSweepOrphanedRings:
+    """Test sweep_orphaned_rings."""
+
+    def test_removes_rings_of_dead_processes_only(self, clip, tmp_path):
+        other = tmp_path / "other.mp4"
+        other.write_bytes(open(clip, "rb").read())
+        # Opened first: creating a ring sweeps too
+        live = SharedGameplayReader(str(other), SIZE, FPS, 1.0)
+        orphan = _orphan(clip, 0.0)
+        try:
+            assert sweep_orphaned_rings() == 1
+            assert not os.path.exists(f"/dev/shm/{orphan._name}")
+            assert os.path.exists(f"/dev/shm/{live._name}")
+        finally:
+            _release(orphan)
+            live.close()
+
+
+class TestLiveGameplayStart:
+    """Test live_gameplay_start."""
+
+    def test_joins_running_decoder(self, clip):
+        segments = [GameplaySegment(clip, 0.0, 1.0)]
+        with patch.object(shared_decode, "LIVE_START", True), \
+                patch.object(shared_decode, "JOIN_AHEAD_S", 0.25):
+            assert live_gameplay_start(segments, SIZE, FPS, 0.5) is None
+            owner = SharedGameplayReader(clip, SIZE, FPS, 1.0, start=0.125)
+            start = live_gameplay_start(segments, SIZE, FPS, 0.5)
+            assert start == pytest.approx(0.375)
+            # Too long to fit in the segment from there
+            assert live_gameplay_start(segments, SIZE, FPS, 0.75) is None
+            joiner = SharedGameplayReader(clip, SIZE, FPS, 0.5, start=start)
+            assert joiner.shared
+            _, actual = _read_concurrently((owner, FPS), (joiner, FPS // 2))
+        for a, b in zip(actual, _reference(clip, 0.5, start=0.375)):
+            np.testing.assert_array_equal(a, b)
+
+    def test_none_when_disabled(self, clip):
+        with SharedGameplayReader(clip, SIZE, FPS, 1.0), \
+                patch.object(shared_decode, "LIVE_START", True), \
+                patch.object(shared_decode, "SHARED_DECODE", False):
+            assert live_gameplay_start([GameplaySegment(clip, 0.0, 1.0)], SIZE, FPS, 0.1) is None
+
+    def test_off_by_default(self, clip):
+        """Random starts stay random unless SHARED_DECODE_LIVE_START is set."""
+        assert not shared_decode.LIVE_START
+        with SharedGameplayReader(clip, SIZE, FPS, 1.0):
+            assert live_gameplay_start([GameplaySegment(clip, 0.0, 1.0)], SIZE, FPS, 0.1) is None
+
+
+class TestOpenGameplayReader:
+    """Test open_gameplay_reader."""
+
+    def test_shared_by_default(self, clip):
+        with open_gameplay_reader(clip, SIZE, FPS, 1.0) as reader:
+            assert isinstance(reader, SharedGameplayReader)
+
+    def test_private_when_disabled(self, clip):
+        with patch.object(shared_decode, "SHARED_DECODE", False):
+            with open_gameplay_reader(clip, SIZE, FPS, 1.0) as reader:
+                assert isinstance(reader, FFmpegFrameReader)
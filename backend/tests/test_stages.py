@@ -0,0 +1,81 @@
+"""
+Tests for the threaded frame stage pipeline.
+
+Tests cover:
+- Items flowing through every stage in order
+- Per-stage item counts and the busiest stage reported as the bottleneck
+- Bounded queues keeping a fast source from running far ahead
+- A failing stage stopping the others and re-raising its exception
+"""
+
+import itertools
+import threading
+import time
+
+import pytest
+
+from backend.pipeline.stages import bottleneck, run_pipeline
+
+
+class TestRunPipeline:
+    """Test run_pipeline."""
+
+    def test_items_pass_through_in_order(self):
+        """Every stage should see every item, in source order."""
+        seen = []
+        stats = run_pipeline(
+            ("source", range(100)),
+            [("double", lambda x: 2 * x), ("collect", seen.append)],
+        )
+        assert seen == [2 * x for x in range(100)]
+        assert [stage.name for stage in stats] == ["source", "double", "collect"]
+        assert [stage.items for stage in stats] == [100, 100, 100]
+
+    def test_slow_stage_is_the_bottleneck(self):
+        """The slow stage should be busiest and the stage after it starved."""
+        def slow(x):
+            time.sleep(0.01)
+            return x
+
+        stats = run_pipeline(
+            ("source", range(20)), [("slow", slow), ("sink", lambda x: None)], depth=2
+        )
+        assert bottleneck(stats) == "slow"
+        assert stats[2].starved_s > 0.1
+        assert stats[0].blocked_s > 0.1
+
+    def test_queues_are_bounded(self):
+        """A source feeding a blocked stage should stop after filling the queue."""
+        produced = []
+        release = threading.Event()
+
+        def source():
+            for i in range(50):
+                produced.append(i)
+                yield i
+
+        def wait(x):
+            release.wait()
+            return x
+
+        thread = threading.Thread(
+            target=run_pipeline, args=(("source", source()), [("wait", wait)]),
+            kwargs={"depth": 3}
+        )
+        thread.start()
+        time.sleep(0.3)
+        # One item held by the stage, three queued, one waiting to be put
+        assert len(produced) <= 5
+        release.set()
+        thread.join()
+        assert len(produced) == 50
+
+    def test_failure_stops_pipeline(self):
+        """An exception in one stage should stop an endless source and propagate."""
+        def explode(x):
+            if x == 10:
+                raise IOError("encoder died")
+            return x
+
+        with pytest.raises(IOError, match="encoder died"):
+            run_pipeline(("source", itertools.count()), [("explode", explode), ("sink", lambda x: None)])
@@ -0,0 +1,61 @@
+"""
+Tests for SubRip and WebVTT caption tracks.
+
+Tests cover:
+- SRT and WebVTT timestamp formatting
+- One numbered SRT block per cue with the text as written
+- WebVTT markup escaped
+- WebVTT inline word timestamps kept inside the cue and in order
+"""
+
+from backend.pipeline.subtitles import SubtitleCue, build_srt, build_webvtt, srt_time, vtt_time
+
+
+CUES = [
+    SubtitleCue(0.0, 1.5, [("no", 0.0), ("cap", 0.4), ("fr", 0.9)]),
+    SubtitleCue(1.5, 3661.25, [("a<b", 1.5), ("&c", 2.0)]),
+]
+
+
+class TestTimestamps:
+    """Test timestamp formatting."""
+
+    def test_srt_time(self):
+        assert srt_time(3661.25) == "01:01:01,250"
+        assert srt_time(0.0004) == "00:00:00,000"
+
+    def test_vtt_time(self):
+        assert vtt_time(59.9999) == "00:01:00.000"
+        assert vtt_time(-1) == "00:00:00.000"
+
+
+class TestBuildSrt:
+    """Test SubRip output."""
+
+    def test_numbered_blocks(self):
+        assert build_srt(CUES) == (
+            "1\n00:00:00,000 --> 00:00:01,500\nno cap fr\n"
+            "\n"
+            "2\n00:00:01,500 --> 01:01:01,250\na<b &c\n"
+        )
+
+    def test_empty(self):
+        assert build_srt([]) == ""
+
+
+class TestBuildWebvtt:
+    """Test WebVTT output."""
+
+    def test_word_timestamps(self):
+        assert build_webvtt(CUES) == (
+            "WEBVTT\n"
+            "\n"
+            "00:00:00.000 --> 00:00:01.500\nno <00:00:00.400>cap <00:00:00.900>fr\n"
+            "\n"
+            "00:00:01.500 --> 01:01:01.250\na&lt;b <00:00:02.000>&amp;c\n"
+        )
+
+    def test_out_of_range_timestamps_dropped(self):
+        cue = SubtitleCue(1.0, 2.0, [("a", 1.0), ("b", 0.5), ("c", 1.5), ("d", 1.2), ("e", 2.5)])
+        text = build_webvtt([cue]).splitlines()[-1]
+        assert text == "a b <00:00:01.500>c d e"
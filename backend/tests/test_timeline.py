@@ -0,0 +1,77 @@
+"""
+Tests for the timeline interval index.
+
+Tests cover:
+- Half-open [start, end) lookups at and between boundaries
+- Overlapping and open-ended intervals
+- Agreement with a linear scan on a long word timeline
+"""
+
+import random
+
+from backend.pipeline.timeline import IntervalIndex
+
+
+class TestIntervalIndex:
+    """Test IntervalIndex lookups."""
+
+    def test_empty_index(self):
+        """An empty index should never report active intervals."""
+        index = IntervalIndex([])
+        assert len(index) == 0
+        assert index.active(0.0) == ()
+        assert not index.any_active(5.0)
+
+    def test_half_open_boundaries(self):
+        """Start is inclusive, end is exclusive."""
+        index = IntervalIndex([(1.0, 2.0)])
+        assert index.active(0.999) == ()
+        assert index.active(1.0) == (0,)
+        assert index.active(1.5) == (0,)
+        assert index.active(2.0) == ()
+
+    def test_back_to_back_intervals(self):
+        """Consecutive word clips should hand over exactly at the shared boundary."""
+        index = IntervalIndex([(0.0, 0.5), (0.5, 1.0), (1.0, 1.2)])
+        assert index.active(0.25) == (0,)
+        assert index.active(0.5) == (1,)
+        assert index.active(1.1) == (2,)
+        assert index.active(1.2) == ()
+
+    def test_overlaps_keep_insertion_order(self):
+        """Overlapping intervals are reported in layer (insertion) order."""
+        index = IntervalIndex([(0.0, 10.0), (2.0, 4.0), (1.0, 3.0)])
+        assert index.active(2.5) == (0, 1, 2)
+        assert index.active(3.5) == (0, 1)
+
+    def test_open_ended_interval(self):
+        """An end of None stays active forever."""
+        index = IntervalIndex([(0.0, None), (1.0, 2.0)])
+        assert index.active(1.5) == (0, 1)
+        assert index.active(1000.0) == (0,)
+
+    def test_empty_interval_ignored(self):
+        """Zero-length intervals are never active."""
+        index = IntervalIndex([(1.0, 1.0), (1.0, 2.0)])
+        assert index.active(1.0) == (1,)
+
+    def test_matches_linear_scan(self):
+        """Lookups should match a brute-force scan over 1,000+ word clips."""
+        rng = random.Random(42)
+        intervals = [(0.0, 300.0)]  # gameplay layer
+        t = 0.0
+        for _ in range(1200):
+            duration = rng.uniform(0.05, 0.4)
+            intervals.append((t, t + duration))
+            t += duration
+        for start in range(0, 300, 40):
+            intervals.append((float(start), start + 3.0))  # diagrams
+
+        index = IntervalIndex(intervals)
+        for _ in range(2000):
+            probe = rng.uniform(-1.0, 310.0)
+            expected = tuple(
+                i for i, (start, end) in enumerate(intervals)
+                if start <= probe and (end is None or probe < end)
+            )
+            assert index.active(probe) == expected
@@ -0,0 +1,965 @@
+"""
+Tests for video_composer caption and overlay rendering.
+
+Tests cover:
+- Caption sprites cropped to the caption band instead of full frames
+- Caption clip positioning and timing
+- In-memory overlays (no temporary PNG files)
+- Interval-indexed layer lookup in the composite clip
+- Segment base block plus per-word highlight patches
+- Text wrapping with memoized measurements
+- Caption rendering in worker processes matching serial rendering
+- Integer premultiplied overlay blending against MoviePy's float blit
+- The direct ffmpeg and filtergraph render engines matching the MoviePy engine
+- Soft captions: a mov_text track and SRT/WebVTT sidecars instead of burned-in words,
+  with text shown as written in the SRT and the muxed track
+- Gameplay dimming through an interval index into a reused buffer
+- Pooled frame buffers and blend scratch space giving the same frames
+- Segment-parallel chunked rendering matching a single-pass render, each chunk
+  decoding its gameplay privately
+- Checkpointed MoviePy encodes: failing chunks retried, reported and resumed, or discarded
+- Chunks committed as they finish, so a failing chunk keeps the ones done after it
+- Long-form mode streaming layers from the timeline, matching the eager layers
+- Renders reading a cached gameplay proxy instead of scaling every frame
+- Short gameplay looped by modulo time on one decoder
+- Every engine starting the gameplay at the same offset
+- Random ffmpeg-engine starts taken from a running render's shared decoder when enabled
+"""
+
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import numpy as np
+from pathlib import Path
+from unittest.mock import patch
+from PIL import Image, ImageDraw, ImageFont
+
+from moviepy.editor import ColorClip, CompositeVideoClip, VideoFileClip
+
+from backend.pipeline import video_composer
+from backend.pipeline.caption_renderer import shutdown_caption_pool
+from backend.pipeline.checkpoints import ChunkCheckpoint, ChunkRenderError
+from backend.pipeline.ffmpeg_io import ffmpeg_binary
+from backend.pipeline.frame_buffers import FramePool
+from backend.pipeline.video_composer import (
+    GameplayDimmer,
+    ImageClip,
+    IndexedCompositeVideoClip,
+    OverlayClip,
+    StreamingOverlays,
+    _caption_band,
+    _crop_to_content,
+    _create_diagram_overlays,
+    _create_overlay_clips,
+    _create_text_overlay,
+    _render_chunk_count,
+    _create_timed_captions,
+    _image_to_array,
+    _layout_caption_lines,
+    _loop_clip,
+    _render_caption_base,
+    _render_word_patch,
+    _subtitle_cues,
+    _wrap_text,
+    RENDER_ENGINES,
+    compose_video,
+    discard_checkpoints,
+)
+
+
+RESOLUTION = (1080, 1920)
+
+FONT_PATH = Path(__file__).parents[2] / "assets" / "fonts" / "Montserrat-Bold.ttf"
+
+SEGMENTS = [
+    {"text": "Redis caching is lowkey bussin", "start_ms": 0, "end_ms": 2000},
+    {"text": "no cap fr fr", "start_ms": 2000, "end_ms": 3200},
+]
+
+
+def _clip_position(clip):
+    """Return the (x, y) frame position of a MoviePy clip."""
+    return tuple(clip.pos(0))
+
+
+class TestCaptionSprites:
+    """Test that caption clips are cropped strips in the caption band."""
+
+    def test_crop_to_content_returns_tight_box(self):
+        """Should crop to the visible pixels and offset the position."""
+        img = Image.new('RGBA', (100, 50), (0, 0, 0, 0))
+        img.paste((255, 255, 255, 255), (10, 20, 30, 25))
+
+        cropped, position = _crop_to_content(img, (5, 100))
+
+        assert cropped.size == (20, 5)
+        assert position == (15, 120)
+
+    def test_crop_to_content_empty_image(self):
+        """Should return None for a fully transparent image."""
+        img = Image.new('RGBA', (100, 50), (0, 0, 0, 0))
+        cropped, position = _crop_to_content(img, (0, 7))
+        assert cropped is None
+        assert position == (0, 7)
+
+    def test_caption_band_clamped_to_frame(self):
+        """Band should never extend past the bottom of the frame."""
+        top, bottom = _caption_band(1900, 2, 52, 1920)
+        assert top == 1848
+        assert bottom == 1920
+
+    def test_caption_clips_are_not_full_frame(self):
+        """Each caption clip should be much smaller than the output frame."""
+        captions = _create_timed_captions(SEGMENTS, RESOLUTION)
+        # 2 segment blocks + 9 word highlight patches
+        assert len(captions) == 11
+        for clip in captions:
+            w, h = clip.size
+            assert w <= RESOLUTION[0]
+            assert h < RESOLUTION[1] // 4
+
+    def test_caption_clips_positioned_in_caption_band(self):
+        """Cropped clips should sit around the 75% caption line, inside the frame."""
+        captions = _create_timed_captions(SEGMENTS, RESOLUTION)
+        for clip in captions:
+            x, y = _clip_position(clip)
+            w, h = clip.size
+            assert x >= 0 and x + w <= RESOLUTION[0]
+            assert y >= int(RESOLUTION[1] * 0.75) - 52
+            assert y + h <= RESOLUTION[1]
+
+    def test_caption_timing_preserved(self):
+        """Word patches should still start in order and bridge to the next word."""
+        captions = _create_timed_captions(SEGMENTS, RESOLUTION)
+        patches = captions[2:]
+        starts = [clip.start for clip in patches]
+        assert starts == sorted(starts)
+        for current, following in zip(patches, patches[1:]):
+            assert current.end == pytest.approx(following.start)
+
+
+class TestInMemoryOverlays:
+    """Test that overlays are handed to MoviePy as arrays, not temp PNG files."""
+
+    def test_image_to_array_keeps_alpha(self):
+        """RGBA images should stay RGBA so ImageClip builds a mask."""
+        arr = _image_to_array(Image.new('RGBA', (4, 3), (1, 2, 3, 128)))
+        assert arr.shape == (3, 4, 4)
+        assert arr.dtype == np.uint8
+
+    def test_image_to_array_opaque_to_rgb(self):
+        """Opaque images should become RGB arrays (no mask needed)."""
+        arr = _image_to_array(Image.new('L', (4, 3), 200))
+        assert arr.shape == (3, 4, 3)
+
+    def test_captions_write_no_temp_files(self):
+        """Caption rendering should not touch tempfile at all."""
+        with patch('tempfile.NamedTemporaryFile') as mock_tmp:
+            captions = _create_timed_captions(SEGMENTS, RESOLUTION)
+        mock_tmp.assert_not_called()
+        assert captions[0].mask is not None
+
+    def test_text_overlay_returns_array(self):
+        """Static overlay should be returned as a full-frame RGBA array."""
+        arr = _create_text_overlay("hello world", RESOLUTION)
+        assert arr.shape == (RESOLUTION[1], RESOLUTION[0], 4)
+
+    def test_diagram_overlays_from_png(self, tmp_path):
+        """Diagram overlays should be resized in memory and keep their timing."""
+        png_path = tmp_path / "diagram.png"
+        Image.new('RGB', (800, 400), (255, 255, 255)).save(png_path)
+        timings = [{"png_path": str(png_path), "start_s": 1.0, "duration_s": 3.0, "label": "x"}]
+
+        with patch('tempfile.NamedTemporaryFile') as mock_tmp:
+            clips = _create_diagram_overlays(timings, RESOLUTION, video_duration=10.0)
+        mock_tmp.assert_not_called()
+
+        assert len(clips) == 1
+        assert clips[0].start == 1.0
+        assert clips[0].size == (756, 378)
+
+
+class TestIndexedComposite:
+    """Test the interval-indexed composite clip."""
+
+    def test_playing_clips_matches_moviepy_scan(self):
+        """Indexed lookup should return the same layers as CompositeVideoClip."""
+        background = ColorClip((64, 64), color=(0, 0, 0))
+        background = background.set_duration(5.0)
+        layers = [background]
+        for i in range(50):
+            layer = ColorClip((8, 8), color=(255, 255, 0)).set_start(i * 0.1).set_duration(0.1)
+            layers.append(layer)
+
+        indexed = IndexedCompositeVideoClip(layers)
+        reference = CompositeVideoClip(layers)
+
+        for t in np.linspace(0, 5.5, 111):
+            assert indexed.playing_clips(t) == reference.playing_clips(t)
+
+    def test_frame_matches_moviepy_composite(self):
+        """Composited frames should be identical to MoviePy's output."""
+        background = ColorClip((64, 64), color=(10, 20, 30)).set_duration(2.0)
+        overlay = ColorClip((8, 8), color=(255, 255, 0)).set_start(0.5).set_duration(1.0)
+        overlay = overlay.set_position((4, 40))
+
+        indexed = IndexedCompositeVideoClip([background, overlay])
+        reference = CompositeVideoClip([background, overlay])
+
+        for t in (0.0, 0.5, 1.2, 1.5, 1.9):
+            assert np.array_equal(indexed.get_frame(t), reference.get_frame(t))
+
+    def test_pooled_frames_match(self):
+        """A frame pool should reuse one buffer without changing the frames."""
+        rng = np.random.default_rng(5)
+        gameplay = ImageClip(rng.integers(0, 256, (96, 64, 3), dtype=np.uint8)).set_duration(2.0)
+        rgba = rng.integers(0, 256, (20, 40, 4), dtype=np.uint8)
+        overlay = OverlayClip(rgba).set_start(0.5).set_duration(1.0).set_position((10, 60))
+        faded = OverlayClip(rgba).set_duration(2.0).set_position((30, 5)).crossfade(0.5)
+        layers = [gameplay, overlay, faded]
+
+        pool = FramePool((96, 64, 3))
+        pooled = IndexedCompositeVideoClip(layers, frame_pool=pool)
+        reference = IndexedCompositeVideoClip(layers)
+
+        for t in (0.0, 0.2, 0.7, 1.2, 1.9):
+            assert np.array_equal(pooled.get_frame(t), reference.get_frame(t))
+        assert pool.stats()["allocated"] == 1
+        assert pool.stats()["acquired"] == 5
+
+
+class TestHighlightPatches:
+    """Test base-plus-highlight-patch caption rendering."""
+
+    @staticmethod
+    def _reference_frame(layout, font, active_idx, band):
+        """Draw the caption band the old way: every word redrawn, one in yellow."""
+        band_top, band_bottom = band
+        img = Image.new('RGBA', (RESOLUTION[0], band_bottom - band_top), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+        for idx, (word, x, y) in enumerate(layout):
+            draw.text(
+                (x, y - band_top), word,
+                fill='#FFFF00' if idx == active_idx else 'white',
+                font=font, stroke_width=5, stroke_fill='black'
+            )
+        return img
+
+    @staticmethod
+    def _paste(canvas, arr, position, band_top):
+        layer = Image.new('RGBA', canvas.size, (0, 0, 0, 0))
+        layer.paste(Image.fromarray(arr), (position[0], position[1] - band_top))
+        return Image.alpha_composite(canvas, layer)
+
+    def test_base_plus_patch_matches_full_redraw(self):
+        """Base block + yellow patch should be pixel-identical to the full redraw."""
+        font = ImageFont.truetype(str(FONT_PATH), 52)
+        lines = ["Redis caching is lowkey", "bussin no cap"]
+        band = (1388, 1640)
+        layout = _layout_caption_lines(lines, font, RESOLUTION[0], 1440, 62)
+        base, base_position = _render_caption_base(layout, font, RESOLUTION[0], band)
+
+        background = Image.new('RGBA', (RESOLUTION[0], band[1] - band[0]), (40, 90, 160, 255))
+        for active_idx, (word, x, y) in enumerate(layout):
+            patch, patch_position = _render_word_patch(word, (x, y), font)
+
+            composed = self._paste(background, base, base_position, band[0])
+            composed = self._paste(composed, patch, patch_position, band[0])
+            expected = Image.alpha_composite(
+                background, self._reference_frame(layout, font, active_idx, band)
+            )
+            assert np.array_equal(np.asarray(composed), np.asarray(expected)), word
+
+    def test_patch_is_small_and_binary_alpha(self):
+        """Patches should be word-sized with fully opaque or fully clear pixels."""
+        font = ImageFont.truetype(str(FONT_PATH), 52)
+        patch, position = _render_word_patch("cache", (400, 1440), font)
+        assert patch.shape[0] < 100 and patch.shape[1] < 250
+        assert set(np.unique(patch[:, :, 3])) <= {0, 255}
+        assert position[0] < 400 and position[1] > 1400
+
+
+class TestWrapText:
+    """Test linear-time text wrapping."""
+
+    @staticmethod
+    def _reference_wrap(text, font, max_width):
+        """The original quadratic wrap: re-measure the joined line for every word."""
+        lines, current_line = [], []
+        for word in text.split():
+            bbox = font.getbbox(' '.join(current_line + [word]))
+            if bbox[2] - bbox[0] <= max_width:
+                current_line.append(word)
+            elif current_line:
+                lines.append(' '.join(current_line))
+                current_line = [word]
+            else:
+                lines.append(word)
+        if current_line:
+            lines.append(' '.join(current_line))
+        return lines
+
+    @pytest.mark.parametrize("max_width", [120, 400, 1000])
+    def test_matches_joined_string_measurement(self, max_width):
+        """Wrapping should produce exactly the same lines as before."""
+        font = ImageFont.truetype(str(FONT_PATH), 52)
+        text = (Path(__file__).parents[2] / "test_inputs" / "redis_entity_caching_brainrot.txt").read_text()
+        assert _wrap_text(text, font, max_width) == self._reference_wrap(text, font, max_width)
+
+    def test_overlong_word_gets_own_line(self):
+        """A single word wider than the limit is still emitted."""
+        font = ImageFont.truetype(str(FONT_PATH), 52)
+        assert _wrap_text("a supercalifragilistic b", font, 100) == ["a", "supercalifragilistic", "b"]
+
+
+class TestParallelCaptions:
+    """Test caption pre-rendering spread across worker processes."""
+
+    @staticmethod
+    def _snapshot(clips):
+        return [
+            (clip.start, clip.end, _clip_position(clip), clip.get_frame(0), clip.mask.get_frame(0))
+            for clip in clips
+        ]
+
+    def test_worker_pool_matches_serial(self):
+        """Clips rendered in a process pool should be identical to serial rendering."""
+        serial = _create_timed_captions(SEGMENTS, RESOLUTION, render_workers=0)
+        try:
+            parallel = _create_timed_captions(SEGMENTS, RESOLUTION, render_workers=2)
+        finally:
+            shutdown_caption_pool()
+
+        assert len(parallel) == len(serial)
+        for expected, actual in zip(self._snapshot(serial), self._snapshot(parallel)):
+            assert actual[:3] == expected[:3]
+            assert np.array_equal(actual[3], expected[3])
+            assert np.array_equal(actual[4], expected[4])
+
+
+class TestOverlayBlend:
+    """Test integer blending of OverlayClip layers."""
+
+    @pytest.fixture
+    def background(self):
+        rng = np.random.default_rng(1)
+        clip = ImageClip(rng.integers(0, 256, (120, 160, 3), dtype=np.uint8))
+        return clip.set_duration(3)
+
+    @staticmethod
+    def _max_diff(a, b):
+        return int(np.abs(a.astype(np.int16) - b.astype(np.int16)).max())
+
+    def test_binary_alpha_matches_moviepy_exactly(self, background):
+        """Caption patches (alpha 0 or 255) should blend pixel-identically."""
+        sprite = np.zeros((20, 40, 4), dtype=np.uint8)
+        sprite[5:15, 10:30] = (255, 255, 0, 255)
+
+        plain = ImageClip(sprite).set_duration(3).set_position((50, 60))
+        overlay = OverlayClip(sprite).set_duration(3).set_position((50, 60))
+
+        expected = CompositeVideoClip([background, plain]).get_frame(1)
+        actual = IndexedCompositeVideoClip([background, overlay]).get_frame(1)
+        assert np.array_equal(actual, expected)
+
+    def test_soft_alpha_within_rounding(self, background):
+        """Anti-aliased edges should differ from MoviePy's float blit by at most 1."""
+        rng = np.random.default_rng(2)
+        sprite = rng.integers(0, 256, (30, 50, 4), dtype=np.uint8)
+
+        plain = ImageClip(sprite).set_duration(3).set_position(('center', 70))
+        overlay = OverlayClip(sprite).set_duration(3).set_position(('center', 70))
+
+        expected = CompositeVideoClip([background, plain]).get_frame(1)
+        actual = IndexedCompositeVideoClip([background, overlay]).get_frame(1)
+        assert self._max_diff(actual, expected) <= 1
+
+    def test_crossfade_follows_moviepy_fade(self, background):
+        """Diagram fades should track MoviePy's crossfade mask."""
+        rng = np.random.default_rng(3)
+        image = rng.integers(0, 256, (40, 60, 3), dtype=np.uint8)
+
+        plain = ImageClip(image).set_duration(3).set_position((20, 10))
+        plain = plain.crossfadein(0.5).crossfadeout(0.5)
+        overlay = OverlayClip(image).set_duration(3).set_position((20, 10)).crossfade(0.5)
+
+        expected_clip = CompositeVideoClip([background, plain])
+        actual_clip = IndexedCompositeVideoClip([background, overlay])
+        for t in (0.0, 0.1, 0.3, 1.5, 2.7, 2.95):
+            assert self._max_diff(actual_clip.get_frame(t), expected_clip.get_frame(t)) <= 2
+
+    def test_layer_partly_outside_frame(self, background):
+        """Layers hanging over the frame edge should be clipped, not wrapped."""
+        sprite = np.full((30, 30, 4), 255, dtype=np.uint8)
+        overlay = OverlayClip(sprite).set_duration(3).set_position((-10, 100))
+
+        frame = IndexedCompositeVideoClip([background, overlay]).get_frame(1)
+        assert (frame[100:, :20] == 255).all()
+        assert np.array_equal(frame[:100], background.get_frame(1)[:100])
+
+    def test_transparent_border_trimmed(self):
+        """Only the bounding rectangle of visible pixels should be kept for blending."""
+        sprite = np.zeros((50, 40, 4), dtype=np.uint8)
+        sprite[20:25, 8:30, 3] = 128
+        overlay = OverlayClip(sprite)
+        assert overlay._premultiplied.shape[:2] == (5, 22)
+        assert overlay._offset == (8, 20)
+        assert overlay.size == (40, 50)
+
+    def test_frame_bounds(self):
+        """Bounds should be the visible rectangle on the frame, clipped to it."""
+        sprite = np.zeros((50, 40, 4), dtype=np.uint8)
+        sprite[20:25, 8:30, 3] = 255
+        overlay = OverlayClip(sprite).set_start(1).set_duration(2)
+        assert overlay.set_position((100, 10)).frame_bounds(1.5, (120, 160)) == (108, 30, 130, 35)
+        assert overlay.set_position((-20, 10)).frame_bounds(1.5, (120, 160)) == (0, 30, 10, 35)
+        assert overlay.set_position((200, 10)).frame_bounds(1.5, (120, 160)) is None
+
+    def test_full_frame_overlay_matches_moviepy(self, background):
+        """A mostly transparent full-frame overlay should blend like MoviePy's blit."""
+        sprite = np.zeros((120, 160, 4), dtype=np.uint8)
+        sprite[70:90, 30:110] = (255, 255, 0, 255)
+        sprite[75:85, 40:100, 3] = 128
+        overlay = OverlayClip(sprite).set_duration(3)
+        expected = CompositeVideoClip([background, ImageClip(sprite).set_duration(3)]).get_frame(1)
+        actual = IndexedCompositeVideoClip([background, overlay]).get_frame(1)
+        assert self._max_diff(actual, expected) <= 1
+
+    def test_scratch_blend_matches(self, background):
+        """Blending through scratch space should give the same pixels."""
+        rng = np.random.default_rng(2)
+        clip = OverlayClip(rng.integers(0, 256, (30, 50, 4), dtype=np.uint8))
+        clip = clip.set_duration(2.0).set_position((-10, 20))
+        frame = background.get_frame(0)
+        scratch = np.empty(frame.shape[0] * frame.shape[1] * 4, dtype=np.uint16)
+        expected = frame.copy()
+        clip.blend_into(expected, 1.0)
+        actual = frame.copy()
+        clip.blend_into(actual, 1.0, scratch)
+        assert np.array_equal(actual, expected)
+
+    def test_blit_on_leaves_input_untouched(self, background):
+        """Inside plain MoviePy composites the overlay must not mutate shared frames."""
+        picture = background.get_frame(0)
+        before = picture.copy()
+        sprite = np.full((10, 10, 4), 255, dtype=np.uint8)
+
+        result = OverlayClip(sprite).set_duration(1).blit_on(picture, 0)
+
+        assert np.array_equal(picture, before)
+        assert (result[:10, :10] == 255).all()
+
+
+@pytest.fixture(scope="module")
+def media(tmp_path_factory, testsrc_clip):
+    """A 1s gameplay clip (looped by every engine), a 2s tone and a diagram."""
+    path = tmp_path_factory.mktemp("engines")
+    testsrc_clip(path / "gameplay.mp4", (270, 480))
+    subprocess.run(
+        [ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "lavfi",
+         "-i", "sine=frequency=440:duration=2", str(path / "audio.mp3")],
+        check=True
+    )
+    Image.new("RGB", (200, 120), (200, 230, 255)).save(path / "diagram.png")
+    return path
+
+
+class TestRenderEngines:
+    """Test the direct ffmpeg engine against the MoviePy engine."""
+
+    def _compose(self, media, engine, caption_mode="burned", chunks=None, gameplay_start=0.0):
+        offset = f"-at{gameplay_start}" if gameplay_start else ""
+        output = media / f"{engine}-{caption_mode}-{chunks}{offset}.mp4"
+        compose_video(
+            "no cap fr fr",
+            str(media / "audio.mp3"),
+            str(media / "gameplay.mp4"),
+            str(output),
+            resolution=(270, 480),
+            timed_segments=SEGMENTS[:1],
+            diagram_timings=[{
+                "png_path": str(media / "diagram.png"),
+                "start_s": 0.5, "duration_s": 1.0, "label": "cache",
+            }],
+            engine=engine,
+            caption_mode=caption_mode,
+            chunks=chunks,
+            gameplay_start=gameplay_start,
+        )
+        return VideoFileClip(str(output))
+
+    def test_ffmpeg_engine_matches_moviepy(self, media):
+        """Both engines should produce the same frames, length and audio."""
+        expected = self._compose(media, "moviepy")
+        actual = self._compose(media, "ffmpeg")
+        try:
+            assert actual.size == expected.size
+            assert actual.fps == expected.fps
+            assert actual.duration == pytest.approx(expected.duration, abs=0.05)
+            assert actual.audio is not None
+            for t in (0.2, 0.7, 1.2, 1.9):
+                diff = np.abs(actual.get_frame(t).astype(int) - expected.get_frame(t))
+                assert diff.mean() < 3
+        finally:
+            expected.close()
+            actual.close()
+
+    def test_filtergraph_engine_matches_moviepy(self, media):
+        """libass captions and ffmpeg overlays should reproduce the MoviePy frames."""
+        expected = self._compose(media, "moviepy")
+        actual = self._compose(media, "filtergraph")
+        try:
+            assert actual.size == expected.size
+            assert actual.duration == pytest.approx(expected.duration, abs=0.05)
+            assert actual.audio is not None
+            for t in (0.2, 0.7, 1.2, 1.9):
+                diff = np.abs(actual.get_frame(t).astype(int) - expected.get_frame(t))
+                assert diff.mean() < 3
+        finally:
+            expected.close()
+            actual.close()
+
+    @pytest.mark.parametrize("engine,chunks", [("ffmpeg", None), ("ffmpeg", 2), ("filtergraph", None)])
+    def test_engines_match_moviepy_from_offset(self, media, engine, chunks):
+        """Every engine should start the gameplay at the same offset into the clip."""
+        expected = self._compose(media, "moviepy", gameplay_start=0.5)
+        actual = self._compose(media, engine, chunks=chunks, gameplay_start=0.5)
+        from_zero = self._compose(media, "moviepy")
+        try:
+            assert actual.duration == pytest.approx(expected.duration, abs=0.05)
+            for t in (0.2, 0.7, 1.2, 1.9):
+                diff = np.abs(actual.get_frame(t).astype(int) - expected.get_frame(t))
+                assert diff.mean() < 3
+            # The offset moved the gameplay (at 0.2s no overlay covers it)
+            moved = np.abs(from_zero.get_frame(0.2).astype(int) - expected.get_frame(0.2))
+            assert moved.max() > 100
+        finally:
+            expected.close()
+            actual.close()
+            from_zero.close()
+
+    def test_random_start_joins_running_render(self, media):
+        """A random ffmpeg-engine start should be the one a running decoder offers."""
+        with patch.object(video_composer, "live_gameplay_start", return_value=0.5) as live, \
+                patch.object(video_composer, "random_gameplay_start") as random_start:
+            actual = self._compose(media, "ffmpeg", gameplay_start=None)
+        live.assert_called_once()
+        random_start.assert_not_called()
+        expected = self._compose(media, "moviepy", gameplay_start=0.5)
+        try:
+            for t in (0.2, 1.2):
+                diff = np.abs(actual.get_frame(t).astype(int) - expected.get_frame(t))
+                assert diff.mean() < 3
+        finally:
+            expected.close()
+            actual.close()
+
+    def test_unknown_engine_rejected(self, media):
+        """An unknown engine name should fail before any rendering."""
+        with pytest.raises(ValueError, match="render engine"):
+            compose_video(
+                "text", str(media / "audio.mp3"), str(media / "gameplay.mp4"),
+                str(media / "out.mp4"), engine="blender"
+            )
+
+    @pytest.mark.parametrize("engine", RENDER_ENGINES)
+    def test_soft_captions_muxed_not_burned(self, media, engine):
+        """Soft captions should leave the caption band clean and add a subtitle track."""
+        burned = self._compose(media, engine)
+        soft = self._compose(media, engine, "soft")
+        try:
+            assert soft.duration == pytest.approx(2.0, abs=0.05)
+            assert soft.audio is not None
+            band = slice(int(480 * 0.75) - 10, int(480 * 0.75) + 60)
+            burned_frame = burned.get_frame(0.2).astype(int)
+            soft_frame = soft.get_frame(0.2).astype(int)
+            assert np.abs(soft_frame[band] - burned_frame[band]).mean() > 10
+            assert np.abs(soft_frame[:band.start] - burned_frame[:band.start]).mean() < 3
+        finally:
+            burned.close()
+            soft.close()
+
+        output = media / f"{engine}-soft-None.mp4"
+        probe = subprocess.run(
+            [ffmpeg_binary(), "-hide_banner", "-i", str(output)],
+            capture_output=True, text=True
+        )
+        assert "Subtitle: mov_text" in probe.stderr
+        assert output.with_suffix(".srt").read_text().startswith("1\n00:00:00,000 --> ")
+        assert output.with_suffix(".vtt").read_text().startswith("WEBVTT\n")
+        assert not output.with_suffix(".nosubs.mp4").exists()
+
+    def test_soft_captions_keep_plain_text(self, media):
+        """Characters that are markup in WebVTT should reach the SRT and the muxed track as written."""
+        output = media / "soft-markup.mp4"
+        compose_video(
+            "R&D <3", str(media / "audio.mp3"), str(media / "gameplay.mp4"), str(output),
+            resolution=(270, 480),
+            timed_segments=[{"text": "R&D <3", "start_ms": 0, "end_ms": 2000}],
+            engine="ffmpeg",
+            caption_mode="soft",
+        )
+        assert "R&D <3" in output.with_suffix(".srt").read_text()
+        vtt = output.with_suffix(".vtt").read_text()
+        assert "R&amp;D" in vtt and "&lt;3" in vtt
+        track = subprocess.run(
+            [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-i", str(output),
+             "-map", "0:s:0", "-f", "srt", "-"],
+            capture_output=True, text=True, check=True
+        )
+        assert "R&D <3" in track.stdout
+        assert "&amp;" not in track.stdout
+
+    def test_chunked_render_matches_single_pass(self, media):
+        """Chunks joined by the concat demuxer should equal one pass, with audio once."""
+        with patch("backend.pipeline.video_composer.MIN_CHUNK_SECONDS", 0.5):
+            chunked = self._compose(media, "ffmpeg", chunks=3)
+        single = self._compose(media, "ffmpeg", chunks=1)
+        try:
+            assert chunked.duration == pytest.approx(single.duration, abs=0.05)
+            assert chunked.audio is not None
+            assert sum(1 for _ in chunked.iter_frames()) == sum(1 for _ in single.iter_frames())
+            for t in (0.2, 0.65, 0.7, 1.2, 1.35, 1.9):
+                diff = np.abs(chunked.get_frame(t).astype(int) - single.get_frame(t))
+                assert diff.mean() < 3
+        finally:
+            chunked.close()
+            single.close()
+        assert not (media / ".ffmpeg-burned-3.mp4.chunks").exists()
+
+    def test_chunks_decode_privately(self, media):
+        """Chunks of one render should never join each other's shared gameplay decoder."""
+        open_gameplay_reader = video_composer.open_gameplay_reader
+        shared = []
+
+        def threads(max_workers, mp_context):
+            return ThreadPoolExecutor(max_workers=max_workers)
+
+        def reader(*args, **kwargs):
+            shared.append(kwargs["shared"])
+            return open_gameplay_reader(*args, **kwargs)
+
+        with patch("backend.pipeline.video_composer.MIN_CHUNK_SECONDS", 0.5), \
+                patch("backend.pipeline.video_composer.ProcessPoolExecutor", side_effect=threads), \
+                patch("backend.pipeline.video_composer.open_gameplay_reader", side_effect=reader):
+            self._compose(media, "ffmpeg", chunks=3, gameplay_start=0.25).close()
+        assert len(shared) > 1
+        assert not any(shared)
+
+    def test_failed_chunk_resumes(self, media):
+        """A chunk that keeps failing should be named; the next render redoes only that chunk."""
+        write_clip_frames = video_composer._write_clip_frames
+        written = []
+
+        def flaky_write(clip, times, path, *args):
+            written.append(Path(path).name)
+            if fail and "chunk_0001" in path:
+                raise BrokenPipeError("encoder pipe closed")
+            write_clip_frames(clip, times, path, *args)
+
+        output = media / "resumed.mp4"
+        args = ("no cap fr fr", str(media / "audio.mp3"), str(media / "gameplay.mp4"), str(output))
+        kwargs = {
+            "resolution": (270, 480), "timed_segments": SEGMENTS[:1], "engine": "moviepy",
+            "diagram_timings": [{
+                "png_path": str(media / "diagram.png"),
+                "start_s": 0.5, "duration_s": 1.0, "label": "cache",
+            }],
+        }
+        with patch("backend.pipeline.video_composer.CHECKPOINT_SECONDS", 0.5), \
+                patch("backend.pipeline.video_composer._write_clip_frames", side_effect=flaky_write):
+            fail = True
+            with pytest.raises(ChunkRenderError) as excinfo:
+                compose_video(*args, **kwargs)
+            assert excinfo.value.chunk_index == 1
+            # The other chunks were finished; the failing one was retried once
+            assert written.count("chunk_0001.part.mp4") == 2
+            assert len(set(written)) == excinfo.value.chunk_count
+
+            fail = False
+            written.clear()
+            compose_video(*args, **kwargs)
+            assert written == ["chunk_0001.part.mp4"]
+
+        expected = self._compose(media, "moviepy")
+        actual = VideoFileClip(str(output))
+        try:
+            assert actual.duration == pytest.approx(expected.duration, abs=0.05)
+            assert actual.audio is not None
+            for t in (0.2, 0.7, 1.2, 1.9):
+                diff = np.abs(actual.get_frame(t).astype(int) - expected.get_frame(t))
+                assert diff.mean() < 1
+        finally:
+            expected.close()
+            actual.close()
+        assert not (media / ".resumed.mp4.chunks").exists()
+
+    def test_discard_checkpoints_of_failed_render(self, media):
+        """Discarding a failed soft-caption render should remove its checkpoints and scratch file."""
+        output = media / "discarded.mp4"
+        with patch("backend.pipeline.video_composer.CHECKPOINT_SECONDS", 0.5), \
+                patch("backend.pipeline.video_composer._write_clip_frames",
+                      side_effect=BrokenPipeError("encoder pipe closed")):
+            with pytest.raises(ChunkRenderError):
+                compose_video(
+                    "no cap fr fr", str(media / "audio.mp3"), str(media / "gameplay.mp4"),
+                    str(output), resolution=(270, 480), timed_segments=SEGMENTS[:1],
+                    engine="moviepy", caption_mode="soft",
+                )
+        checkpoint = media / ".discarded.nosubs.mp4.chunks"
+        assert checkpoint.is_dir()
+
+        discard_checkpoints(str(output))
+        assert not checkpoint.exists()
+        assert not output.with_suffix(".nosubs.mp4").exists()
+
+    def test_long_form_matches_eager_layers(self, media):
+        """Streaming the layers should render the same video as building them up front."""
+        eager = self._compose(media, "ffmpeg")
+        output = media / "long-form.mp4"
+        compose_video(
+            "no cap fr fr", str(media / "audio.mp3"), str(media / "gameplay.mp4"), str(output),
+            resolution=(270, 480),
+            timed_segments=SEGMENTS[:1],
+            diagram_timings=[{
+                "png_path": str(media / "diagram.png"),
+                "start_s": 0.5, "duration_s": 1.0, "label": "cache",
+            }],
+            long_form=True,
+        )
+        streamed = VideoFileClip(str(output))
+        try:
+            assert streamed.duration == pytest.approx(eager.duration, abs=0.01)
+            assert streamed.audio is not None
+            for t in (0.2, 0.7, 1.2, 1.9):
+                assert np.array_equal(streamed.get_frame(t), eager.get_frame(t))
+        finally:
+            eager.close()
+            streamed.close()
+
+    def test_long_form_needs_ffmpeg_engine(self, media):
+        """Long-form mode with an engine that builds every layer up front should be rejected."""
+        with pytest.raises(ValueError, match="Long-form"):
+            compose_video(
+                "text", str(media / "audio.mp3"), str(media / "gameplay.mp4"),
+                str(media / "out.mp4"), engine="moviepy", long_form=True
+            )
+
+    def test_renders_from_gameplay_proxy(self, media):
+        """compose_video should render from the cached proxy, transcoding it only once."""
+        self._compose(media, "ffmpeg").close()
+        proxies = list((media / ".proxies").glob("*_270x480_24fps_*.mp4"))
+        assert len(proxies) == 1
+        with patch("backend.pipeline.gameplay.run_ffmpeg") as run, \
+                patch("backend.pipeline.video_composer.open_gameplay_reader",
+                      wraps=video_composer.open_gameplay_reader) as reader:
+            self._compose(media, "ffmpeg").close()
+        run.assert_not_called()
+        assert reader.call_args.args[0] == str(proxies[0])
+
+    def test_moviepy_engine_skips_resize_of_proxy(self, media):
+        """A proxy already at the output size should never be resized frame by frame."""
+        with patch("backend.pipeline.video_composer._clip_resize") as resize:
+            self._compose(media, "moviepy").close()
+        resize.assert_not_called()
+
+    def test_chunk_count_scales_with_cores(self):
+        """0 should mean one chunk per core, capped so chunks stay MIN_CHUNK_SECONDS long."""
+        with patch("backend.pipeline.video_composer.os.cpu_count", return_value=8):
+            assert _render_chunk_count(0, 60.0) == 8
+            assert _render_chunk_count(0, 7.0) == 3
+        assert _render_chunk_count(4, 60.0) == 4
+        assert _render_chunk_count(4, 1.0) == 1
+
+    def test_unknown_caption_mode_rejected(self, media):
+        """An unknown caption mode should fail before any rendering."""
+        with pytest.raises(ValueError, match="caption mode"):
+            compose_video(
+                "text", str(media / "audio.mp3"), str(media / "gameplay.mp4"),
+                str(media / "out.mp4"), caption_mode="hardsub"
+            )
+
+
+class TestGameplayDimmer:
+    """Test the indexed, integer gameplay dimming."""
+
+    @pytest.fixture
+    def frame(self):
+        return np.random.default_rng(3).integers(0, 256, (48, 27, 3), dtype=np.uint8)
+
+    def test_matches_float_dimming(self, frame):
+        """Dimmed frames should equal the old (frame * 0.5).astype('uint8')."""
+        dimmer = GameplayDimmer([(1.0, 2.0)])
+        np.testing.assert_array_equal(
+            dimmer(lambda t: frame, 1.5), (frame * 0.5).astype('uint8')
+        )
+
+    def test_window_edges_and_overlaps(self, frame):
+        """Windows are half-open, and overlapping windows dim only once."""
+        dimmer = GameplayDimmer([(1.0, 3.0), (2.0, 4.0), (6.0, 7.0)])
+        assert dimmer(lambda t: frame, 0.99) is frame
+        assert dimmer(lambda t: frame, 4.0) is frame
+        assert dimmer(lambda t: frame, 7.0) is frame
+        np.testing.assert_array_equal(dimmer(lambda t: frame, 2.5), frame >> 1)
+
+    def test_reuses_one_buffer(self, frame):
+        """Every dimmed frame should be written into the same buffer."""
+        dimmer = GameplayDimmer([(0.0, 10.0)])
+        first = dimmer(lambda t: frame, 0.0)
+        second = dimmer(lambda t: frame, 1.0)
+        assert first is second
+        assert frame.max() > first.max()
+
+    def test_many_diagrams_share_pixels(self, tmp_path):
+        """A diagram shown in several windows should be decoded once."""
+        png = tmp_path / "diagram.png"
+        Image.new("RGB", (200, 120), (200, 230, 255)).save(png)
+        timings = [
+            {"png_path": str(png), "start_s": 4.0 * i, "duration_s": 3.0, "label": "cache"}
+            for i in range(10)
+        ]
+        with patch("backend.pipeline.video_composer.Image.open", wraps=Image.open) as opened:
+            clips = _create_diagram_overlays(timings, (270, 480), 60.0)
+        assert len(clips) == 10
+        # One open per window to read the size, plus one decode for the pixels
+        assert opened.call_count == 11
+        assert all(clip._premultiplied is clips[0]._premultiplied for clip in clips)
+
+
+class TestRenderCheckpointed:
+    """Test committing checkpointed chunks as they finish."""
+
+    def test_finished_chunks_committed_before_failure(self, tmp_path):
+        """Chunks finishing after an earlier chunk fails should still be committed."""
+        frame_ranges = [(0, 10), (10, 20), (20, 30)]
+        checkpoint = ChunkCheckpoint(str(tmp_path / "out.mp4"), {"frame_ranges": frame_ranges})
+        others_done = threading.Barrier(3)
+
+        def render(i):
+            if i == 0:
+                others_done.wait(timeout=5)
+                raise ValueError("bad overlay")
+            Path(checkpoint.partial_path(i)).write_bytes(b"chunk")
+            others_done.wait(timeout=5)
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            with pytest.raises(ChunkRenderError) as excinfo:
+                video_composer._render_checkpointed(
+                    checkpoint, frame_ranges, render, [0, 1, 2], executor=pool
+                )
+        assert excinfo.value.chunk_index == 0
+        assert [checkpoint.is_done(i) for i in range(3)] == [False, True, True]
+
+
+@pytest.fixture(scope="module")
+def gameplay(tmp_path_factory, testsrc_clip):
+    """A 1s 64x36 gameplay clip to loop."""
+    return testsrc_clip(tmp_path_factory.mktemp("loop") / "gameplay.mp4", (64, 36))
+
+
+class TestLoopClip:
+    """Test modulo-time gameplay looping."""
+
+    def test_frames_repeat_the_clip(self, gameplay):
+        """Frame t of the loop should be frame t mod duration of the clip."""
+        source = VideoFileClip(str(gameplay), audio=False)
+        reference = VideoFileClip(str(gameplay), audio=False)
+        try:
+            looped = _loop_clip(source, 3.5)
+            assert looped.duration == 3.5
+            for t in (0.0, 0.5, 1.0, 1.75, 2.0, 3.25):
+                np.testing.assert_array_equal(looped.get_frame(t), reference.get_frame(t % 1.0))
+        finally:
+            source.close()
+            reference.close()
+
+    def test_one_decoder_restarted_per_pass(self, gameplay):
+        """Reading every frame should restart the clip's one decoder once per wrap."""
+        source = VideoFileClip(str(gameplay), audio=False)
+        try:
+            looped = _loop_clip(source, 5.0)
+            with patch.object(source.reader, "initialize", wraps=source.reader.initialize) as init:
+                for t in np.arange(0, 5.0, 1 / 24):
+                    looped.get_frame(t)
+            assert init.call_count == 4
+        finally:
+            source.close()
+
+
+class TestSubtitleCues:
+    """Test the timing of soft-subtitle cues."""
+
+    def test_cues_follow_caption_spans(self):
+        """One cue per segment, lasting until the next segment's first word."""
+        cues = _subtitle_cues("", SEGMENTS, None, RESOLUTION, 10.0)
+        assert [cue.text for cue in cues] == [seg["text"] for seg in SEGMENTS]
+        assert cues[0].start == 0.0
+        assert cues[0].end == pytest.approx(cues[1].start)
+        assert cues[1].start == pytest.approx(2.0)
+        assert [start for _, start in cues[0].words] == sorted(start for _, start in cues[0].words)
+
+    def test_cues_clamped_to_duration(self):
+        """The last word's 1.5s tail should not run past the video."""
+        cues = _subtitle_cues("", SEGMENTS, None, RESOLUTION, 3.5)
+        assert cues[-1].end == 3.5
+
+    def test_untimed_text_is_one_cue(self):
+        """Static captions become a single cue over the whole video."""
+        cues = _subtitle_cues("no cap fr", None, None, RESOLUTION, 4.0)
+        assert len(cues) == 1
+        assert (cues[0].start, cues[0].end, cues[0].text) == (0.0, 4.0, "no cap fr")
+        assert _subtitle_cues("   ", None, None, RESOLUTION, 4.0) == []
+
+
+class TestStreamingOverlays:
+    """Test the lazily built long-form layers."""
+
+    @pytest.fixture
+    def overlay_args(self, tmp_path):
+        png_path = tmp_path / "diagram.png"
+        Image.new('RGB', (400, 200), (200, 230, 255)).save(png_path)
+        return {
+            "text": "",
+            "resolution": (270, 480),
+            "video_duration": 4.0,
+            "timed_segments": SEGMENTS,
+            "diagram_timings": [{
+                "png_path": str(png_path), "start_s": 1.0, "duration_s": 2.0, "label": "x",
+            }],
+        }
+
+    @staticmethod
+    def _blend(layers, t):
+        frame = np.zeros((480, 270, 3), dtype=np.uint8)
+        for layer in layers:
+            layer.blend_into(frame, t)
+        return frame
+
+    def test_active_layers_match_eager_clips(self, overlay_args):
+        """At every frame, the streamed layers should draw what the eager clips draw."""
+        eager = _create_overlay_clips(**overlay_args)
+        streaming = StreamingOverlays(**overlay_args)
+        for t in np.arange(0, 5.0, 1 / 24):
+            expected = [clip for clip in eager if clip.start <= t < clip.end]
+            actual = streaming.active(t)
+            assert len(actual) == len(expected)
+            assert np.array_equal(self._blend(actual, t), self._blend(expected, t))
+        assert streaming.end == pytest.approx(max(clip.end for clip in eager))
+
+    def test_past_layers_dropped(self, overlay_args):
+        """Each group should be built once and released after playback passes it."""
+        streaming = StreamingOverlays(**overlay_args)
+        for t in np.arange(0, 5.0, 1 / 24):
+            streaming.active(t)
+        # Two caption segments and one diagram, never more than two held at once
+        assert streaming.groups_built == 3
+        assert streaming.peak_groups == 2
+        assert streaming.active(10.0) == []
+        assert not streaming._built
+
+    def test_window_skips_other_layers(self, overlay_args):
+        """Layers outside the window should not even be planned for building."""
+        streaming = StreamingOverlays(**overlay_args, window=(0.0, 0.5))
+        assert len(streaming._builders) == 1